@@ -0,0 +1,95 @@
+from dash import Input, Output, no_update
+
+from app.content.chaos import GRID_FAILED_TEXT, GRID_PROGRESS_LABEL, GRID_UNAVAILABLE_TEXT
+from src.double_pendulum.jobs import CANCELLED, DONE, FAILED, grid_jobs
+from src.double_pendulum.plotting.figures import flip_map_figure, ftle_figure
+
+
+# The grids shown on the chaos page: unit lengths and masses, released from rest
+PAGE_PARAMETERS = {'l1': 1.0, 'l2': 1.0, 'm1': 1.0, 'm2': 1.0, 'g': 9.81}
+FLIP_MAP_SETTINGS = dict(
+    parameters=PAGE_PARAMETERS,
+    shape=(200, 200),
+    max_time=10.0,
+    step=0.01,
+    tile_size=50,
+)
+FTLE_SETTINGS = dict(
+    parameters=PAGE_PARAMETERS,
+    shape=(256, 256),
+    duration=5.0,
+    step=0.01,
+    method='stencil',
+    tile_size=64,
+)
+
+
+def _ensure_computed(grid, name, compute, settings, retry=False):
+    """
+    Start (or follow) the background job computing ``grid``; return ``(status_text, finished)``.
+
+    Grids run on the separate ``grid_jobs`` pool, so they never hold the
+    slots of user simulations. Without background jobs nothing is computed
+    in the request and only a grid that is already stored is shown. A grid
+    whose job failed or was cancelled is reported as finished, so the page
+    stops polling; ``retry`` (the first poll after loading the page) starts
+    it again.
+    """
+    if grid.complete():
+        return '', True
+
+    jobs = grid_jobs()
+    if jobs is None:
+        return GRID_UNAVAILABLE_TEXT.format(name=name), True
+
+    job_id = f"{name.replace(' ', '-')}-{grid.key}"
+    state = jobs.status(job_id)
+    if state is not None and state['status'] in (FAILED, CANCELLED) and not retry:
+        return GRID_FAILED_TEXT.format(name=name, reason=state['error'] or state['status']), True
+    if state is not None and state['status'] == DONE:
+        # The job finished but tiles are missing again (the stored grid was removed): run it anew
+        jobs.forget(job_id)
+    # An identical queued or running job is reused; finished tiles are kept if it is restarted
+    state = jobs.submit(job_id, compute, **settings)
+    return GRID_PROGRESS_LABEL.format(name=name, percent=100 * state['progress']), False
+
+
+def register_chaos_callbacks(app):
+    @app.callback(
+        Output('flip-map-graph', 'figure'),
+        Output('flip-map-status', 'children'),
+        Output('flip-map-poll', 'disabled'),
+        Input('flip-map-poll', 'n_intervals'),
+    )
+    def update_flip_map(n_intervals):
+        from src.double_pendulum.chaos import FlipMap, compute_flip_map  # Deferred SymPy and SciPy imports
+
+        flip_map = FlipMap(**FLIP_MAP_SETTINGS)
+        status, finished = _ensure_computed(flip_map, 'flip map', compute_flip_map, FLIP_MAP_SETTINGS,
+                                            retry=not n_intervals)
+        if status and finished:
+            return no_update, status, True
+        figure = flip_map_figure(flip_map.theta1, flip_map.theta2, flip_map.open(), flip_map.max_time,
+                                 flip_map.step)
+        return figure, status, finished
+
+    @app.callback(
+        Output('ftle-graph', 'figure'),
+        Output('ftle-status', 'children'),
+        Output('ftle-poll', 'disabled'),
+        Input('ftle-poll', 'n_intervals'),
+        Input('ftle-colour-range', 'value'),
+        Input('ftle-colourscale', 'value'),
+    )
+    def update_ftle_field(n_intervals, colour_range, colourscale):
+        from src.double_pendulum.chaos import FTLEField, compute_ftle_field  # Deferred SymPy and SciPy imports
+
+        field = FTLEField(**FTLE_SETTINGS)
+        status, finished = _ensure_computed(field, 'FTLE field', compute_ftle_field, FTLE_SETTINGS,
+                                            retry=not n_intervals)
+        if status and finished:
+            return no_update, status, True
+        # Redrawn from the stored field: a new colour range or palette costs no integration
+        zmin, zmax = colour_range or (None, None)
+        figure = ftle_figure(field.theta1, field.theta2, field.open(), zmin, zmax, colourscale)
+        return figure, status, finished
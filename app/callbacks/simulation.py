@@ -1,22 +1,203 @@
 import dash
 from dash import no_update
-from dash.dependencies import Input, Output, State
+from dash.dependencies import ClientsideFunction, Input, Output, State
 from dash.exceptions import PreventUpdate
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+import numpy as np
 import plotly.graph_objs as go
-import plotly.tools as tls
-import sympy as sp
+from plotly.io.json import to_json_plotly
 
-from app.components.figure_style import mpl_layout
 from app.content.simulation import INFO_BUTTON_CLOSE_LABEL, INFO_BUTTON_OPEN_LABEL
-from src.double_pendulum.models import DoublePendulumHamiltonian, DoublePendulumLagrangian
+from app.profiling import profile_callback
+from src.double_pendulum.cache.results import simulation_key, simulation_results
+from src.double_pendulum.instrumentation import enabled as instrumentation_enabled, metrics, stage
+from src.double_pendulum.instrumentation.profiling import profiling_active
+from src.double_pendulum.jobs import CANCELLED, DONE, FAILED, simulation_jobs
+from src.double_pendulum.plotting.animation import bob_positions, pack_positions, pendulum_figure
+from src.double_pendulum.plotting.figures import WEBGL_THRESHOLD, phase_path_figure, time_graph_figure
 from src.double_pendulum.validation.dash import validate_inputs
 
 
-M1, M2, m1, m2, l1, l2, g = sp.symbols("M1, M2, m1, m2, l1, l2, g", positive=True, real=True)
+# Samples per second each figure evaluates the pendulum's dense trajectory at
+TIME_GRAPH_RATE = 50
+PHASE_PATH_RATE = 100
+ANIMATION_RATE = 100
+# Every 5th animation sample becomes a frame: 20 frames per second
+ANIMATION_FRAME_STEP = 5
+# Fraction of a background job's reported progress covered by the integration; figures take the rest
+INTEGRATION_SHARE = 0.9
+# Seconds of motion a background job integrates, and streams to the page, at a time
+STREAM_CHUNK_DURATION = 1.0
+# Decimal places kept in streamed samples; screen resolution needs no more
+STREAM_DECIMALS = 4
+
+HIDDEN = {'display': 'none'}
+
+
+def _sample_count(time_start, time_end, rate):
+    # Matches Trajectory.times(rate=rate), so streamed and final traces share their samples
+    return max(int(round((time_end - time_start) * rate)) + 1, 2)
+
+
+class TrajectoryStream:
+    """
+    ``on_chunk`` hook publishing each solved window of the trajectory as ``extendData`` lists.
+
+    Every window is sampled on the grids the final figures use, and each
+    chunk maps a graph id to ``{'x': [...], 'y': [...]}`` with one list per
+    extended trace: both angles of ``time-graph``, the ``phase-graph`` path
+    and the two bob paths of ``pendulum-animation``.
+    """
+
+    def __init__(self, publish, parameters, time_start, time_end):
+        self.publish = publish
+        self.lengths = _lengths(parameters)
+        rates = {'time-graph': TIME_GRAPH_RATE, 'phase-graph': PHASE_PATH_RATE, 'pendulum-animation': ANIMATION_RATE}
+        self.grids = {graph: np.linspace(time_start, time_end, _sample_count(time_start, time_end, rate))
+                      for graph, rate in rates.items()}
+        self.cursors = dict.fromkeys(self.grids, 0)
+
+    def _sample(self, piece, graph):
+        # The grid points not yet published that this window covers
+        grid = self.grids[graph]
+        start = self.cursors[graph]
+        stop = np.searchsorted(grid, piece.t_end + 1e-9 * max(abs(piece.t_end), 1.0), side='right')
+        self.cursors[graph] = stop
+        if stop == start:
+            return grid[:0], np.empty((0, 4))
+        return grid[start:stop], piece(grid[start:stop])
+
+    def __call__(self, piece):
+        times, states = self._sample(piece, 'time-graph')
+        _, phase_states = self._sample(piece, 'phase-graph')
+        _, animation_states = self._sample(piece, 'pendulum-animation')
+        theta = np.rad2deg(states[:, :2]).T
+        phase = np.rad2deg(phase_states[:, :2]).T
+        x_1, y_1, x_2, y_2 = bob_positions(animation_states[:, 0], animation_states[:, 1], *self.lengths)
+        self.publish({
+            'time-graph': {'x': _rounded([times, times]), 'y': _rounded(theta)},
+            'phase-graph': {'x': _rounded([phase[0]]), 'y': _rounded([phase[1]])},
+            'pendulum-animation': {'x': _rounded([x_1, x_2]), 'y': _rounded([y_1, y_2])},
+        })
+
+
+def _lengths(parameters):
+    # Parameters are keyed by SymPy symbols; matching by name avoids importing SymPy here
+    by_name = {str(symbol): value for symbol, value in parameters.items()}
+    return float(by_name['l1']), float(by_name['l2'])
+
+
+def _rounded(rows):
+    return [np.round(row, STREAM_DECIMALS).tolist() for row in rows]
+
+
+def stream_figures(parameters, initial_conditions, time_start, time_end):
+    """
+    Return empty (time graph, phase path, animation) figures for streamed chunks to extend.
+
+    They are laid out like the final figures; the animation shows the
+    pendulum at rest in its initial position with axes sized to ``l1 + l2``.
+    """
+    time_fig = time_graph_figure(np.empty(0), np.empty((0, 4)),
+                                 webgl=_sample_count(time_start, time_end, TIME_GRAPH_RATE) > WEBGL_THRESHOLD)
+    phase_fig = phase_path_figure(np.empty((0, 4)), width=600, height=600,
+                                  webgl=_sample_count(time_start, time_end, PHASE_PATH_RATE) > WEBGL_THRESHOLD)
+    l_1, l_2 = _lengths(parameters)
+    theta_1, theta_2 = np.deg2rad(initial_conditions[:2])
+    animation_fig = pendulum_figure(bob_positions([theta_1], [theta_2], l_1, l_2), trace=True,
+                                    fig_width=600, fig_height=600, static=True, client_side=True,
+                                    extent=l_1 + l_2)
+
+    figures = time_fig.to_dict(), phase_fig.to_dict(), animation_fig.to_dict()
+    for figure in figures:
+        # Plain lists: extendData appends to them in the browser
+        for trace in figure['data']:
+            if len(trace['x']) == 0:
+                trace['x'], trace['y'] = [], []
+    return figures
+
+
+def _extend_data(chunks):
+    # Join the chunks published since the last poll into one extendData value per graph
+    extend = []
+    for graph, traces in (('time-graph', [0, 1]), ('phase-graph', [0]), ('pendulum-animation', [1, 2])):
+        if not chunks:
+            extend.append(no_update)
+            continue
+        data = {axis: [sum((chunk[graph][axis][i] for chunk in chunks), []) for i in range(len(traces))]
+                for axis in ('x', 'y')}
+        extend.append([data, traces])
+    return tuple(extend)
+
+
+def simulate_figures(system_type, model_type, parameters, initial_conditions, time_start, time_end, progress=None,
+                     stream=False):
+    """
+    Simulate one pendulum and build the (time graph, phase path, animation) figures.
+
+    The figures are returned as plain dicts so that they pickle compactly into
+    the results cache and are served to Dash unchanged. The animation figure
+    carries no frames; the fourth item is the packed frame payload that the
+    browser animates. ``progress(fraction)``, when given, follows the
+    integration (the bulk of the work) up to ``INTEGRATION_SHARE``. With
+    ``stream=True`` (background jobs only) the span is integrated in
+    ``STREAM_CHUNK_DURATION`` windows and each is passed to
+    ``progress.publish`` by a ``TrajectoryStream``.
+    """
+    # The solution is kept as a dense trajectory; this grid only sets the default ``sol`` sampling
+    time_steps = int((time_end - time_start) * TIME_GRAPH_RATE) + 1
+    time_vector = [time_start, time_end, time_steps]
+
+    integration_progress = None
+    if progress is not None:
+        def integration_progress(fraction):
+            progress(INTEGRATION_SHARE * fraction)
+
+    chunks = {}
+    if stream:
+        chunks = dict(chunk_duration=STREAM_CHUNK_DURATION,
+                      on_chunk=TrajectoryStream(progress.publish, parameters, time_start, time_end))
+
+    # Deferred so that app start-up, and every page that never simulates, skips SymPy and SciPy
+    from src.double_pendulum.models import DoublePendulumHamiltonian, DoublePendulumLagrangian
+
+    with stage('simulation', formulation=system_type, model=model_type, duration=time_end - time_start):
+        # Create an instance of DoublePendulum
+        if system_type == 'lagrangian':
+            pendulum = DoublePendulumLagrangian(parameters, initial_conditions, time_vector, model=model_type,
+                                                progress=integration_progress, **chunks)
+        else:
+            pendulum = DoublePendulumHamiltonian(parameters, initial_conditions, time_vector, model=model_type,
+                                                 progress=integration_progress, **chunks)
+
+        # Build the Plotly figures straight from the dense trajectory
+        trajectory = pendulum.trajectory
+        with stage('time_graph_figure'):
+            time_fig = time_graph_figure(*trajectory.sample(rate=TIME_GRAPH_RATE)).to_dict()
+        with stage('phase_path_figure'):
+            _, phase_states = trajectory.sample(rate=PHASE_PATH_RATE)
+            phase_fig = phase_path_figure(phase_states, width=600, height=600).to_dict()
+
+        # Generate the animation figure
+        with stage('positions'):
+            pendulum.precompute_positions(trajectory.times(rate=ANIMATION_RATE))
+        with stage('animation_figure'):
+            animation_fig = pendulum.animate_pendulum(trace=True, fig_width=600, fig_height=600, static=True,
+                                                      client_side=True).to_dict()
+            animation_data = pack_positions(pendulum.precomputed_positions, frame_step=ANIMATION_FRAME_STEP)
+
+    return time_fig, phase_fig, animation_fig, animation_data
+
+
+def _show_figures(figures):
+    # Outputs shared by update_graphs and poll_simulation_job once the figures exist
+    if instrumentation_enabled():
+        # Serializing again only to measure it, so only while timing is on
+        with stage('serialization') as timing:
+            timing.add(bytes=len(to_json_plotly(figures)))
+    time_fig, phase_fig, animation_fig, animation_data = figures
+    return (time_fig, phase_fig, animation_fig,  # graph figures
+            {'display': 'flex'}, {'display': 'block'}, {'display': 'flex'}, '', animation_data,
+            None, True, HIDDEN)
 
 
 def register_simulation_callbacks(app):
@@ -88,7 +269,11 @@ def register_simulation_callbacks(app):
             Output('animation-phase-container', 'style', allow_duplicate=True),
             Output('time-graph-container', 'style', allow_duplicate=True),
             Output('time-graph-section', 'style', allow_duplicate=True),
-            Output('error-message', 'children', allow_duplicate=True)
+            Output('error-message', 'children', allow_duplicate=True),
+            Output('pendulum-animation-data', 'data', allow_duplicate=True),
+            Output('simulation-job', 'data', allow_duplicate=True),
+            Output('simulation-job-poll', 'disabled', allow_duplicate=True),
+            Output('simulation-progress-container', 'style', allow_duplicate=True)
         ],
         [
             Input('init_cond_theta1', 'value'),
@@ -107,12 +292,13 @@ def register_simulation_callbacks(app):
             Input('model-type', 'value'),
             Input('system-type', 'value')
         ],
-        [State('error-message', 'children')],
+        [State('error-message', 'children'),
+         State('simulation-job', 'data')],
         prevent_initial_call=True
     )
     def clear_graphs_on_input_change(init_cond_theta1, init_cond_theta2, init_cond_omega1, init_cond_omega2,
                                      time_start, time_end, param_l1, param_l2, param_m1, param_m2, param_M1,
-                                     param_M2, param_g, model_type, system_type, current_error_message):
+                                     param_M2, param_g, model_type, system_type, current_error_message, job):
 
         # Step 1: Validate inputs
         initial_conditions = [init_cond_theta1, init_cond_theta2, init_cond_omega1, init_cond_omega2]
@@ -120,8 +306,13 @@ def register_simulation_callbacks(app):
                                             time_start, time_end, model_type, param_l1, param_l2, param_m1, param_m2,
                                             param_M1, param_M2, param_g)
 
+        # This session no longer wants the simulation for the old inputs; other sessions may still follow it
+        jobs = simulation_jobs()
+        if job and jobs is not None:
+            jobs.cancel(job['job_id'], job.get('subscriber'))
+
         # If the error message hasn't changed, prevent updating to avoid flickering
-        if new_error_message == current_error_message:
+        if new_error_message == current_error_message and not job:
             raise PreventUpdate
 
         # Step 2: If there's an error, return empty graphs and hide graph containers
@@ -129,8 +320,9 @@ def register_simulation_callbacks(app):
             empty_figure = go.Figure()
             return (
                 empty_figure, empty_figure, empty_figure,
-                {'display': 'none'}, {'display': 'none'}, {'display': 'none'},
-                new_error_message
+                HIDDEN, HIDDEN, HIDDEN,
+                new_error_message, None,
+                None, True, HIDDEN
             )
 
         # Step 3: If no error, update graphs and show graph containers
@@ -141,8 +333,10 @@ def register_simulation_callbacks(app):
 
         return (
             time_figure, phase_figure, animation_figure,
-            {'display': 'none'}, {'display': 'none'}, {'display': 'none'},
-            new_error_message  # Should be an empty string or None if no error
+            HIDDEN, HIDDEN, HIDDEN,
+            new_error_message,  # Should be an empty string or None if no error
+            None,
+            None, True, HIDDEN
         )
 
     @app.callback(
@@ -152,7 +346,11 @@ def register_simulation_callbacks(app):
          Output('animation-phase-container', 'style'),
          Output('time-graph-container', 'style'),
          Output('time-graph-section', 'style'),
-         Output('error-message', 'children')],
+         Output('error-message', 'children'),
+         Output('pendulum-animation-data', 'data'),
+         Output('simulation-job', 'data'),
+         Output('simulation-job-poll', 'disabled'),
+         Output('simulation-progress-container', 'style')],
         [Input('submit-val', 'n_clicks')],
         [State('init_cond_theta1', 'value'),
          State('init_cond_theta2', 'value'),
@@ -170,6 +368,7 @@ def register_simulation_callbacks(app):
          State('model-type', 'value'),
          State('system-type', 'value')]
     )
+    @profile_callback('update_graphs')
     def update_graphs(n_clicks, init_cond_theta1, init_cond_theta2, init_cond_omega1, init_cond_omega2,
                       time_start, time_end,
                       param_l1, param_l2, param_m1, param_m2, param_M1, param_M2, param_g,
@@ -177,16 +376,17 @@ def register_simulation_callbacks(app):
         if n_clicks > 0:
             initial_conditions = [init_cond_theta1, init_cond_theta2, init_cond_omega1, init_cond_omega2]
             # Validate inputs
-            error_message = validate_inputs([initial_conditions],
-                                            time_start, time_end, model_type, param_l1, param_l2, param_m1, param_m2,
-                                            param_M1, param_M2, param_g)
+            with stage('validation'):
+                error_message = validate_inputs([initial_conditions],
+                                                time_start, time_end, model_type, param_l1, param_l2, param_m1,
+                                                param_m2, param_M1, param_M2, param_g)
             if error_message:
                 # If there are errors, return immediately
                 return (no_update, no_update, no_update,
-                        {'display': 'none'}, {'display': 'none'}, {'display': 'none'}, error_message)
+                        HIDDEN, HIDDEN, HIDDEN, error_message, no_update,
+                        no_update, no_update, HIDDEN)
 
-            time_steps = int((time_end - time_start) * 200)
-            time_vector = [time_start, time_end, time_steps]
+            from src.double_pendulum.math.functions import M1, M2, g, l1, l2, m1, m2  # Deferred SymPy import
 
             # Conditional parameter assignment based on model type
             if model_type == 'simple':
@@ -197,44 +397,101 @@ def register_simulation_callbacks(app):
             # Combine all parameters
             parameters = {l1: param_l1, l2: param_l2, g: param_g, **weights}
 
-            # Create an instance of DoublePendulum
-            if system_type == 'lagrangian':
-                pendulum = DoublePendulumLagrangian(parameters, initial_conditions, time_vector, model=model_type)
-            else:
-                pendulum = DoublePendulumHamiltonian(parameters, initial_conditions, time_vector, model=model_type)
-
-            # Convert the Matplotlib graphs to Plotly graphs
-            matplotlib_time_fig = pendulum.time_graph()
-            # Set the layout to be responsive
-            time_fig = tls.mpl_to_plotly(matplotlib_time_fig)
-            time_fig.update_layout(
-                autosize=True,
-                margin=dict(l=20, r=20, t=20, b=20),
-            )
-            plt.close(matplotlib_time_fig)
-
-            matplotlib_phase_fig = pendulum.phase_path()
-            # Set the layout with a fixed aspect ratio for the phase-path graph
-            phase_fig = tls.mpl_to_plotly(matplotlib_phase_fig)
-            phase_fig.update_layout(
-                autosize=True,
-                margin=dict(l=20, r=20, t=20, b=20),
-                width=600,
-                height=600
-            )
-            plt.close(matplotlib_phase_fig)
+            # A profiled request reproduces the whole simulation in this process, bypassing the cache and jobs
+            profiling = profiling_active()
 
-            # Apply the layout to graphs
-            time_fig.update_layout(mpl_layout)
-            phase_fig.update_layout(mpl_layout)
+            # Repeat and preset requests are served from the shared results cache
+            key = simulation_key(system_type, model_type, parameters, initial_conditions, (time_start, time_end))
+            results = None if profiling else simulation_results()
+            figures = None if results is None else results.get(key)
+            if results is not None:
+                metrics.increment('double_pendulum_cache_requests_total', cache='results',
+                                  result='miss' if figures is None else 'hit')
 
-            # Generate the animation figure
-            pendulum.precompute_positions()  # Make sure positions are precomputed
-            animation_fig = pendulum.animate_pendulum(trace=True, fig_width=600, fig_height=600, static=True)
+            jobs = None if profiling else simulation_jobs()
+            served = 'cache' if figures is not None else 'inline' if jobs is None else 'job'
+            metrics.increment('double_pendulum_simulation_requests_total', formulation=system_type,
+                              model=model_type, served=served)
+            if figures is None and jobs is not None:
+                # Integrate on the job pool, keeping this worker free; the poll streams the trajectory in.
+                # Subscribing first keeps another session's input change from cancelling the shared job
+                subscriber = jobs.subscribe(key)
+                jobs.submit(key, simulate_figures, system_type, model_type, parameters, initial_conditions,
+                            time_start, time_end, stream=True)
+                time_fig, phase_fig, animation_fig = stream_figures(parameters, initial_conditions,
+                                                                    time_start, time_end)
+                return (time_fig, phase_fig, animation_fig,
+                        {'display': 'flex'}, {'display': 'block'}, {'display': 'flex'}, '', None,
+                        {'job_id': key, 'chunks': 0, 'subscriber': subscriber}, False, {'display': 'block'})
 
-            return (time_fig, phase_fig, animation_fig,  # graph figures
-                    {'display': 'flex'}, {'display': 'block'}, {'display': 'flex'}, '')
+            if figures is None:
+                figures = simulate_figures(system_type, model_type, parameters, initial_conditions,
+                                           time_start, time_end)
+                if results is not None:
+                    results.put(key, figures)
+            return _show_figures(figures)
 
         # If the button hasn't been clicked yet, return empty figures and keep everything hidden
         return (go.Figure(), go.Figure(), go.Figure(),
-                {'display': 'none'}, {'display': 'none'}, {'display': 'none'}, '')
+                HIDDEN, HIDDEN, HIDDEN, '', None,
+                None, True, HIDDEN)
+
+    @app.callback(
+        [Output('time-graph', 'figure', allow_duplicate=True),
+         Output('phase-graph', 'figure', allow_duplicate=True),
+         Output('pendulum-animation', 'figure', allow_duplicate=True),
+         Output('animation-phase-container', 'style', allow_duplicate=True),
+         Output('time-graph-container', 'style', allow_duplicate=True),
+         Output('time-graph-section', 'style', allow_duplicate=True),
+         Output('error-message', 'children', allow_duplicate=True),
+         Output('pendulum-animation-data', 'data', allow_duplicate=True),
+         Output('simulation-job', 'data', allow_duplicate=True),
+         Output('simulation-job-poll', 'disabled', allow_duplicate=True),
+         Output('simulation-progress-container', 'style', allow_duplicate=True),
+         Output('simulation-progress', 'value'),
+         Output('simulation-progress-label', 'children'),
+         Output('time-graph', 'extendData'),
+         Output('phase-graph', 'extendData'),
+         Output('pendulum-animation', 'extendData')],
+        [Input('simulation-job-poll', 'n_intervals')],
+        [State('simulation-job', 'data')],
+        prevent_initial_call=True
+    )
+    def poll_simulation_job(n_intervals, job):
+        jobs = simulation_jobs()
+        if not job or jobs is None:
+            raise PreventUpdate
+
+        job_id = job['job_id']
+        state = jobs.status(job_id, job.get('subscriber'))
+        if state is None or state['status'] in (FAILED, CANCELLED):
+            if state is not None and state['status'] == CANCELLED:
+                message = ''
+            else:
+                reason = state['error'] if state is not None else 'the job was lost'
+                message = f"Simulation failed ({reason}). Please run it again."
+            return (no_update, no_update, no_update,
+                    HIDDEN, HIDDEN, HIDDEN, message, no_update,
+                    None, True, HIDDEN, 0, '') + (no_update,) * 3
+
+        if state['status'] != DONE:
+            # Append the trajectory chunks published since the last poll to the graphs
+            chunks = jobs.chunks(job_id, job.get('chunks', 0))
+            job = dict(job, chunks=job.get('chunks', 0) + len(chunks)) if chunks else no_update
+            percent = round(100 * state['progress'])
+            return ((no_update,) * 8 + (job,) + (no_update,) * 2
+                    + (percent, f"Simulating... {percent}%") + _extend_data(chunks))
+
+        # The final figures replace the streamed ones
+        figures = jobs.result(job_id)
+        results = simulation_results()
+        if results is not None:
+            results.put(job_id, figures)
+        return _show_figures(figures) + (100, '') + (no_update,) * 3
+
+    # Hand the packed positions to assets/pendulum-animation.js, which drives the Play button
+    app.clientside_callback(
+        ClientsideFunction(namespace='pendulum', function_name='load'),
+        Output('pendulum-animation-player', 'data'),
+        Input('pendulum-animation-data', 'data'),
+    )
@@ -44,6 +44,21 @@ def get_animation_phase_section(trace_title, phase_title):
                 ],
                 className="delayed-spinner",
             ),
+            # Progress of the background simulation job, polled while it runs
+            html.Div(
+                id="simulation-progress-container",
+                className="simulation-progress",
+                style={"display": "none"},
+                children=[
+                    html.Progress(id="simulation-progress", max=100, value=0),
+                    html.Div(id="simulation-progress-label", className="simulation-progress-label"),
+                ],
+            ),
+            dcc.Store(id="simulation-job"),
+            dcc.Interval(id="simulation-job-poll", interval=500, disabled=True),
+            # Packed frame positions animated in the browser by assets/pendulum-animation.js
+            dcc.Store(id="pendulum-animation-data"),
+            dcc.Store(id="pendulum-animation-player"),
         ],
     )
 
@@ -2,5 +2,26 @@ from app.content.routes import CHAOS_PAGE
 
 
 CHAOS_PAGE_TITLE = CHAOS_PAGE.title
-CHAOS_UNDER_DEVELOPMENT_TEXT = "The Chaos section of the site is currently under development..."
 
+FLIP_MAP_TITLE = "Time to First Flip"
+FLIP_MAP_DESCRIPTION = (
+    "Each pixel is a simple double pendulum (unit lengths and masses) released from rest at the "
+    "angles on the axes, coloured by how long it takes either arm to flip over the top. Blank cells "
+    "never flip within ten seconds, most of them because they lack the energy to. The map is "
+    "computed in tiles on the first visit and fills in as they finish."
+)
+
+FTLE_TITLE = "Finite-Time Lyapunov Exponents"
+FTLE_DESCRIPTION = (
+    "The same pendulums, coloured by how fast neighbouring starts separate over five seconds: the "
+    "finite-time Lyapunov exponent, from the stretching of the flow map between adjacent pixels. "
+    "Bright ridges mark where nearby initial conditions part ways. The colour range and palette "
+    "redraw the stored field without recomputing it."
+)
+FTLE_RANGE_LABEL = "Colour range / s⁻¹"
+FTLE_COLOURSCALE_LABEL = "Palette"
+FTLE_COLOURSCALES = ("Magma", "Viridis", "Cividis", "Greys")
+
+GRID_PROGRESS_LABEL = "Computing the {name}: {percent:.0f}%"
+GRID_FAILED_TEXT = "The {name} could not be computed: {reason}. Reload the page to try again."
+GRID_UNAVAILABLE_TEXT = "The {name} is computed by a background job, and background jobs are turned off on this server."
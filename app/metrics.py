@@ -0,0 +1,43 @@
+from flask import Response, abort, request
+
+from src.double_pendulum.instrumentation import metrics
+from src.double_pendulum.jobs import grid_jobs, simulation_jobs
+
+
+METRICS_PATH = '/metrics'
+# Job pools reported under the ``pool`` label of the in-flight gauge
+JOB_POOLS = {'simulation': simulation_jobs, 'grid': grid_jobs}
+
+
+def _job_gauges():
+    samples = {}
+    for pool, manager in JOB_POOLS.items():
+        jobs = manager()
+        counts = {} if jobs is None else jobs.active()
+        samples.update({(('pool', pool), ('status', status)): count for status, count in counts.items()})
+    return [('double_pendulum_jobs_in_flight', 'Background simulation and chaos-grid jobs queued or running.',
+             samples)]
+
+
+def register_metrics(server):
+    """
+    Serve ``/metrics`` in the Prometheus text format and record response sizes.
+
+    Both are inert unless ``DOUBLE_PENDULUM_METRICS=1``: the route answers 404
+    and nothing is recorded. Each request flushes the worker's metrics to the
+    shared cache directory, so any worker's ``/metrics`` reports all of them.
+    """
+    @server.after_request
+    def record_response(response):
+        if metrics.enabled():
+            if response.content_length is not None and request.path != METRICS_PATH:
+                route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+                metrics.observe('double_pendulum_response_bytes', response.content_length, route=route)
+            metrics.flush()
+        return response
+
+    @server.route(METRICS_PATH)
+    def metrics_endpoint():
+        if not metrics.enabled():
+            abort(404)
+        return Response(metrics.exposition(_job_gauges()), mimetype='text/plain; version=0.0.4')
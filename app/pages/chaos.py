@@ -1,11 +1,57 @@
-from dash import html
+from dash import dcc, html
 
 from app.components.footer import get_footer_section
+from app.components.graphs import GRAPH_CONFIG, get_graph_wrapper
 from app.components.shell import get_footer_wrapper, get_header_section, get_title_section
-from app.content.chaos import CHAOS_PAGE_TITLE, CHAOS_UNDER_DEVELOPMENT_TEXT
+from app.content.chaos import (
+    CHAOS_PAGE_TITLE,
+    FLIP_MAP_DESCRIPTION,
+    FLIP_MAP_TITLE,
+    FTLE_COLOURSCALE_LABEL,
+    FTLE_COLOURSCALES,
+    FTLE_DESCRIPTION,
+    FTLE_RANGE_LABEL,
+    FTLE_TITLE,
+)
 from app.content.routes import CHAOS_PAGE
 
 
+def get_flip_map_section():
+    return html.Div(
+        className="graph-section chaos-map-section",
+        children=[
+            html.P(FLIP_MAP_DESCRIPTION, className="chaos-map-description"),
+            get_graph_wrapper(FLIP_MAP_TITLE, "flip-map-graph", config=GRAPH_CONFIG, responsive=True),
+            # Progress of the background job computing the map, polled until it is complete
+            html.Div(id="flip-map-status", className="simulation-progress-label"),
+            dcc.Interval(id="flip-map-poll", interval=2000),
+        ],
+    )
+
+
+def get_ftle_section():
+    return html.Div(
+        className="graph-section chaos-map-section",
+        children=[
+            html.P(FTLE_DESCRIPTION, className="chaos-map-description"),
+            html.Div(
+                className="chaos-map-controls",
+                children=[
+                    html.Label(FTLE_RANGE_LABEL, htmlFor="ftle-colour-range"),
+                    dcc.RangeSlider(id="ftle-colour-range", min=0, max=4, step=0.1, value=[0, 2],
+                                    marks={value: str(value) for value in range(5)}),
+                    html.Label(FTLE_COLOURSCALE_LABEL, htmlFor="ftle-colourscale"),
+                    dcc.Dropdown(id="ftle-colourscale", options=list(FTLE_COLOURSCALES),
+                                 value=FTLE_COLOURSCALES[0], clearable=False),
+                ],
+            ),
+            get_graph_wrapper(FTLE_TITLE, "ftle-graph", config=GRAPH_CONFIG, responsive=True),
+            html.Div(id="ftle-status", className="simulation-progress-label"),
+            dcc.Interval(id="ftle-poll", interval=2000),
+        ],
+    )
+
+
 def layout():
     return html.Div(
         className="chaos-layout",
@@ -15,7 +61,8 @@ def layout():
             html.Div(
                 className="chaos-content-container",
                 children=[
-                    html.H3(CHAOS_UNDER_DEVELOPMENT_TEXT, className="chaos-text"),
+                    get_flip_map_section(),
+                    get_ftle_section(),
                 ],
             ),
             get_footer_wrapper(get_footer_section()),
@@ -25,4 +72,3 @@ def layout():
 
 def get_chaos_layout():
     return layout()
-
@@ -0,0 +1,44 @@
+from functools import wraps
+from urllib.parse import parse_qs, urlsplit
+
+from flask import has_request_context, request
+
+from src.double_pendulum.instrumentation.profiling import Profiler, profiling_enabled
+
+
+PROFILE_HEADER = 'X-Double-Pendulum-Profile'
+PROFILE_PARAMETER = 'profile'
+
+_TRUTHY = {'1', 'true', 'yes', 'on'}
+
+
+def profile_requested():
+    """
+    Return True when profiling is enabled and the current request asks for it.
+
+    The request asks with the ``X-Double-Pendulum-Profile: 1`` header or the
+    ``profile=1`` query parameter. Dash callbacks are POSTed by the page, so
+    the page's own query string (``/simulation?profile=1``) is read from the
+    referrer.
+    """
+    if not profiling_enabled() or not has_request_context():
+        return False
+    if request.headers.get(PROFILE_HEADER, '').lower() in _TRUTHY:
+        return True
+    values = request.args.getlist(PROFILE_PARAMETER)
+    if request.referrer:
+        values += parse_qs(urlsplit(request.referrer).query).get(PROFILE_PARAMETER, [])
+    return any(value.lower() in _TRUTHY for value in values)
+
+
+def profile_callback(label):
+    """Decorate a Dash callback so that requests asking for it are run under a ``Profiler``."""
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not profile_requested():
+                return function(*args, **kwargs)
+            with Profiler(label):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,111 @@
+// Client-side animation of the simulated pendulum.
+// The server sends the bob positions once as a base64 float32 payload (see
+// src/double_pendulum/plotting/animation.py) and renders a figure without frames
+// or path data. This script draws the paths, and because the "Play" button uses
+// method "skip" Plotly only emits plotly_buttonclicked, which starts a loop that
+// moves the rod/bob trace with Plotly.restyle.
+
+(function () {
+    const player = {
+        positions: null,    // Float32Array laid out as [x1..., y1..., x2..., y2...]
+        samples: 0,
+        step: 1,
+        duration: 33,
+        index: 0,
+        timer: null,
+        graph: null,
+    };
+
+    function decode(payload) {
+        const binary = atob(payload.data);
+        const bytes = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return new Float32Array(bytes.buffer);
+    }
+
+    function row(i) {
+        return player.positions.subarray(i * player.samples, (i + 1) * player.samples);
+    }
+
+    function stop() {
+        if (player.timer !== null) {
+            clearTimeout(player.timer);
+            player.timer = null;
+        }
+    }
+
+    function drawPaths() {
+        // Traces 1 and 2 are the bob paths, sent empty, when the figure was built with trace=True
+        const data = player.graph.data;
+        if (player.positions && data.length >= 3 && !(data[1].x && data[1].x.length)) {
+            window.Plotly.restyle(player.graph, {x: [row(0), row(2)], y: [row(1), row(3)]}, [1, 2]);
+        }
+    }
+
+    function drawFrame(k) {
+        const n = player.samples;
+        const p = player.positions;
+        window.Plotly.restyle(player.graph, {x: [[0, p[k], p[2 * n + k]]], y: [[0, p[n + k], p[3 * n + k]]]}, [0]);
+    }
+
+    function tick() {
+        drawFrame(player.index);
+        player.index += player.step;
+        if (player.index < player.samples) {
+            player.timer = setTimeout(tick, player.duration);
+        } else {
+            player.timer = null;
+        }
+    }
+
+    function play() {
+        if (!player.positions || player.timer !== null) {
+            return;
+        }
+        if (player.index >= player.samples) {
+            player.index = 0;  // Finished: play again from the start
+        }
+        tick();
+    }
+
+    function attach(retries) {
+        const container = document.getElementById('pendulum-animation');
+        const graph = container && container.querySelector('.js-plotly-plot');
+        if (!graph || typeof graph.on !== 'function' || !graph.data) {
+            if (retries > 0) {
+                setTimeout(function () { attach(retries - 1); }, 100);
+            }
+            return;
+        }
+        player.graph = graph;
+        if (!graph._pendulumPlayer) {
+            graph.on('plotly_buttonclicked', play);
+            // Dash may render the new (path-less) figure after the payload has been loaded
+            graph.on('plotly_afterplot', drawPaths);
+            graph._pendulumPlayer = true;
+        }
+        drawPaths();
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        pendulum: {
+            load: function (payload) {
+                stop();
+                player.index = 0;
+                if (!payload) {
+                    player.positions = null;
+                    player.samples = 0;
+                    return window.dash_clientside.no_update;
+                }
+                player.positions = decode(payload);
+                player.samples = payload.shape[1];
+                player.step = payload.frame_step;
+                player.duration = payload.frame_duration;
+                attach(50);  // The figure may render after the payload arrives
+                return window.dash_clientside.no_update;
+            },
+        },
+    });
+})();
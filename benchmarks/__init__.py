@@ -0,0 +1 @@
+"""Standalone performance and accuracy benchmarks (not collected by pytest)."""
@@ -0,0 +1,310 @@
+"""
+Reproducible timings of the models, integrators, figure builders and the simulation callback.
+
+Each case is set up untimed, then timed ``--repeat`` times; the median and
+minimum wall times are reported along with case-specific figures (RHS
+evaluations, evaluations per second, JSON payload bytes). Every run uses a
+fresh cache directory with the result cache and background jobs switched off,
+so nothing is served from an earlier run.
+
+``--save`` writes the results, with the interpreter, library versions and
+machine they came from, as a JSON baseline; ``--compare`` checks a run
+against one and exits with status 1 when a best-of-repeats time or a payload
+grows (or an evaluation rate drops) by more than ``--threshold``; the minimum
+is compared because it is the least disturbed by other load on the machine.
+Baselines are only comparable on the same machine.
+
+Usage:
+    python -m benchmarks.suite [--quick] [--repeat 5] [--only run/] [--save baseline.json]
+    python -m benchmarks.suite --compare baseline.json [--threshold 0.25]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from importlib import metadata
+
+
+DURATIONS = (10, 60, 120)
+QUICK_DURATIONS = (10,)
+FORMULATIONS = ('lagrangian', 'hamiltonian')
+MODELS = ('simple', 'compound')
+# Initial conditions (degrees, degrees/second) of the timed runs. Higher-energy starts such as
+# [100, 150, 0, 0] make RK45 at the default tolerances stall before 120 s, which times the failure
+INITIAL_CONDITIONS = [90, 90, 0, 0]
+# Samples per second of the runs' time_vector, as in the app
+TIME_GRAPH_RATE = 50
+RHS_CALLS = 20000
+
+# Compared metrics and whether a larger value is better
+COMPARED = {'min_seconds': False, 'bytes': False, 'evaluations_per_second': True}
+
+
+class Case:
+    """
+    One benchmark: ``setup()`` runs untimed and returns the state ``run(state)`` is timed on.
+
+    ``run`` may return a dict of extra figures for the report (the last
+    repeat's are kept). Cases marked ``slow`` are skipped by ``--quick``;
+    ``repeat`` caps the repeats of cases that cannot be repeated cheaply.
+    """
+
+    def __init__(self, name, run, setup=None, slow=False, repeat=None):
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda: None)
+        self.slow = slow
+        self.repeat = repeat
+
+    def measure(self, repeat):
+        state = self.setup()
+        times, extra = [], {}
+        for _ in range(min(repeat, self.repeat or repeat)):
+            start = time.perf_counter()
+            extra = self.run(state) or {}
+            times.append(time.perf_counter() - start)
+        return dict(seconds=statistics.median(times), min_seconds=min(times), repeats=len(times), **extra)
+
+
+def parameters(model):
+    from src.double_pendulum.math.functions import M1, M2, g, l1, l2, m1, m2
+
+    weights = {m1: 1.0, m2: 1.0} if model == 'simple' else {M1: 1.0, M2: 1.0}
+    return {l1: 1.0, l2: 1.0, g: 9.81, **weights}
+
+
+def model_class(formulation):
+    from src.double_pendulum.models import DoublePendulumHamiltonian, DoublePendulumLagrangian
+
+    return DoublePendulumLagrangian if formulation == 'lagrangian' else DoublePendulumHamiltonian
+
+
+def derive_function(formulation):
+    if formulation == 'lagrangian':
+        from src.double_pendulum.models.lagrangian import add_equations
+        return add_equations
+    from src.double_pendulum.models.hamiltonian import hamiltonian_first_order_system
+    return hamiltonian_first_order_system
+
+
+def simulate(formulation, model, duration):
+    return model_class(formulation)(parameters(model), INITIAL_CONDITIONS,
+                                    [0, duration, duration * TIME_GRAPH_RATE + 1], model=model)
+
+
+def derivation_cases():
+    import sympy as sp
+    from src.double_pendulum.cache.equations import load_equations, load_or_derive_equations
+
+    def cold(formulation, model):
+        def run(_):
+            sp.core.cache.clear_cache()  # SymPy memoizes intermediate results across derivations
+            derive_function(formulation)(model)
+        return run
+
+    def warm_setup(formulation, model):
+        # Make sure the artifact exists; the timed part is the disk load a fresh worker does
+        return lambda: load_or_derive_equations(formulation, model, derive_function(formulation))
+
+    def warm(formulation, model):
+        def run(_):
+            load_equations(formulation, model, derive_function(formulation))
+        return run
+
+    cases = []
+    for formulation in FORMULATIONS:
+        for model in MODELS:
+            cases.append(Case(f'derivation/cold/{formulation}/{model}', cold(formulation, model), slow=True,
+                              repeat=1))
+            cases.append(Case(f'derivation/warm/{formulation}/{model}', warm(formulation, model),
+                              setup=warm_setup(formulation, model)))
+    return cases
+
+
+def model_cases(durations):
+    import numpy as np
+    from src.double_pendulum.models.compiled import parameter_values, state_kernel
+    from src.double_pendulum.numerics import BoundSystem
+
+    def construct(formulation, model):
+        # A 10 ms span: equation lookup, kernel binding and a few integration steps
+        def run(_):
+            model_class(formulation)(parameters(model), INITIAL_CONDITIONS, [0, 0.01, 2], model=model)
+        return run
+
+    def rhs_setup(formulation, model):
+        def setup():
+            system = BoundSystem(state_kernel(formulation, model), parameter_values(parameters(model), formulation,
+                                                                                    model))
+            return system, np.deg2rad(np.array(INITIAL_CONDITIONS, dtype=float)), np.empty(4)
+        return setup
+
+    def rhs(state):
+        system, y, out = state
+        start = time.perf_counter()
+        for _ in range(RHS_CALLS):
+            system(0.0, y, out)
+        return {'evaluations_per_second': RHS_CALLS / (time.perf_counter() - start)}
+
+    def end_to_end(formulation, duration):
+        def run(_):
+            pendulum = simulate(formulation, 'simple', duration)
+            return {'rhs_evaluations': pendulum.evaluations}
+        return run
+
+    cases = []
+    for formulation in FORMULATIONS:
+        for model in MODELS:
+            cases.append(Case(f'construction/{formulation}/{model}', construct(formulation, model),
+                              setup=lambda formulation=formulation, model=model: simulate(formulation, model, 1)))
+            cases.append(Case(f'rhs/{formulation}/{model}', rhs, setup=rhs_setup(formulation, model)))
+        for duration in durations:
+            cases.append(Case(f'run/{formulation}/{duration}s', end_to_end(formulation, duration),
+                              setup=lambda formulation=formulation: simulate(formulation, 'simple', 1),
+                              slow=duration > QUICK_DURATIONS[-1]))
+    return cases
+
+
+def figure_cases(durations):
+    from plotly.io.json import to_json_plotly
+
+    def animation(duration, client_side):
+        def run(pendulum):
+            pendulum.precompute_positions(pendulum.trajectory.times(rate=100))
+            figure = pendulum.animate_pendulum(trace=True, fig_width=600, fig_height=600, static=True,
+                                               client_side=client_side)
+            return {'bytes': len(to_json_plotly(figure))}
+        return run
+
+    cases = []
+    for duration in durations:
+        setup = lambda duration=duration: simulate('lagrangian', 'simple', duration)
+        cases.append(Case(f'animation/client/{duration}s', animation(duration, True), setup=setup,
+                          slow=duration > QUICK_DURATIONS[-1]))
+    # Classic Plotly frames, as notebooks use them; one frame per sample makes long runs impractical
+    cases.append(Case(f'animation/frames/{QUICK_DURATIONS[0]}s', animation(QUICK_DURATIONS[0], False),
+                      setup=lambda: simulate('lagrangian', 'simple', QUICK_DURATIONS[0])))
+    return cases
+
+
+def update_graphs_callback():
+    # The function registered by app.callbacks.simulation, unwrapped from Dash's request handling
+    import pendulum_app
+
+    for spec in pendulum_app.app.callback_map.values():
+        if any(item['id'] == 'submit-val' for item in spec['inputs']):
+            return spec['callback'].__wrapped__
+    raise LookupError("update_graphs is not registered")
+
+
+def callback_cases(durations):
+    from plotly.io.json import to_json_plotly
+
+    def run_callback(duration):
+        def run(callback):
+            outputs = callback(1, *INITIAL_CONDITIONS, 0, duration, 1, 1, 1, 1, 1, 1, 9.81, 'simple', 'lagrangian')
+            return {'bytes': len(to_json_plotly(outputs))}
+        return run
+
+    cases = []
+    for duration in durations:
+        cases.append(Case(f'callback/update_graphs/{duration}s', run_callback(duration),
+                          setup=update_graphs_callback, slow=duration > QUICK_DURATIONS[-1]))
+    return cases
+
+
+def all_cases(durations):
+    return derivation_cases() + model_cases(durations) + figure_cases(durations) + callback_cases(durations)
+
+
+def environment():
+    versions = {}
+    for package in ('numpy', 'scipy', 'sympy', 'plotly', 'dash'):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return dict(python=platform.python_version(), platform=platform.platform(), machine=platform.machine(),
+                processor=platform.processor(), cpu_count=os.cpu_count(), packages=versions)
+
+
+def compare(baseline, results, threshold):
+    """
+    Return ``(name, metric, before, after, change)`` rows for every compared metric and the regressions among them.
+
+    ``change`` is the relative change in the "worse" direction, so a
+    regression is any row whose change exceeds ``threshold``.
+    """
+    rows, regressions = [], []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            if metric not in result or not before.get(metric):
+                continue
+            change = (result[metric] - before[metric]) / before[metric]
+            if higher_is_better:
+                change = -change
+            row = (name, metric, before[metric], result[metric], change)
+            rows.append(row)
+            if change > threshold:
+                regressions.append(row)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--quick', action='store_true',
+                        help=f'skip cold derivations and runs longer than {QUICK_DURATIONS[-1]} s')
+    parser.add_argument('--repeat', type=int, default=5, help='timed repeats per case (default: 5)')
+    parser.add_argument('--only', nargs='+', default=(), metavar='PREFIX',
+                        help='only run the cases whose names start with one of these prefixes')
+    parser.add_argument('--save', help='write the results to this JSON baseline')
+    parser.add_argument('--compare', help='compare against this JSON baseline; exit 1 on a regression')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='relative change counted as a regression (default: 0.25)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='double-pendulum-benchmarks-') as cache:
+        os.environ['DOUBLE_PENDULUM_CACHE_DIR'] = cache
+        os.environ['DOUBLE_PENDULUM_RESULT_CACHE'] = '0'
+        os.environ['DOUBLE_PENDULUM_BACKGROUND_JOBS'] = '0'
+
+        results = {}
+        for case in all_cases(QUICK_DURATIONS if args.quick else DURATIONS):
+            if args.quick and case.slow or args.only and not case.name.startswith(tuple(args.only)):
+                continue
+            results[case.name] = result = case.measure(args.repeat)
+            extra = '  '.join(f'{key}={value:.4g}' for key, value in result.items()
+                              if key not in ('seconds', 'min_seconds', 'repeats'))
+            print(f"{case.name:<40}{result['seconds'] * 1e3:>12.2f} ms{result['min_seconds'] * 1e3:>12.2f} ms"
+                  f"  {extra}", flush=True)
+
+    report = dict(environment=environment(), repeat=args.repeat, results=results)
+    if args.save:
+        with open(args.save, 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        if baseline.get('environment') != report['environment']:
+            print("warning: the baseline was recorded in a different environment", file=sys.stderr)
+        rows, regressions = compare(baseline['results'], results, args.threshold)
+        print(f"\n{'case':<40}{'metric':<24}{'baseline':>12}{'current':>12}{'change':>9}")
+        for name, metric, before, after, change in rows:
+            flag = '  REGRESSION' if change > args.threshold else ''
+            print(f"{name:<40}{metric:<24}{before:>12.4g}{after:>12.4g}{change:>+9.1%}{flag}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Energy error per right-hand-side evaluation for the Hamiltonian integrators.
+
+Compares the app's current integrator (solve_ivp RK45 at several tolerances)
+with the structure-preserving methods in ``src.double_pendulum.numerics`` on a
+high-energy run of the simple double pendulum, reporting the maximum relative
+energy error over the run against the number of RHS evaluations.
+
+Usage:
+    python -m benchmarks.symplectic [--time 120] [--json results.json]
+"""
+import argparse
+import json
+import time
+import warnings
+
+import numpy as np
+import sympy as sp
+from scipy.integrate import solve_ivp
+
+from src.double_pendulum.math.functions import compute_hamiltonian, g, l1, l2, m1, m2, p_theta_1, p_theta_2, theta1, theta2
+from src.double_pendulum.models.compiled import parameter_values, state_kernel
+from src.double_pendulum.numerics import BoundSystem, gauss_legendre, implicit_midpoint, rk4, tao
+
+
+PARAMETERS = {l1: 1.0, l2: 1.0, m1: 1.0, m2: 1.0, g: 9.81}
+# Radians / canonical momenta: both rods raised well above horizontal
+INITIAL_STATE = np.array([np.deg2rad(120.0), np.deg2rad(150.0), 0.0, 0.0])
+SAMPLES_PER_SECOND = 10
+
+
+class CountingSystem:
+    """Wraps a right-hand side and counts evaluations (rows evaluated per call)."""
+
+    def __init__(self, fun):
+        self.fun = fun
+        self.calls = 0
+
+    def __call__(self, t, y, out):
+        self.calls += 1
+        return self.fun(t, y, out)
+
+
+def energy_function(model='simple'):
+    state = sp.symbols('th1 th2 p1 p2')
+    H = compute_hamiltonian(model).subs(PARAMETERS)
+    H = H.xreplace(dict(zip((theta1, theta2, p_theta_1, p_theta_2), state)))
+    return sp.lambdify(state, H, 'numpy')
+
+
+def relative_energy_error(energy, sol):
+    values = energy(sol[:, 0], sol[:, 1], sol[:, 2], sol[:, 3])
+    return float(np.max(np.abs(values - values[0])) / abs(values[0]))
+
+
+def run_rk45(system, t_eval, rtol):
+    counter = CountingSystem(system)
+    start = time.perf_counter()
+    sol = solve_ivp(lambda t, y: counter(t, y, np.empty(4)), (t_eval[0], t_eval[-1]), INITIAL_STATE,
+                    t_eval=t_eval, rtol=rtol, atol=rtol * 1e-3)
+    return sol.y.T, counter.calls, time.perf_counter() - start
+
+
+def run_fixed(integrator, system, t_eval, step, **options):
+    counter = CountingSystem(system)
+    start = time.perf_counter()
+    sol = integrator(counter, t_eval, INITIAL_STATE, max_step=step, **options)
+    return sol, counter.calls, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--time', type=float, default=120.0, help='simulated seconds (default: 120)')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    t_eval = np.linspace(0.0, args.time, int(args.time * SAMPLES_PER_SECOND) + 1)
+    system = BoundSystem(state_kernel('hamiltonian', 'simple'),
+                         parameter_values(PARAMETERS, 'hamiltonian', 'simple'))
+    energy = energy_function()
+
+    cases = [('RK45 (solve_ivp)', f'rtol={rtol:g}', lambda rtol=rtol: run_rk45(system, t_eval, rtol))
+             for rtol in (1e-3, 1e-6, 1e-9)]
+    for step in (0.02, 0.01, 0.005):
+        cases += [
+            ('RK4', f'h={step:g}', lambda step=step: run_fixed(rk4, system, t_eval, step)),
+            ('implicit midpoint', f'h={step:g}', lambda step=step: run_fixed(implicit_midpoint, system, t_eval, step)),
+            ('Gauss-Legendre 4', f'h={step:g}', lambda step=step: run_fixed(gauss_legendre, system, t_eval, step)),
+        ]
+    # Tao's coupling must satisfy omega * h <~ 0.5 while binding the copies, so it needs small steps
+    for step in (0.005, 0.0025):
+        cases += [
+            ('Tao 2', f'h={step:g}', lambda step=step: run_fixed(tao, system, t_eval, step)),
+            ('Tao 4', f'h={step:g}', lambda step=step: run_fixed(tao, system, t_eval, step, order=4)),
+        ]
+
+    results = []
+    # Diverging runs are part of the comparison; report them rather than warn
+    warnings.simplefilter('ignore', RuntimeWarning)
+    print(f"{'method':<20}{'setting':<14}{'RHS evals':>12}{'max |dH/H0|':>14}{'seconds':>10}")
+    for method, setting, run in cases:
+        try:
+            sol, evaluations, seconds = run()
+            error = relative_energy_error(energy, sol)
+        except (ValueError, RuntimeError):
+            evaluations, error, seconds = 0, float('nan'), float('nan')
+        results.append(dict(method=method, setting=setting, rhs_evaluations=evaluations,
+                            max_relative_energy_error=error, seconds=seconds))
+        print(f"{method:<20}{setting:<14}{evaluations:>12d}{error:>14.3e}{seconds:>10.3f}")
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(dict(simulated_seconds=args.time, results=results), handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,22 @@
+"""
+Gunicorn settings, read automatically when gunicorn is started from the repository root.
+
+With ``--preload`` (or ``DOUBLE_PENDULUM_PRELOAD=1``) the app is imported once
+in the master process and the equation cache is warmed there before the
+workers fork, so they share the derived equations and generated kernels
+instead of each building them on its first simulation. The spawned job
+pools inherit none of it and warm their own processes as they start.
+"""
+import os
+
+
+preload_app = os.environ.get("DOUBLE_PENDULUM_PRELOAD", "0").lower() in {"1", "true", "yes", "on"}
+
+
+def when_ready(server):
+    # Runs in the master once the app is loaded and before any worker is forked
+    if server.cfg.preload_app:
+        from src.double_pendulum.models.compiled import warm_up
+
+        warm_up()
+        server.log.info("Warmed the equation cache before forking workers")
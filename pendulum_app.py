@@ -1,11 +1,15 @@
+from pathlib import Path
+
 import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
 from flask import Flask, redirect, request
+from app.callbacks.chaos import register_chaos_callbacks
 from app.callbacks.equations import register_equations_callbacks
 from app.callbacks.routing import register_routing_callbacks
 from app.callbacks.simulation import register_simulation_callbacks
 from app.content.routes import APP_TITLE, HOME_PAGE
+from app.metrics import register_metrics
 from app.pages.registry import get_layout_for_path
 
 
@@ -35,7 +39,7 @@ app = dash.Dash(
 
 # App set up
 app.title = APP_TITLE
-app.index_string = open('assets/custom-header.html', 'r').read()
+app.index_string = (Path(__file__).parent / 'assets' / 'custom-header.html').read_text()
 app.layout = html.Div([
     dcc.Location(id='url', refresh=False),  # Tracks the url
     dcc.Store(id='update-state', data={'clear': False, 'update': False}),
@@ -47,6 +51,8 @@ app.layout = html.Div([
 register_routing_callbacks(app)
 register_simulation_callbacks(app)
 register_equations_callbacks(app)
+register_chaos_callbacks(app)
+register_metrics(server)
 
 
 if __name__ == '__main__':
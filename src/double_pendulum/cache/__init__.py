@@ -0,0 +1,25 @@
+from .equations import (
+    EQUATION_CACHE_VERSION,
+    equation_artifact_path,
+    equation_fingerprint,
+    load_equations,
+    load_or_derive_equations,
+    store_equations,
+)
+from .files import atomic_write_bytes, cache_directory
+from .results import RESULT_CACHE_VERSION, ResultCache, simulation_key, simulation_results
+
+__all__ = [
+    "EQUATION_CACHE_VERSION",
+    "RESULT_CACHE_VERSION",
+    "ResultCache",
+    "atomic_write_bytes",
+    "cache_directory",
+    "equation_artifact_path",
+    "equation_fingerprint",
+    "load_equations",
+    "load_or_derive_equations",
+    "simulation_key",
+    "simulation_results",
+    "store_equations",
+]
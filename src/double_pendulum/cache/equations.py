@@ -0,0 +1,117 @@
+import hashlib
+import inspect
+import os
+import pickle
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+
+from ..instrumentation import metrics
+from .files import atomic_write_bytes, cache_directory
+
+
+# Bump when the pickled payload layout changes.
+EQUATION_CACHE_VERSION = 1
+EQUATION_CACHE_ENV = "DOUBLE_PENDULUM_EQUATION_CACHE"
+
+# Located by path rather than imported, so fingerprinting does not load SymPy
+FUNCTIONS_SOURCE = Path(__file__).resolve().parent.parent / "math" / "functions.py"
+
+
+def _disk_cache_enabled():
+    return os.environ.get(EQUATION_CACHE_ENV, "1").lower() not in {"0", "false", "no", "off"}
+
+
+@lru_cache(maxsize=None)
+def _functions_source_digest():
+    source = FUNCTIONS_SOURCE.read_bytes()
+    return hashlib.sha256(source).hexdigest()
+
+
+def equation_fingerprint(derive=None):
+    """
+    Return the hash that versions a derived-equation artifact.
+
+    The hash covers the ``math/functions.py`` source, the source of the deriving
+    function (``add_equations`` / ``hamiltonian_first_order_system``), the SymPy
+    version and ``EQUATION_CACHE_VERSION``. Editing any of them invalidates every
+    artifact on disk without manual clean-up.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"v{EQUATION_CACHE_VERSION}:sympy-{metadata.version('sympy')}:".encode())
+    digest.update(_functions_source_digest().encode())
+    if derive is not None:
+        try:
+            digest.update(inspect.getsource(derive).encode())
+        except (OSError, TypeError):
+            digest.update(getattr(derive, "__qualname__", repr(derive)).encode())
+    return digest.hexdigest()[:16]
+
+
+def equation_artifact_path(formulation, model, derive=None):
+    """Return the artifact path for a (formulation, model) pair."""
+    return cache_directory("equations") / f"{formulation}-{model}-{equation_fingerprint(derive)}.pickle"
+
+
+def load_equations(formulation, model, derive=None):
+    """
+    Load a derived system from disk, returning ``None`` on a miss.
+
+    Unreadable or stale artifacts are treated as misses so a corrupted file can
+    never break a simulation; it is simply re-derived and overwritten.
+    """
+    path = equation_artifact_path(formulation, model, derive)
+    try:
+        payload = pickle.loads(path.read_bytes())
+    except Exception:
+        return None
+
+    if (
+        not isinstance(payload, dict)
+        or payload.get("version") != EQUATION_CACHE_VERSION
+        or payload.get("formulation") != formulation
+        or payload.get("model") != model
+    ):
+        return None
+    return payload["equations"]
+
+
+def store_equations(formulation, model, equations, derive=None):
+    """Atomically write a derived system to the shared artifact store."""
+    payload = {
+        "version": EQUATION_CACHE_VERSION,
+        "formulation": formulation,
+        "model": model,
+        "equations": equations,
+    }
+    path = equation_artifact_path(formulation, model, derive)
+    return atomic_write_bytes(path, pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def load_or_derive_equations(formulation, model, derive):
+    """
+    Return the derived system for ``model``, deriving it only on a cache miss.
+
+    Parameters:
+        formulation (str): 'lagrangian' or 'hamiltonian', used in the artifact key.
+        model (str): 'simple' or 'compound'.
+        derive (callable): Called as ``derive(model)`` when no artifact exists.
+
+    Set ``DOUBLE_PENDULUM_EQUATION_CACHE=0`` to bypass the disk store entirely.
+    """
+    if not _disk_cache_enabled():
+        return derive(model)
+
+    equations = load_equations(formulation, model, derive)
+    metrics.increment('double_pendulum_cache_requests_total', cache='equations',
+                      result='miss' if equations is None else 'hit')
+    if equations is not None:
+        return equations
+
+    equations = derive(model)
+    try:
+        store_equations(formulation, model, equations, derive)
+    except OSError:
+        # A read-only or full filesystem must not stop the simulation.
+        pass
+    return equations
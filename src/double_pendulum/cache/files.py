@@ -0,0 +1,52 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+CACHE_DIR_ENV = "DOUBLE_PENDULUM_CACHE_DIR"
+
+
+def cache_directory(*parts):
+    """
+    Return (and create) a directory inside the shared on-disk cache.
+
+    The root is taken from ``DOUBLE_PENDULUM_CACHE_DIR`` when set, otherwise from
+    ``$XDG_CACHE_HOME/double_pendulum`` (falling back to ``~/.cache``). Every
+    process on the machine resolves the same root, so gunicorn workers share it.
+    """
+    root = os.environ.get(CACHE_DIR_ENV)
+    if root:
+        base = Path(root)
+    else:
+        xdg_cache = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        base = Path(xdg_cache) / "double_pendulum"
+
+    directory = base.joinpath(*parts)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def atomic_write_bytes(path, data):
+    """
+    Write ``data`` to ``path`` so that readers only ever see a complete file.
+
+    The bytes are written to a temporary file in the destination directory and
+    moved into place with ``os.replace``, which is atomic on POSIX and Windows.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        # mkstemp creates 0600 files; cache artifacts are meant to be shared.
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    return path
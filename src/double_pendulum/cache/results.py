@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from .equations import equation_fingerprint
+from .files import atomic_write_bytes, cache_directory
+
+
+# Bump when the cached payload layout or the figures built from a simulation change.
+RESULT_CACHE_VERSION = 3
+RESULT_CACHE_ENV = "DOUBLE_PENDULUM_RESULT_CACHE"
+RESULT_CACHE_BYTES_ENV = "DOUBLE_PENDULUM_RESULT_CACHE_BYTES"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _canonical(value):
+    # JSON-ready form in which equal requests compare equal: 1 == 1.0, symbol keys == names
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, (bool, str)) or value is None:
+        return value
+    if isinstance(value, (int, float, np.number)):
+        return repr(float(value))
+    if callable(value):
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', repr(value))}"
+    return str(value)
+
+
+def simulation_key(system_type, model_type, parameters, initial_conditions, time_span, integrator_options=None):
+    """
+    Return the canonical hash identifying one simulation request.
+
+    Parameters may be keyed by SymPy symbols or their names, numbers are
+    compared as floats and integrators are identified by qualified name, so
+    equivalent requests from any worker map to the same key. The key also
+    covers ``RESULT_CACHE_VERSION`` and the derived-equation fingerprint, so
+    results computed by older code are never served.
+    """
+    request = {
+        "version": RESULT_CACHE_VERSION,
+        "equations": equation_fingerprint(),
+        "system_type": system_type,
+        "model_type": model_type,
+        "parameters": _canonical(parameters),
+        "initial_conditions": _canonical(initial_conditions),
+        "time_span": _canonical(time_span),
+        "integrator_options": _canonical(integrator_options or {}),
+    }
+    encoded = json.dumps(request, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResultCache:
+    """
+    A byte-size-bounded LRU cache of pickled results with an optional shared file backend.
+
+    Entries are held pickled, so the in-memory size is exact and cached values
+    can never be mutated by a caller. With a ``directory`` every entry is also
+    written there atomically; other processes (gunicorn workers) find it on a
+    memory miss. Both tiers evict least-recently-used entries once they exceed
+    ``max_bytes``; file recency is tracked through modification times.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, directory=None):
+        self.max_bytes = int(max_bytes)
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """Bytes currently held in memory."""
+        return self._size
+
+    def _path(self, key):
+        return self.directory / f"{key}.pickle"
+
+    def _remember(self, key, data):
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def get(self, key, default=None):
+        """Return the cached value for ``key``, or ``default`` on a miss."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+        if data is None and self.directory is not None:
+            path = self._path(key)
+            try:
+                data = path.read_bytes()
+                os.utime(path)  # Mark as recently used for the shared eviction
+            except OSError:
+                data = None
+            if data is not None:
+                self._remember(key, data)
+        if data is None:
+            return default
+        try:
+            return pickle.loads(data)
+        except Exception:
+            # A corrupted entry is a miss; it is replaced by the next ``put``
+            return default
+
+    def put(self, key, value):
+        """Store ``value`` under ``key``; values larger than ``max_bytes`` are not cached."""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+        self._remember(key, data)
+        if self.directory is not None:
+            try:
+                atomic_write_bytes(self._path(key), data)
+                self._prune_directory()
+            except OSError:
+                # A read-only or full filesystem leaves the in-memory tier working.
+                pass
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, calling ``compute()`` and storing its result on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _prune_directory(self):
+        entries = []
+        for path in self.directory.glob("*.pickle"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Evicted by another worker
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Drop every entry from memory and from the shared directory."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        if self.directory is not None:
+            for path in self.directory.glob("*.pickle"):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+
+@lru_cache(maxsize=None)
+def simulation_results():
+    """
+    Return the process-wide simulation result cache, or ``None`` when disabled.
+
+    Results are shared between workers through ``cache_directory("results")``.
+    ``DOUBLE_PENDULUM_RESULT_CACHE`` selects the backend: ``file`` (default),
+    ``memory`` for a per-process cache, or ``0`` to disable caching.
+    ``DOUBLE_PENDULUM_RESULT_CACHE_BYTES`` bounds each tier (default 256 MiB).
+    """
+    backend = os.environ.get(RESULT_CACHE_ENV, "file").lower()
+    if backend in {"0", "false", "no", "off"}:
+        return None
+    max_bytes = int(os.environ.get(RESULT_CACHE_BYTES_ENV, DEFAULT_MAX_BYTES))
+    directory = None
+    if backend != "memory":
+        try:
+            directory = cache_directory("results")
+        except OSError:
+            directory = None
+    return ResultCache(max_bytes=max_bytes, directory=directory)
@@ -0,0 +1,33 @@
+from .flips import FlipMap, compute_flip_map, flip_times
+from .ftle import FTLEField, compute_ftle_field
+from .lyapunov import LyapunovSpectrum, benettin, largest_lyapunov_exponents, lyapunov_spectrum, renormalize
+from .poincare import (CrossingBuffer, PoincareSection, batch_section_crossings, energy_surface_states,
+                       section_crossings)
+from .sweep import ParameterSweep, parameter_sweep
+from .tangent import TangentSystem
+from .tiling import TiledArray, TileScheduler, balance_tiles, grid_tiles
+
+__all__ = [
+    "CrossingBuffer",
+    "FTLEField",
+    "FlipMap",
+    "LyapunovSpectrum",
+    "ParameterSweep",
+    "PoincareSection",
+    "TangentSystem",
+    "TileScheduler",
+    "TiledArray",
+    "balance_tiles",
+    "batch_section_crossings",
+    "benettin",
+    "compute_flip_map",
+    "compute_ftle_field",
+    "energy_surface_states",
+    "flip_times",
+    "grid_tiles",
+    "largest_lyapunov_exponents",
+    "lyapunov_spectrum",
+    "parameter_sweep",
+    "renormalize",
+    "section_crossings",
+]
@@ -0,0 +1,149 @@
+from pathlib import Path
+
+import numpy as np
+
+from ..cache.equations import equation_fingerprint
+from ..cache.files import cache_directory
+from ..models.compiled import energy_kernel, parameter_values, state_kernel
+from ..numerics import BoundSystem, MaskedRK4
+from .tiling import TiledArray, TileScheduler, grid_tiles, settings_key
+
+
+# Bump when the stored map layout or the flip criterion changes
+FLIP_MAP_VERSION = 1
+
+
+def flip_times(parameters, initial_conditions, max_time=10.0, step=0.01, model='simple', formulation='lagrangian'):
+    """
+    Return the time at which each trajectory of an ``(N, 4)`` batch first flips, as an ``(N,)`` array.
+
+    A flip is either arm passing over the top: ``|theta1|`` or ``|theta2|``
+    exceeding 180 degrees. The batch is stepped with masked RK4 and every
+    trajectory is retired at its first flip, so the cost follows the cells
+    still swinging. Trajectories without the energy to lift either arm over
+    the top (the minimum potential energy with ``theta1`` or ``theta2`` at
+    180 degrees) are never integrated. Those and the ones still unflipped at
+    ``max_time`` are ``inf``.
+
+    Parameters:
+        initial_conditions (array_like): ``[theta1, theta2, omega1 / p1, omega2 / p2]`` rows in
+            degrees, with angles in ``[-180, 180]``.
+        step (float): RK4 step; flip times are resolved to one step.
+    """
+    states = np.deg2rad(np.atleast_2d(np.asarray(initial_conditions, dtype=float)))
+    params = parameter_values(parameters, formulation, model)
+    energy = energy_kernel(formulation, model, vectorized=True)
+    barriers = energy(0.0, np.array([[np.pi, 0.0, 0.0, 0.0], [0.0, np.pi, 0.0, 0.0]]), np.empty((2, 1)),
+                      params)[:, 0]
+    initial_energy = energy(0.0, states, np.empty((len(states), 1)), params)[:, 0]
+
+    times = np.full(len(states), np.inf)
+    candidates = np.flatnonzero(initial_energy >= barriers.min())
+    if not candidates.size:
+        return times
+
+    system = BoundSystem(state_kernel(formulation, model, vectorized=True),
+                         tuple(value if np.ndim(value) == 0 else value[candidates] for value in params))
+    stepper = MaskedRK4(system, states[candidates], step)
+    while stepper.n_active and stepper.t < max_time:
+        stepper.step()
+        stepper.retire(np.abs(stepper.y[:, :2]).max(axis=1) > np.pi)
+    times[candidates] = np.where(np.isnan(stepper.retired_at), np.inf, stepper.retired_at)
+    return times
+
+
+class FlipMap:
+    """
+    Time to the first flip over a grid of initial angles, stored as a memory-mapped ``.npy`` file.
+
+    Rows follow ``theta2`` and columns ``theta1``, both in degrees and
+    released from rest. The map is computed in tiles, each written to the
+    memory-mapped ``TiledArray`` as soon as it finishes; unfinished cells hold
+    NaN and cells that never flip within ``max_time`` hold ``inf``. The
+    file name hashes every setting, so an interrupted ``compute`` resumes
+    with the tiles still missing and a finished map is simply reopened.
+
+        Attributes:
+            path (pathlib.Path): The ``.npy`` file in ``directory`` (default ``cache_directory("flip-maps")``).
+            theta1, theta2 (numpy.ndarray): Grid angles of the columns and rows, in degrees.
+    """
+
+    def __init__(self, parameters, shape=(256, 256), theta1_range=(-180.0, 180.0), theta2_range=(-180.0, 180.0),
+                 max_time=10.0, step=0.01, model='simple', formulation='lagrangian', tile_size=64,
+                 directory=None):
+        self.parameters = {str(symbol): float(value) for symbol, value in parameters.items()}
+        self.shape = tuple(int(n) for n in shape)
+        self.theta1 = np.linspace(*theta1_range, self.shape[1])
+        self.theta2 = np.linspace(*theta2_range, self.shape[0])
+        self.max_time = float(max_time)
+        self.step = float(step)
+        self.model = model
+        self.formulation = formulation
+        self.tile_size = int(tile_size)
+        settings = dict(version=FLIP_MAP_VERSION, equations=equation_fingerprint(), parameters=self.parameters,
+                        shape=self.shape, theta1=[*map(float, theta1_range)], theta2=[*map(float, theta2_range)],
+                        max_time=self.max_time, step=self.step, model=model, formulation=formulation)
+        self.key = settings_key(settings)
+        directory = cache_directory("flip-maps") if directory is None else Path(directory)
+        self.path = directory / f"flip-map-{self.key}.npy"
+        self.array = TiledArray(self.path, self.shape)
+
+    def tiles(self):
+        """Return every tile as ``(row_start, row_stop, column_start, column_stop)``."""
+        return grid_tiles(self.shape, self.tile_size)
+
+    def open(self, mode='r'):
+        """Return the memory-mapped map, creating it (all NaN) first if it does not exist."""
+        return self.array.open(mode)
+
+    def pending_tiles(self):
+        """Return the tiles that still contain uncomputed cells."""
+        return self.array.pending(self.tiles())
+
+    def complete(self):
+        return self.path.exists() and not self.pending_tiles()
+
+    def initial_conditions(self, tile):
+        """Return the ``(n, 4)`` initial conditions (degrees, at rest) of a tile's cells in row-major order."""
+        theta2, theta1 = np.meshgrid(self.theta2[tile[0]:tile[1]], self.theta1[tile[2]:tile[3]], indexing='ij')
+        states = np.zeros((theta1.size, 4))
+        states[:, 0], states[:, 1] = theta1.ravel(), theta2.ravel()
+        return states
+
+    def tile_cost(self, tile):
+        """
+        Estimate a tile's cost as the number of its cells with the energy to flip.
+
+        The other cells are never integrated, so tiles near the bottom of the
+        map are almost free while those around the separatrix cost the most.
+        """
+        params = parameter_values(self.parameters, self.formulation, self.model)
+        energy = energy_kernel(self.formulation, self.model, vectorized=True)
+        states = np.deg2rad(self.initial_conditions(tile))
+        barriers = energy(0.0, np.array([[np.pi, 0.0, 0.0, 0.0], [0.0, np.pi, 0.0, 0.0]]), np.empty((2, 1)), params)
+        energies = energy(0.0, states, np.empty((len(states), 1)), params)
+        return 1 + np.count_nonzero(energies[:, 0] >= barriers[:, 0].min())
+
+    def compute_tile(self, tile):
+        """Compute one tile and write it into the map."""
+        self.array.write(tile, flip_times(self.parameters, self.initial_conditions(tile), self.max_time, self.step,
+                                          self.model, self.formulation))
+
+    def compute(self, workers=1, progress=None):
+        """
+        Compute the missing tiles and return the finished map.
+
+        The tiles run on a ``TileScheduler`` (``workers > 1`` spawns a
+        process pool whose processes write their tiles into the shared file),
+        rebalanced by ``tile_cost``. ``progress(fraction)`` is called after
+        each tile with the fraction of the missing cells done.
+        """
+        kernels = [(state_kernel, self.formulation, self.model), (energy_kernel, self.formulation, self.model)]
+        scheduler = TileScheduler(workers, kernels)
+        scheduler.run(self.compute_tile, self.pending_tiles(), cost=self.tile_cost, progress=progress)
+        return self.open()
+
+
+def compute_flip_map(progress=None, **settings):
+    """Compute the ``FlipMap`` described by ``settings`` in this process; the job-pool entry point."""
+    FlipMap(**settings).compute(progress=progress)
@@ -0,0 +1,148 @@
+from pathlib import Path
+
+import numpy as np
+
+from ..cache.equations import equation_fingerprint
+from ..cache.files import cache_directory
+from ..models.compiled import jacobian_kernel, parameter_values, state_kernel
+from ..numerics import BoundSystem, RK4Workspace, rk4_step
+from .tangent import TangentSystem
+from .tiling import TiledArray, TileScheduler, grid_tiles, settings_key
+
+
+# Bump when the stored field layout or the exponent definition changes
+FTLE_FIELD_VERSION = 1
+
+FTLE_METHODS = ('tangent', 'stencil')
+
+
+def _integrate(system, y, duration, step):
+    # Fixed-step RK4 in place, keeping only the final state
+    steps = max(1, int(round(duration / step)))
+    h = duration / steps
+    work = RK4Workspace(y.shape)
+    t = 0.0
+    for _ in range(steps):
+        rk4_step(system, t, y, h, work)
+        t += h
+    return y
+
+
+def _largest_stretch(gradient, duration):
+    # log of the flow-map gradient's largest singular value per unit time
+    return np.log(np.linalg.norm(gradient, ord=2, axis=(-2, -1))) / duration
+
+
+class FTLEField:
+    """
+    Finite-time Lyapunov exponents over a grid of initial angles released from rest, stored as a cached ``.npy``.
+
+    Rows follow ``theta2`` and columns ``theta1`` (degrees). Each cell holds
+    ``log(sigma_max) / duration``, with ``sigma_max`` the largest singular
+    value of the flow-map gradient, from one of two methods:
+
+    - ``'tangent'``: the full 4x4 gradient, propagated by the variational
+      equations alongside each trajectory (``TangentSystem`` with four
+      tangent vectors). Exact up to the integration error, about three
+      times the cost of the plain trajectories.
+    - ``'stencil'``: the 4x2 gradient with respect to the two angles, by
+      central differences between neighbouring cells. Every trajectory is
+      shared by its four neighbours' stencils, so only the grid (plus a
+      one-cell halo around each tile) is integrated; where neighbours
+      separate beyond the linear regime the exponent is underestimated.
+
+    Like ``FlipMap`` the field is computed in tiles on a ``TileScheduler``
+    into a ``TiledArray`` named by a hash of the settings, so it resumes
+    after an interruption and is rendered again (at any colour scale)
+    without recomputation.
+    """
+
+    def __init__(self, parameters, shape=(512, 512), theta1_range=(-180.0, 180.0), theta2_range=(-180.0, 180.0),
+                 duration=5.0, step=0.01, method='stencil', model='simple', formulation='lagrangian',
+                 tile_size=64, directory=None):
+        if method not in FTLE_METHODS:
+            raise ValueError(f"Invalid FTLE method '{method}'. Please choose 'tangent' or 'stencil'.")
+        self.parameters = {str(symbol): float(value) for symbol, value in parameters.items()}
+        self.shape = tuple(int(n) for n in shape)
+        self.theta1_range = tuple(map(float, theta1_range))
+        self.theta2_range = tuple(map(float, theta2_range))
+        self.theta1 = np.linspace(*self.theta1_range, self.shape[1])
+        self.theta2 = np.linspace(*self.theta2_range, self.shape[0])
+        self.duration = float(duration)
+        self.step = float(step)
+        self.method = method
+        self.model = model
+        self.formulation = formulation
+        self.tile_size = int(tile_size)
+        self.key = settings_key(dict(
+            version=FTLE_FIELD_VERSION, equations=equation_fingerprint(), parameters=self.parameters,
+            shape=self.shape, theta1=self.theta1_range, theta2=self.theta2_range, duration=self.duration,
+            step=self.step, method=method, model=model, formulation=formulation))
+        directory = cache_directory("ftle") if directory is None else Path(directory)
+        self.path = directory / f"ftle-{self.key}.npy"
+        self.array = TiledArray(self.path, self.shape)
+
+    def tiles(self):
+        return grid_tiles(self.shape, self.tile_size)
+
+    def open(self, mode='r'):
+        """Return the memory-mapped field, creating it (all NaN) first if it does not exist."""
+        return self.array.open(mode)
+
+    def pending_tiles(self):
+        return self.array.pending(self.tiles())
+
+    def complete(self):
+        return self.path.exists() and not self.pending_tiles()
+
+    def _angles(self, start, stop, axis):
+        # Grid angles for indices start..stop-1, extended past the edges with the same spacing
+        low, high = self.theta1_range if axis == 1 else self.theta2_range
+        spacing = (high - low) / max(self.shape[axis] - 1, 1)
+        return low + spacing * np.arange(start, stop), spacing
+
+    def _states(self, rows, columns):
+        theta2, theta1 = np.meshgrid(rows, columns, indexing='ij')
+        states = np.zeros((theta1.size, 4))
+        states[:, 0], states[:, 1] = theta1.ravel(), theta2.ravel()
+        return np.deg2rad(states)
+
+    def compute_tile(self, tile):
+        """Compute one tile and write it into the field."""
+        r0, r1, c0, c1 = tile
+        params = parameter_values(self.parameters, self.formulation, self.model)
+        if self.method == 'tangent':
+            rows, _ = self._angles(r0, r1, 0)
+            columns, _ = self._angles(c0, c1, 1)
+            system = TangentSystem.for_model(self.parameters, self.formulation, self.model, n_vectors=4)
+            z = _integrate(system, system.initial(self._states(rows, columns)), self.duration, self.step)
+            field = _largest_stretch(system.vectors(z), self.duration)
+        else:
+            rows, row_spacing = self._angles(r0 - 1, r1 + 1, 0)
+            columns, column_spacing = self._angles(c0 - 1, c1 + 1, 1)
+            system = BoundSystem(state_kernel(self.formulation, self.model, vectorized=True), params)
+            final = _integrate(system, self._states(rows, columns), self.duration, self.step)
+            final = final.reshape(len(rows), len(columns), 4)
+            gradient = np.stack([
+                (final[1:-1, 2:] - final[1:-1, :-2]) / (2 * np.deg2rad(column_spacing)),
+                (final[2:, 1:-1] - final[:-2, 1:-1]) / (2 * np.deg2rad(row_spacing)),
+            ], axis=-1)
+            field = _largest_stretch(gradient, self.duration)
+        self.array.write(tile, field)
+
+    def compute(self, workers=1, progress=None):
+        """
+        Compute the missing tiles on a ``TileScheduler`` and return the finished field.
+
+        ``progress(fraction)`` is called after each tile.
+        """
+        kernels = [(state_kernel, self.formulation, self.model)]
+        if self.method == 'tangent':
+            kernels.append((jacobian_kernel, self.formulation, self.model))
+        TileScheduler(workers, kernels).run(self.compute_tile, self.pending_tiles(), progress=progress)
+        return self.open()
+
+
+def compute_ftle_field(progress=None, **settings):
+    """Compute the ``FTLEField`` described by ``settings`` in this process; the job-pool entry point."""
+    FTLEField(**settings).compute(progress=progress)
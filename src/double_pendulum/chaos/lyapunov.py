@@ -0,0 +1,120 @@
+import numpy as np
+
+from ..numerics import RK4Workspace, rk4_step
+from .tangent import TangentSystem
+
+
+def renormalize(system, z):
+    """
+    Orthonormalize the tangent vectors of ``z`` in place (Gram-Schmidt via QR) and return their log growth.
+
+    The returned ``(N, k)`` array holds ``log |R_ii|``: how much the ``i``-th
+    vector stretched, after removing its components along the previous ones,
+    since the last renormalization.
+    """
+    columns = system.vectors(z).transpose(0, 2, 1)
+    q, r = np.linalg.qr(columns)
+    z[:, 4:] = q.transpose(0, 2, 1).reshape(z.shape[0], -1)
+    return np.log(np.abs(np.diagonal(r, axis1=1, axis2=2)))
+
+
+class LyapunovSpectrum:
+    """
+    Lyapunov exponents of one trajectory, estimated over a finite time.
+
+        Attributes:
+            exponents (numpy.ndarray): ``(4,)`` exponents in 1/s, largest first.
+            times (numpy.ndarray): Times of the renormalizations after the transient.
+            history (numpy.ndarray): ``(len(times), 4)`` running estimates at those times,
+                for judging convergence.
+    """
+
+    def __init__(self, exponents, times, history):
+        self.exponents = exponents
+        self.times = times
+        self.history = history
+
+    @property
+    def largest(self):
+        return float(self.exponents[0])
+
+
+def benettin(system, z, duration, step=0.005, renormalization_interval=0.1, transient=0.0, keep_history=False):
+    """
+    Integrate a ``TangentSystem`` batch with RK4 and accumulate Lyapunov exponents (Benettin's method).
+
+    The tangent vectors are orthonormalized every ``renormalization_interval``
+    seconds so they neither overflow nor collapse onto the most unstable
+    direction; the logarithms of their stretching factors, summed after
+    ``transient`` seconds and divided by the elapsed time, converge to the
+    ``k`` largest exponents. ``z`` is advanced in place.
+
+    Returns ``(exponents, times, history)``: ``(N, k)`` exponents, largest
+    first in each row, and, with ``keep_history``, the renormalization times
+    and ``(len(times), N, k)`` running estimates in the same order
+    (otherwise both are empty).
+    """
+    steps = max(1, int(round(renormalization_interval / step)))
+    h = renormalization_interval / steps
+    skipped = int(round(transient / renormalization_interval))
+    intervals = max(1, int(round(duration / renormalization_interval)))
+
+    work = RK4Workspace(z.shape)
+    sums = np.zeros((z.shape[0], system.n_vectors))
+    times, history = [], []
+    t = 0.0
+    for index in range(skipped + intervals):
+        for _ in range(steps):
+            rk4_step(system, t, z, h, work)
+            t += h
+        growth = renormalize(system, z)
+        if index >= skipped:
+            sums += growth
+            if keep_history:
+                elapsed = (index - skipped + 1) * renormalization_interval
+                times.append(t)
+                history.append(sums / elapsed)
+    # Over a finite time the QR order need not match the size order, so sort each estimate
+    exponents = -np.sort(-sums / (intervals * renormalization_interval), axis=-1)
+    history = -np.sort(-np.array(history).reshape(len(history), *sums.shape), axis=-1)
+    return exponents, np.array(times), history
+
+
+def lyapunov_spectrum(parameters, initial_conditions, duration, model='simple', formulation='lagrangian',
+                      step=0.005, renormalization_interval=0.1, transient=0.0):
+    """
+    Return the full ``LyapunovSpectrum`` of one trajectory from a single integration pass.
+
+    Parameters:
+        parameters (dict): Pendulum parameters, keyed by the symbols of ``math/functions.py``.
+        initial_conditions (list): ``[theta1, theta2, omega1 / p1, omega2 / p2]`` in degrees,
+            as for the model classes.
+        duration (float): Seconds over which the exponents are averaged, after ``transient``.
+        model (str): 'simple' or 'compound'.
+        formulation (str): 'lagrangian' or 'hamiltonian'. The exponents do not depend on it;
+            in canonical coordinates they come in +/- pairs summing to zero.
+        step (float): RK4 step of the trajectory and its tangent vectors.
+        renormalization_interval (float): Seconds between Gram-Schmidt renormalizations.
+        transient (float): Seconds integrated (and renormalized) before averaging starts.
+    """
+    system = TangentSystem.for_model(parameters, formulation, model, n_vectors=4)
+    z = system.initial(np.deg2rad(np.asarray(initial_conditions, dtype=float)))
+    exponents, times, history = benettin(system, z, duration, step, renormalization_interval, transient,
+                                         keep_history=True)
+    return LyapunovSpectrum(exponents[0], times, history[:, 0])
+
+
+def largest_lyapunov_exponents(parameters, initial_conditions, duration, model='simple',
+                               formulation='lagrangian', step=0.005, renormalization_interval=0.1,
+                               transient=0.0):
+    """
+    Return the largest Lyapunov exponent of every trajectory of an ``(N, 4)`` batch, as an ``(N,)`` array.
+
+    The batch is integrated together with one tangent vector per trajectory
+    by the vectorized kernels; parameter values may be ``(N,)`` arrays.
+    Arguments are as for ``lyapunov_spectrum``.
+    """
+    system = TangentSystem.for_model(parameters, formulation, model, n_vectors=1)
+    z = system.initial(np.deg2rad(np.atleast_2d(np.asarray(initial_conditions, dtype=float))))
+    exponents, _, _ = benettin(system, z, duration, step, renormalization_interval, transient)
+    return exponents[:, 0]
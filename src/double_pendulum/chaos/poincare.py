@@ -0,0 +1,245 @@
+import numpy as np
+import sympy as sp
+from scipy.integrate import DOP853
+from scipy.optimize import brentq
+
+from ..models.compiled import STATE_FUNCTIONS, energy_kernel, expression_kernel, parameter_values, state_kernel
+from ..numerics import BoundSystem, MaskedRK4, take_rows
+
+
+# Bisection steps locating a crossing inside an RK4 step: 2**-40 of the step is below 1e-13 s
+REFINEMENT_ITERATIONS = 40
+
+
+class CrossingBuffer:
+    """
+    Growable array of section crossings, one row per crossing.
+
+    Rows are appended into a preallocated ``(capacity, width)`` array whose
+    capacity doubles when it fills, so appending is amortized constant time
+    and no per-crossing Python objects are kept. ``array`` is a view of the
+    filled rows, valid until the next append.
+    """
+
+    def __init__(self, width, capacity=1024):
+        self._data = np.empty((capacity, width))
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def array(self):
+        return self._data[:self.size]
+
+    def extend(self, rows):
+        rows = np.atleast_2d(rows)
+        needed = self.size + rows.shape[0]
+        if needed > self._data.shape[0]:
+            grown = np.empty((max(needed, 2 * self._data.shape[0]), self._data.shape[1]))
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size:needed] = rows
+        self.size = needed
+
+
+class PoincareSection:
+    """
+    A surface of section ``g(y) = 0``, crossed in a given direction.
+
+    ``expression`` is a SymPy expression in the state functions of
+    ``formulation`` (``STATE_FUNCTIONS``) and the parameter symbols. A
+    crossing is a sign change of ``g`` from negative to positive
+    (``direction=1``), positive to negative (``-1``) or either (``0``), at
+    which the optional ``condition`` expression is positive. Both are
+    compiled together into scalar and vectorized event kernels.
+    """
+
+    def __init__(self, expression, direction=1, condition=None, formulation='lagrangian'):
+        self.expression = sp.sympify(expression)
+        self.condition = sp.Integer(1) if condition is None else sp.sympify(condition)
+        self.direction = direction
+        self.formulation = formulation
+        expressions = (self.expression, self.condition)
+        self.kernel = expression_kernel(expressions, formulation)
+        self.vectorized_kernel = expression_kernel(expressions, formulation, vectorized=True)
+
+    @classmethod
+    def angle(cls, component=0, value=0.0, direction=1, formulation='lagrangian'):
+        """
+        The section ``theta_{component + 1} = value`` (degrees, modulo 360), by default ``theta1 = 0``.
+
+        ``sin(theta - value)`` vanishes at ``value`` and at the opposite
+        angle; the condition ``cos(theta - value) > 0`` keeps only the
+        former. ``direction=1`` selects crossings with the angle increasing,
+        e.g. ``omega1 > 0`` for ``theta1 = 0``.
+        """
+        offset = STATE_FUNCTIONS[formulation][component] - sp.pi * sp.Float(value) / 180
+        return cls(sp.sin(offset), direction, sp.cos(offset), formulation)
+
+    def bind(self, params):
+        """Bind the vectorized event kernel to a ``parameter_values`` tuple, as a ``BoundSystem``."""
+        return BoundSystem(self.vectorized_kernel, params)
+
+    def crossed(self, before, after):
+        """Return True where the event value went from ``before`` to ``after`` across zero in ``direction``."""
+        rising = (before < 0) & (after >= 0)
+        falling = (before > 0) & (after <= 0)
+        if self.direction > 0:
+            return rising
+        if self.direction < 0:
+            return falling
+        return rising | falling
+
+
+def section_crossings(parameters, initial_conditions, section, crossings=500, max_time=1000.0, model='simple',
+                      rtol=1e-10, atol=1e-10, max_step=0.05, buffer=None):
+    """
+    Integrate one trajectory and record its crossings of ``section``.
+
+    The trajectory is stepped with an adaptive DOP853 solver; after every
+    step the compiled event function is compared with its value at the
+    previous step, and each crossing is located with Brent's method on the
+    step's dense output. Integration stops once ``crossings`` crossings are
+    recorded or at ``max_time``. ``max_step`` bounds the step so no step
+    skips over two crossings.
+
+    Parameters:
+        parameters (dict): Pendulum parameters, keyed by the symbols of ``math/functions.py``.
+        initial_conditions (list): ``[theta1, theta2, omega1 / p1, omega2 / p2]`` in degrees,
+            in the formulation of ``section``.
+        section (PoincareSection): The surface of section.
+        buffer (CrossingBuffer): Buffer of width 5 to append to; a new one by default.
+
+    Returns a ``CrossingBuffer`` with one ``[t, theta1, theta2, omega1 / p1, omega2 / p2]``
+    row per crossing, angles in radians.
+    """
+    formulation = section.formulation
+    params = parameter_values(parameters, formulation, model)
+    system = BoundSystem(state_kernel(formulation, model), params)
+    buffer = CrossingBuffer(5) if buffer is None else buffer
+    target = len(buffer) + crossings
+    event_values = np.empty(2)
+
+    def event(y):
+        return section.kernel(0.0, y, event_values, params)[0]
+
+    y0 = np.deg2rad(np.asarray(initial_conditions, dtype=float))
+    solver = DOP853(lambda t, y: system(t, y, np.empty(4)), 0.0, y0, max_time, rtol=rtol, atol=atol,
+                    max_step=max_step)
+    before = event(y0)
+    while solver.status == 'running' and len(buffer) < target:
+        t_old = solver.t
+        solver.step()
+        after = event(solver.y)
+        if section.crossed(before, after):
+            dense = solver.dense_output()
+            t_cross = brentq(lambda time: event(dense(time)), t_old, solver.t, xtol=1e-14)
+            y_cross = dense(t_cross)
+            if section.kernel(t_cross, y_cross, event_values, params)[1] > 0:
+                buffer.extend(np.concatenate(([t_cross], y_cross)))
+        before = after
+    return buffer
+
+
+def batch_section_crossings(parameters, initial_conditions, section, crossings=200, max_time=1000.0,
+                            model='simple', step=0.01, buffer=None):
+    """
+    Integrate an ``(N, 4)`` batch with masked RK4 and record every trajectory's crossings of ``section``.
+
+    All trajectories advance together through the vectorized kernels;
+    after every step the event function is evaluated for the whole batch,
+    and the rows that crossed are refined by bisection on the cubic Hermite
+    interpolant of the step. A trajectory is retired as soon as it has
+    ``crossings`` crossings, so the remaining steps only cost the ones
+    still running. Parameter values may be ``(N,)`` arrays; arguments are
+    otherwise as for ``section_crossings``.
+
+    Returns a ``CrossingBuffer`` with one ``[trajectory, t, theta1, theta2, omega1 / p1, omega2 / p2]``
+    row per crossing, in the order they were found.
+    """
+    formulation = section.formulation
+    params = parameter_values(parameters, formulation, model)
+    system = BoundSystem(state_kernel(formulation, model, vectorized=True), params)
+    events = section.bind(params)
+    stepper = MaskedRK4(system, np.deg2rad(np.atleast_2d(np.asarray(initial_conditions, dtype=float))), step)
+    buffer = CrossingBuffer(6) if buffer is None else buffer
+    counts = np.zeros(stepper.states.shape[0], dtype=int)
+
+    active_events = events
+    values = active_events(stepper.t, stepper.y, np.empty((stepper.n_active, 2)))[:, 0]
+    while stepper.n_active and stepper.t < max_time:
+        previous = stepper.step()
+        after = active_events(stepper.t, stepper.y, np.empty((stepper.n_active, 2)))[:, 0]
+        hits = np.flatnonzero(section.crossed(values, after))
+        if hits.size:
+            rows = stepper.rows[hits]
+            t_cross, y_cross, accepted = _refine(take_rows(system, rows), take_rows(events, rows),
+                                                 stepper.t - stepper.h, stepper.h, previous[hits],
+                                                 stepper.y[hits], values[hits])
+            buffer.extend(np.column_stack((rows[accepted], t_cross[accepted], y_cross[accepted])))
+            np.add.at(counts, rows[accepted], 1)
+
+        finished = counts[stepper.rows] >= crossings
+        values = after[~finished]
+        if finished.any():
+            stepper.retire(finished)
+            active_events = take_rows(events, stepper.rows)
+    return buffer
+
+
+def _refine(system, events, t0, h, y0, y1, before):
+    # Cubic Hermite interpolant of the step from the states and derivatives at both ends
+    h_d0 = h * system(t0, y0, np.empty_like(y0))
+    h_d1 = h * system(t0 + h, y1, np.empty_like(y1))
+
+    def interpolate(s):
+        s = s[:, None]
+        s2, s3 = s * s, s * s * s
+        return ((2 * s3 - 3 * s2 + 1) * y0 + (s3 - 2 * s2 + s) * h_d0 + (3 * s2 - 2 * s3) * y1
+                + (s3 - s2) * h_d1)
+
+    low, high = np.zeros(len(y0)), np.ones(len(y0))
+    out = np.empty((len(y0), 2))
+    for _ in range(REFINEMENT_ITERATIONS):
+        middle = 0.5 * (low + high)
+        value = events(t0, interpolate(middle), out)[:, 0]
+        past = value * before <= 0
+        high = np.where(past, middle, high)
+        low = np.where(past, low, middle)
+    y_cross = interpolate(high)
+    accepted = events(t0, y_cross, out)[:, 1] > 0
+    return t0 + high * h, y_cross, accepted
+
+
+def energy_surface_states(parameters, energy, states, component=2, model='simple', formulation='lagrangian'):
+    """
+    Return ``(N, 4)`` initial conditions on the energy surface ``E = energy`` (joules).
+
+    ``states`` are ``[theta1, theta2, omega1 / p1, omega2 / p2]`` rows in
+    degrees; their ``component`` (a velocity or momentum, 2 or 3) is
+    replaced by the non-negative value that gives the requested energy. The
+    energy is quadratic in each velocity or momentum, so its coefficients
+    are read off the compiled energy kernel at -1, 0 and 1 and the quadratic
+    solved per row. Rows whose potential energy already exceeds ``energy``
+    are NaN. With ``PoincareSection.angle()`` and ``component=2`` this fills
+    the section ``theta1 = 0`` with points crossing it upwards.
+    """
+    if component not in (2, 3):
+        raise ValueError("component must be a velocity or momentum (2 or 3).")
+    y = np.deg2rad(np.atleast_2d(np.asarray(states, dtype=float)))
+    kernel = energy_kernel(formulation, model, vectorized=True)
+    params = parameter_values(parameters, formulation, model)
+
+    def evaluate(value):
+        y[:, component] = value
+        return kernel(0.0, y, np.empty((y.shape[0], 1)), params)[:, 0]
+
+    c = evaluate(0.0) - energy
+    plus, minus = evaluate(1.0), evaluate(-1.0)
+    a = 0.5 * (plus + minus) - (c + energy)
+    b = 0.5 * (plus - minus)
+    with np.errstate(invalid='ignore'):
+        value = (-b + np.sqrt(b * b - 4 * a * c)) / (2 * a)
+    y[:, component] = np.where(c <= 0, value, np.nan)
+    return np.rad2deg(y)
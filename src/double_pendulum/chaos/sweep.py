@@ -0,0 +1,127 @@
+import numpy as np
+
+from ..models.compiled import PARAMETER_SYMBOLS, energy_kernel
+from ..models.energy import ZERO_ENERGY
+from ..numerics import BoundSystem, RK4Workspace, rk4_step
+from .lyapunov import renormalize
+from .tangent import TangentSystem
+
+
+PARAMETER_NAMES = tuple(str(symbol) for symbol in PARAMETER_SYMBOLS)
+
+
+class ParameterSweep:
+    """
+    Summary statistics of one trajectory per point of a parameter grid.
+
+    Every statistic is an array of the grid's ``shape``, indexed like
+    ``numpy.meshgrid(..., indexing='ij')`` over ``axes`` in order.
+
+        Attributes:
+            axes (dict): Swept parameter name -> the values along its grid axis.
+            shape (tuple): Grid shape, one axis per swept parameter.
+            max_theta2 (numpy.ndarray): Largest ``|theta2|`` reached, in degrees, with the angle
+                wrapped into ``[-180, 180]`` (so 180 once the outer arm has flipped).
+            flips (numpy.ndarray): Number of times either arm passed over the top.
+            lyapunov (numpy.ndarray): Largest Lyapunov exponent estimate, in 1/s.
+            energy_drift (numpy.ndarray): Largest relative energy error ``|E - E0| / |E0|``,
+                checked at every renormalization; ``|E - E0|`` in joules where ``E0`` is zero.
+    """
+
+    def __init__(self, axes, max_theta2, flips, lyapunov, energy_drift):
+        self.axes = axes
+        self.shape = tuple(len(values) for values in axes.values())
+        self.max_theta2 = max_theta2.reshape(self.shape)
+        self.flips = flips.reshape(self.shape)
+        self.lyapunov = lyapunov.reshape(self.shape)
+        self.energy_drift = energy_drift.reshape(self.shape)
+
+    def grid(self, name):
+        """Return the value of the swept parameter ``name`` at every grid point."""
+        names = list(self.axes)
+        return np.meshgrid(*self.axes.values(), indexing='ij')[names.index(name)]
+
+
+def _parameter_name(key):
+    name = str(key)
+    if name not in PARAMETER_NAMES:
+        raise ValueError(f"Unknown parameter '{name}'. Choose from {', '.join(PARAMETER_NAMES)}.")
+    return name
+
+
+def parameter_sweep(parameters, ranges, initial_conditions, duration, model='simple', formulation='lagrangian',
+                    step=0.005, renormalization_interval=0.1, chunk_size=4096):
+    """
+    Integrate one trajectory per point of a parameter grid and reduce each to summary statistics.
+
+    The grid points run as vectorized batches of ``chunk_size`` trajectories
+    with every parameter passed to the compiled kernels as an ``(N,)`` array.
+    Each trajectory is advanced by RK4 together with one tangent vector, and
+    its statistics are accumulated step by step, so no trajectory is ever
+    stored and memory stays proportional to the batch.
+
+    Parameters:
+        parameters (dict): Values of the parameters that are not swept, keyed by the
+            symbols of ``math/functions.py`` or their names.
+        ranges (dict): Swept parameter -> array of values; the grid is their outer product.
+        initial_conditions (array_like): ``[theta1, theta2, omega1 / p1, omega2 / p2]`` in degrees,
+            shared by every grid point, or one row per grid point in grid order.
+        duration (float): Seconds integrated.
+        step (float): RK4 step.
+        renormalization_interval (float): Seconds between tangent-vector renormalizations
+            (and energy checks); see ``benettin``.
+
+    Returns a ``ParameterSweep``.
+    """
+    axes = {_parameter_name(key): np.atleast_1d(np.asarray(values, dtype=float)) for key, values in ranges.items()}
+    fixed = {_parameter_name(key): value for key, value in parameters.items()}
+    grid = np.meshgrid(*axes.values(), indexing='ij')
+    swept = {name: values.ravel() for name, values in zip(axes, grid)}
+    count = grid[0].size
+
+    states = np.deg2rad(np.broadcast_to(np.asarray(initial_conditions, dtype=float), (count, 4)))
+    statistics = [np.empty(count) for _ in range(4)]
+    for start in range(0, count, chunk_size):
+        rows = slice(start, min(start + chunk_size, count))
+        chunk = dict(fixed, **{name: values[rows] for name, values in swept.items()})
+        for statistic, values in zip(statistics, _reduce(chunk, states[rows], duration, model, formulation, step,
+                                                         renormalization_interval)):
+            statistic[rows] = values
+    return ParameterSweep(axes, *statistics)
+
+
+def _reduce(parameters, states, duration, model, formulation, step, renormalization_interval):
+    # Step a batch with one tangent vector, folding every step into running statistics
+    system = TangentSystem.for_model(parameters, formulation, model, n_vectors=1)
+    energy = BoundSystem(energy_kernel(formulation, model, vectorized=True), system.params)
+    z = system.initial(states)
+    energy_out = np.empty((len(z), 1))
+    initial_energy = energy(0.0, z[:, :4], energy_out)[:, 0].copy()
+    # As in ``EnergyMonitor``: relative to |E0|, or in joules where E0 is (numerically) zero
+    energy_scale = np.abs(initial_energy)
+    energy_scale[energy_scale < ZERO_ENERGY] = 1.0
+
+    steps = max(1, int(round(renormalization_interval / step)))
+    h = renormalization_interval / steps
+    intervals = max(1, int(round(duration / renormalization_interval)))
+
+    # Full turns of each angle: a flip changes the turn count of an arm by one
+    turns = np.floor((z[:, :2] + np.pi) / (2 * np.pi))
+    max_theta2 = np.abs(z[:, 1] - 2 * np.pi * turns[:, 1])
+    flips = np.zeros(len(z))
+    growth = np.zeros(len(z))
+    drift = np.zeros(len(z))
+    work = RK4Workspace(z.shape)
+    t = 0.0
+    for _ in range(intervals):
+        for _ in range(steps):
+            rk4_step(system, t, z, h, work)
+            t += h
+            current = np.floor((z[:, :2] + np.pi) / (2 * np.pi))
+            flips += np.abs(current - turns).sum(axis=1)
+            turns = current
+            np.maximum(max_theta2, np.abs(z[:, 1] - 2 * np.pi * turns[:, 1]), out=max_theta2)
+        growth += renormalize(system, z)[:, 0]
+        error = np.abs(energy(t, z[:, :4], energy_out)[:, 0] - initial_energy) / energy_scale
+        np.maximum(drift, error, out=drift)
+    return np.rad2deg(max_theta2), flips, growth / (intervals * steps * h), drift
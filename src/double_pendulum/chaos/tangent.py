@@ -0,0 +1,85 @@
+import numpy as np
+
+from ..models.compiled import jacobian_kernel, parameter_values, state_kernel
+
+
+class TangentSystem:
+    """
+    A batch of states carried together with tangent vectors, callable as ``fun(t, z, out)``.
+
+    Every row of ``z`` is ``[y, v_1, ..., v_k]``: the 4-component state
+    followed by ``k`` tangent vectors of 4 components each. The state follows
+    the equations of motion and every tangent vector the variational
+    equations ``dv/dt = J(y) v``, with ``J`` the compiled analytic Jacobian,
+    so one integration pass propagates both the trajectory and its
+    linearized neighbourhood. Like ``BoundSystem``, parameters may be scalars
+    or per-row ``(N,)`` arrays and ``take(rows)`` restricts them to a subset
+    of rows for masked integrators.
+
+    ``scalar_kernels``, the ``(state, jacobian)`` kernels for one ``(4,)``
+    state, are used instead when a single row with scalar parameters is
+    integrated: NumPy's per-call overhead on one-element arrays makes the
+    vectorized kernels about seven times slower there.
+    """
+
+    def __init__(self, state_kernel, jacobian_kernel, params, n_vectors, scalar_kernels=None):
+        self.state_kernel = state_kernel
+        self.jacobian_kernel = jacobian_kernel
+        self.params = tuple(params)
+        self.n_vectors = n_vectors
+        self.scalar_kernels = scalar_kernels
+        self.evaluations = 0
+        self._scalar = scalar_kernels is not None and all(np.ndim(value) == 0 for value in self.params)
+        self._jacobian = np.empty((4, 4))
+
+    @classmethod
+    def for_model(cls, parameters, formulation='lagrangian', model='simple', n_vectors=1):
+        """Bind the kernels generated for ``formulation`` and ``model`` to ``parameters``."""
+        return cls(state_kernel(formulation, model, vectorized=True),
+                   jacobian_kernel(formulation, model, vectorized=True),
+                   parameter_values(parameters, formulation, model), n_vectors,
+                   scalar_kernels=(state_kernel(formulation, model), jacobian_kernel(formulation, model)))
+
+    @property
+    def width(self):
+        """Number of columns of ``z``: the state plus the tangent vectors."""
+        return 4 * (1 + self.n_vectors)
+
+    def initial(self, states, vectors=None):
+        """
+        Return ``z`` for ``(N, 4)`` states with ``vectors`` as ``(k, 4)`` tangent vectors shared by every row.
+
+        The vectors default to the first ``k`` unit vectors of the state space.
+        """
+        states = np.atleast_2d(np.asarray(states, dtype=float))
+        vectors = np.eye(4)[:self.n_vectors] if vectors is None else np.asarray(vectors, dtype=float)
+        z = np.empty((states.shape[0], self.width))
+        z[:, :4] = states
+        z[:, 4:] = vectors.reshape(-1)
+        return z
+
+    def vectors(self, z):
+        """View the tangent vectors of ``z`` as an ``(N, k, 4)`` array."""
+        return z[:, 4:].reshape(z.shape[0], self.n_vectors, 4)
+
+    def __call__(self, t, z, out):
+        self.evaluations += 1
+        if self._scalar and z.shape[0] == 1:
+            return self._single(t, z, out)
+        y = z[:, :4]
+        self.state_kernel(t, y, out[:, :4], self.params)
+        jacobian = self.jacobian_kernel(t, y, np.empty((z.shape[0], 4, 4)), self.params)
+        # Row vectors: (J v)^T = v^T J^T for every tangent vector at once
+        out[:, 4:] = np.matmul(self.vectors(z), jacobian.transpose(0, 2, 1)).reshape(z.shape[0], -1)
+        return out
+
+    def _single(self, t, z, out):
+        state, derivative = z[0], out[0]
+        self.scalar_kernels[0](t, state[:4], derivative[:4], self.params)
+        jacobian = self.scalar_kernels[1](t, state[:4], self._jacobian, self.params)
+        derivative[4:] = (state[4:].reshape(self.n_vectors, 4) @ jacobian.T).reshape(-1)
+        return out
+
+    def take(self, rows):
+        params = tuple(value if np.ndim(value) == 0 else value[rows] for value in self.params)
+        return TangentSystem(self.state_kernel, self.jacobian_kernel, params, self.n_vectors, self.scalar_kernels)
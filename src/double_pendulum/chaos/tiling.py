@@ -0,0 +1,192 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+
+
+def settings_key(settings):
+    """Return a short hash of a JSON-serializable settings dict, naming the file a grid is stored in."""
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def grid_tiles(shape, tile_size):
+    """Split a ``(rows, columns)`` grid into ``(row_start, row_stop, column_start, column_stop)`` tiles."""
+    rows, columns = shape
+    return [(r, min(r + tile_size, rows), c, min(c + tile_size, columns))
+            for r in range(0, rows, tile_size) for c in range(0, columns, tile_size)]
+
+
+def tile_cells(tile):
+    return (tile[1] - tile[0]) * (tile[3] - tile[2])
+
+
+def split_tile(tile):
+    """Halve a tile across its longer side; a single cell is returned unchanged."""
+    r0, r1, c0, c1 = tile
+    if r1 - r0 >= c1 - c0 and r1 - r0 > 1:
+        middle = (r0 + r1) // 2
+        return [(r0, middle, c0, c1), (middle, r1, c0, c1)]
+    if c1 - c0 > 1:
+        middle = (c0 + c1) // 2
+        return [(r0, r1, c0, middle), (r0, r1, middle, c1)]
+    return [tile]
+
+
+def balance_tiles(tiles, cost, workers, granularity=4):
+    """
+    Split the expensive tiles and order all of them most expensive first.
+
+    Any tile whose estimated ``cost(tile)`` exceeds ``1 / (workers *
+    granularity)`` of the total is halved until it does not (or is a single
+    cell), so no tile dominates a worker's share. Running the largest tiles
+    first (longest-processing-time order) leaves the small ones to fill the
+    gaps at the end.
+    """
+    costs = {tile: cost(tile) for tile in tiles}
+    limit = sum(costs.values()) / (max(1, workers) * granularity)
+    pending, balanced = list(costs), []
+    while pending:
+        tile = pending.pop()
+        parts = split_tile(tile) if costs[tile] > limit else [tile]
+        if len(parts) == 1:
+            balanced.append(tile)
+            continue
+        for part in parts:
+            costs[part] = cost(part)
+        pending.extend(parts)
+    return sorted(balanced, key=costs.get, reverse=True)
+
+
+class TiledArray:
+    """
+    A 2D float32 grid in a memory-mapped ``.npy`` file, shared by every process that opens it.
+
+    The file is created full of NaN, the marker of cells not computed yet,
+    and hard-linked into place, so readers never see a partial header and,
+    when several processes create it at once, exactly one file wins and no
+    tile written through it is replaced by a fresh copy. Each tile
+    is written through its own short-lived memory map, so pool processes can
+    fill disjoint tiles concurrently and a reader sees every finished tile.
+    """
+
+    def __init__(self, path, shape):
+        self.path = Path(path)
+        self.shape = tuple(int(n) for n in shape)
+
+    def open(self, mode='r'):
+        """Return the memory-mapped array, creating it first if it does not exist."""
+        if not self.path.exists():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Unique per creator, so threads of one process do not share a temporary file either
+            partial = self.path.with_name(f"{self.path.stem}.{uuid.uuid4().hex}.partial.npy")
+            created = np.lib.format.open_memmap(partial, mode='w+', dtype=np.float32, shape=self.shape)
+            created[:] = np.nan
+            created.flush()
+            del created
+            try:
+                # Unlike a rename, linking fails if another process published its file first
+                os.link(partial, self.path)
+            except FileExistsError:
+                pass
+            finally:
+                partial.unlink()
+        return np.load(self.path, mmap_mode=mode)
+
+    def write(self, tile, values):
+        array = self.open('r+')
+        array[tile[0]:tile[1], tile[2]:tile[3]] = np.reshape(values, (tile[1] - tile[0], tile[3] - tile[2]))
+        array.flush()
+
+    def pending(self, tiles):
+        """Return the ``tiles`` that still contain uncomputed (NaN) cells."""
+        array = self.open()
+        return [tile for tile in tiles if np.isnan(array[tile[0]:tile[1], tile[2]:tile[3]]).any()]
+
+
+def _initialize_worker(kernels):
+    # Load the equations and compile every kernel once per pool process, before its first tile
+    for factory, formulation, model in kernels:
+        factory(formulation, model, vectorized=True)
+
+
+def text_progress(stream=sys.stderr):
+    """Return a ``progress`` callback that redraws one ``35.2% 4.1 s`` status line on ``stream``."""
+    started = time.perf_counter()
+
+    def report(fraction):
+        end = '\n' if fraction >= 1.0 else ''
+        stream.write(f"\r{100 * fraction:5.1f}% {time.perf_counter() - started:.1f} s{end}")
+        stream.flush()
+    return report
+
+
+class TileScheduler:
+    """
+    Runs ``task(tile)`` for every tile of a grid computation on a process pool.
+
+    Pool processes are spawned (the web server and Dash run threads) and
+    each builds the vectorized kernels listed in ``kernels``, as
+    ``(factory, formulation, model)`` with ``factory`` e.g. ``state_kernel``,
+    in its initializer, so no tile pays for loading equations or compiling. Tiles are handed out from a queue as workers free up, with
+    at most ``workers * prefetch`` in flight, so a worker stuck on a costly
+    tile does not hold back the others; with a ``cost`` estimate the tiles
+    are also rebalanced by ``balance_tiles``. Tasks write their results
+    themselves, typically into a ``TiledArray``; ``workers=1`` runs them in
+    this process.
+    """
+
+    def __init__(self, workers=None, kernels=(), prefetch=2):
+        self.workers = workers or os.cpu_count() or 1
+        self.kernels = tuple(kernels)
+        self.prefetch = prefetch
+
+    def run(self, task, tiles, cost=None, progress=None):
+        """
+        Run ``task`` over ``tiles`` and return once all have finished.
+
+        ``progress(fraction)`` is called after every tile with the share of
+        cells (not tiles) done. An exception raised by a task is re-raised
+        here after the queued tiles are cancelled.
+        """
+        tiles = balance_tiles(tiles, cost, self.workers) if cost is not None else list(tiles)
+        total_cells = sum(map(tile_cells, tiles)) or 1
+        done_cells = 0
+
+        if self.workers <= 1:
+            for tile in tiles:
+                task(tile)
+                done_cells += tile_cells(tile)
+                if progress is not None:
+                    progress(done_cells / total_cells)
+            return
+
+        queue = iter(tiles)
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_initialize_worker, initargs=(self.kernels,)) as pool:
+            running = {}
+            for tile in queue:
+                running[pool.submit(task, tile)] = tile
+                if len(running) >= self.workers * self.prefetch:
+                    break
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    tile = running.pop(future)
+                    try:
+                        future.result()
+                    except BaseException:
+                        pool.shutdown(cancel_futures=True)
+                        raise
+                    done_cells += tile_cells(tile)
+                    if progress is not None:
+                        progress(done_cells / total_cells)
+                    following = next(queue, None)
+                    if following is not None:
+                        running[pool.submit(task, following)] = following
@@ -0,0 +1,25 @@
+from .stages import (
+    BUCKETS,
+    INSTRUMENTATION_ENV,
+    StageHistogram,
+    configure,
+    current_stage,
+    enabled,
+    histograms,
+    reset,
+    solve_ivp_counts,
+    stage,
+)
+
+__all__ = [
+    "BUCKETS",
+    "INSTRUMENTATION_ENV",
+    "StageHistogram",
+    "configure",
+    "current_stage",
+    "enabled",
+    "histograms",
+    "reset",
+    "solve_ivp_counts",
+    "stage",
+]
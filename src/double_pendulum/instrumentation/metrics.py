@@ -0,0 +1,220 @@
+import json
+import math
+import os
+import threading
+import uuid
+from bisect import bisect_left
+
+from ..cache.files import atomic_write_bytes, cache_directory
+from .stages import BUCKETS
+
+
+METRICS_ENV = "DOUBLE_PENDULUM_METRICS"
+
+# Upper bounds (bytes) of the response-size histogram buckets
+BYTE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, float('inf'))
+
+# Every recorded metric: name -> (Prometheus type, help text, histogram buckets)
+METRICS = {
+    'double_pendulum_simulation_requests_total': (
+        'counter', 'Simulation requests by formulation, model and how they were served.', None),
+    'double_pendulum_integration_seconds': (
+        'histogram', 'Wall time spent integrating the equations of motion.', BUCKETS),
+    'double_pendulum_rhs_evaluations_total': (
+        'counter', 'Right-hand-side evaluations made while integrating.', None),
+    'double_pendulum_cache_requests_total': (
+        'counter', 'Equation and result cache lookups by outcome.', None),
+    'double_pendulum_response_bytes': (
+        'histogram', 'Size of HTTP response bodies by route.', BYTE_BUCKETS),
+}
+
+_enabled = os.environ.get(METRICS_ENV, "0").lower() in {"1", "true", "yes", "on"}
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+# The registry belongs to one process; a forked child starts its own under a new file name
+_process = {'pid': None, 'name': None, 'dirty': False}
+
+
+def enabled():
+    """Return True when metrics are being recorded."""
+    return _enabled
+
+
+def configure(enabled):
+    """Switch metric recording on or off for this process (``DOUBLE_PENDULUM_METRICS`` sets the default)."""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def reset():
+    """Forget the metrics recorded by this process."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _process['dirty'] = True
+
+
+def _own():
+    # Called under the lock: drop the counts a forked child inherited from its parent
+    if _process['pid'] != os.getpid():
+        _counters.clear()
+        _histograms.clear()
+        _process.update(pid=os.getpid(), name=f"{os.getpid()}-{uuid.uuid4().hex[:8]}", dirty=False)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def increment(name, amount=1, **labels):
+    """Add ``amount`` to the counter ``name`` with the given labels."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _own()
+        _counters[key] = _counters.get(key, 0) + amount
+        _process['dirty'] = True
+
+
+def observe(name, value, **labels):
+    """Record ``value`` in the histogram ``name`` with the given labels."""
+    if not _enabled:
+        return
+    buckets = METRICS[name][2]
+    key = _key(name, labels)
+    with _lock:
+        _own()
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'counts': [0] * len(buckets), 'sum': 0.0}
+        histogram['counts'][bisect_left(buckets, value)] += 1
+        histogram['sum'] += value
+        _process['dirty'] = True
+
+
+def flush():
+    """
+    Write this process's metrics to the shared ``metrics`` cache directory if they changed.
+
+    Web workers flush after each request and job processes after each job,
+    so ``collect`` in any process sees the totals of all of them.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _own()
+        if not _process['dirty']:
+            return
+        snapshot = {
+            'counters': [[name, dict(labels), value] for (name, labels), value in _counters.items()],
+            'histograms': [[name, dict(labels), histogram['counts'], histogram['sum']]
+                           for (name, labels), histogram in _histograms.items()],
+        }
+        _process['dirty'] = False
+        file_name = _process['name']
+    try:
+        atomic_write_bytes(cache_directory("metrics") / f"{file_name}.json", json.dumps(snapshot).encode())
+    except OSError:
+        # Metrics must never fail a request
+        pass
+
+
+def collect():
+    """
+    Return ``(counters, histograms)`` summed over every process that has flushed metrics.
+
+    Both are keyed by ``(name, labels)`` with ``labels`` a sorted tuple of
+    pairs; histograms map to ``{'counts': [...], 'sum': ...}`` with per-bucket
+    (not cumulative) counts.
+    """
+    flush()
+    counters, histograms = {}, {}
+    for path in cache_directory("metrics").glob("*.json"):
+        try:
+            snapshot = json.loads(path.read_bytes())
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in snapshot['counters']:
+            key = _key(name, labels)
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, counts, total in snapshot['histograms']:
+            if name not in METRICS or len(counts) != len(METRICS[name][2]):
+                continue  # Written with other buckets by older code
+            histogram = histograms.setdefault(_key(name, labels), {'counts': [0] * len(counts), 'sum': 0.0})
+            histogram['counts'] = [a + b for a, b in zip(histogram['counts'], counts)]
+            histogram['sum'] += total
+    return counters, histograms
+
+
+def _labels_text(labels):
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def _value_text(value):
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _derived_gauges(counters, histograms):
+    # Ratios a dashboard would otherwise compute, for reading the endpoint by eye during a load test
+    rates = {}
+    for (name, labels), histogram in histograms.items():
+        if name == 'double_pendulum_integration_seconds' and histogram['sum'] > 0:
+            evaluations = counters.get(('double_pendulum_rhs_evaluations_total', labels), 0)
+            rates[labels] = evaluations / histogram['sum']
+
+    lookups = {}
+    for (name, labels), value in counters.items():
+        if name == 'double_pendulum_cache_requests_total':
+            labels = dict(labels)
+            hits, total = lookups.get(labels.get('cache'), (0, 0))
+            lookups[labels.get('cache')] = (hits + (value if labels.get('result') == 'hit' else 0), total + value)
+    ratios = {(('cache', cache),): hits / total for cache, (hits, total) in lookups.items() if total}
+
+    return [
+        ('double_pendulum_rhs_evaluations_per_second',
+         'Right-hand-side evaluations per second of integration wall time.', rates),
+        ('double_pendulum_cache_hit_ratio', 'Fraction of cache lookups that were hits.', ratios),
+    ]
+
+
+def exposition(gauges=()):
+    """
+    Return every process's metrics in the Prometheus text exposition format.
+
+    ``gauges`` adds point-in-time values measured by the caller, as
+    ``(name, help, {labels: value})`` with ``labels`` a tuple of pairs.
+    """
+    counters, histograms = collect()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels_text(labels)} {_value_text(value)}')
+            continue
+        for (metric, labels), histogram in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, histogram['counts']):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels_text(labels + (("le", _value_text(float(bound))),))} '
+                             f'{cumulative}')
+            lines.append(f'{name}_sum{_labels_text(labels)} {_value_text(histogram["sum"])}')
+            lines.append(f'{name}_count{_labels_text(labels)} {cumulative}')
+
+    for name, help_text, values in _derived_gauges(counters, histograms) + list(gauges):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+        for labels, value in sorted(values.items()):
+            lines.append(f'{name}{_labels_text(labels)} {_value_text(value)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,128 @@
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from ..cache.files import atomic_write_bytes, cache_directory
+
+
+PROFILING_ENV = "DOUBLE_PENDULUM_PROFILING"
+PROFILE_DIR_ENV = "DOUBLE_PENDULUM_PROFILE_DIR"
+# Seconds between stack samples; the interpreter's switch interval (5 ms) bounds it while Python code runs
+SAMPLE_INTERVAL = 0.001
+
+logger = logging.getLogger("double_pendulum.profiling")
+
+_active = threading.local()
+
+
+def profiling_enabled():
+    """Return True when ``DOUBLE_PENDULUM_PROFILING`` allows requests to be profiled."""
+    return os.environ.get(PROFILING_ENV, "0").lower() in {"1", "true", "yes", "on"}
+
+
+def profile_directory():
+    """Return (and create) ``DOUBLE_PENDULUM_PROFILE_DIR``, or ``profiles/`` in the shared cache by default."""
+    directory = os.environ.get(PROFILE_DIR_ENV)
+    if not directory:
+        return cache_directory("profiles")
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def profiling_active():
+    """Return True while the current thread is inside a ``Profiler`` block."""
+    return getattr(_active, 'depth', 0) > 0
+
+
+def _frame_label(code):
+    # ';' separates frames in the collapsed format, so it must not appear inside one
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ',')
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack every ``interval`` seconds from a background thread.
+
+    Stacks are counted from ``root`` (the frame that started sampling)
+    inwards, so ``collapsed()`` gives one ``frame;frame;... count`` line per
+    distinct stack: the input format of flamegraph.pl, speedscope and
+    inferno.
+    """
+
+    def __init__(self, thread_id, root=None, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="double-pendulum-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                if frame is self.root:
+                    break
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+class Profiler:
+    """
+    Profiles the enclosed block with cProfile and a ``StackSampler`` and writes both to disk.
+
+    On exit, including on an exception, ``<timestamp>-<label>-<pid>.prof``
+    (``pstats``/snakeviz input) and ``<same>.collapsed`` (flame graph input)
+    are written to ``directory`` (default ``profile_directory()``); ``paths``
+    holds them afterwards. ``profiling_active()`` is True inside the block,
+    so callers can keep work in-process that would otherwise run elsewhere.
+    """
+
+    def __init__(self, label, directory=None, interval=SAMPLE_INTERVAL):
+        self.label = label
+        self.directory = directory
+        self.interval = interval
+        self.paths = ()
+
+    def __enter__(self):
+        _active.depth = getattr(_active, 'depth', 0) + 1
+        self._sampler = StackSampler(threading.get_ident(), root=sys._getframe(1), interval=self.interval)
+        self._profile = cProfile.Profile()
+        self._started = time.time()
+        self._sampler.start()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._profile.disable()
+        self._sampler.stop()
+        _active.depth -= 1
+        directory = Path(self.directory) if self.directory is not None else profile_directory()
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.localtime(self._started)) + f"{int(self._started % 1 * 1000):03d}"
+        name = f"{stamp}-{self.label}-{os.getpid()}"
+        profile_path, collapsed_path = directory / f"{name}.prof", directory / f"{name}.collapsed"
+        self._profile.dump_stats(profile_path)
+        atomic_write_bytes(collapsed_path, self._sampler.collapsed().encode())
+        self.paths = (profile_path, collapsed_path)
+        logger.info("Profiled %s in %.3f s: %s, %s", self.label, time.time() - self._started, *self.paths)
+        return False
+
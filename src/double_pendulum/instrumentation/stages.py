@@ -0,0 +1,196 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+
+INSTRUMENTATION_ENV = "DOUBLE_PENDULUM_INSTRUMENTATION"
+
+# Upper bounds (seconds) of the wall-time histogram buckets; the last one catches everything
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float('inf'))
+
+# solve_ivp methods whose function evaluations map exactly onto step attempts: two evaluations
+# start the run (initial derivative and step-size selection), then each attempt costs n_stages
+_EXPLICIT_RUNGE_KUTTA = {'RK23': 3, 'RK45': 6}
+
+logger = logging.getLogger("double_pendulum.stages")
+
+_enabled = os.environ.get(INSTRUMENTATION_ENV, "0").lower() in {"1", "true", "yes", "on"}
+_current = ContextVar("double_pendulum_stage", default=None)
+_histograms = {}
+_lock = threading.Lock()
+
+
+def enabled():
+    """Return True when stage timing is switched on."""
+    return _enabled
+
+
+def configure(enabled):
+    """Switch stage timing on or off for this process (``DOUBLE_PENDULUM_INSTRUMENTATION`` sets the default)."""
+    global _enabled
+    _enabled = bool(enabled)
+    if _enabled:
+        _ensure_handler()
+
+
+def _ensure_handler():
+    # Stage records are INFO; give them somewhere to go when the host app configured no logging
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+    if logger.getEffectiveLevel() > logging.INFO:
+        logger.setLevel(logging.INFO)
+
+
+class StageHistogram:
+    """Wall-time distribution of one stage in ``BUCKETS``, with wall and CPU totals."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.wall_sum = 0.0
+        self.cpu_sum = 0.0
+
+    def observe(self, wall, cpu):
+        self.counts[bisect_left(self.buckets, wall)] += 1
+        self.count += 1
+        self.wall_sum += wall
+        self.cpu_sum += cpu
+
+    def snapshot(self):
+        """Return ``{'buckets': [(upper bound, cumulative count), ...], 'count', 'wall_sum', 'cpu_sum'}``."""
+        cumulative, total = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return {'buckets': cumulative, 'count': self.count, 'wall_sum': self.wall_sum, 'cpu_sum': self.cpu_sum}
+
+
+class Stage:
+    """
+    Times one stage of the pipeline; use through ``stage()``.
+
+    On exit the wall and CPU (thread) time go into the stage's histogram and
+    one JSON record is logged to ``double_pendulum.stages`` with the stage
+    name, its enclosing stage, the timings and any ``fields``/``add`` counts.
+    """
+
+    __slots__ = ('name', 'fields', 'parent', '_token', '_wall', '_cpu')
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def add(self, **counts):
+        """Accumulate counts (e.g. RHS evaluations over several integration windows) into the record."""
+        for key, value in counts.items():
+            self.fields[key] = self.fields.get(key, 0) + value
+
+    def __enter__(self):
+        self.parent = _current.get()
+        self._token = _current.set(self)
+        self._cpu = time.thread_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        _current.reset(self._token)
+        with _lock:
+            histogram = _histograms.get(self.name)
+            if histogram is None:
+                histogram = _histograms[self.name] = StageHistogram()
+            histogram.observe(wall, cpu)
+
+        record = {
+            'stage': self.name,
+            'parent': None if self.parent is None else self.parent.name,
+            'wall_ms': round(wall * 1e3, 3),
+            'cpu_ms': round(cpu * 1e3, 3),
+            **{key: value for key, value in self.fields.items() if value is not None},
+        }
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        logger.info(json.dumps(record, default=str))
+        return False
+
+
+class _DisabledStage:
+    # Shared stand-in returned while timing is off: entering, exiting and counting do nothing
+
+    __slots__ = ()
+
+    def add(self, **counts):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_DISABLED = _DisabledStage()
+
+
+def stage(name, **fields):
+    """
+    Return a context manager timing the stage ``name``; ``fields`` are added to its log record.
+
+    While timing is off this returns one shared do-nothing object, so an
+    instrumented call site costs a global lookup and a function call.
+    """
+    if not _enabled:
+        return _DISABLED
+    return Stage(name, fields)
+
+
+def current_stage():
+    """Return the innermost running stage, or a do-nothing stand-in, for adding counts from deeper code."""
+    if not _enabled:
+        return _DISABLED
+    return _current.get() or _DISABLED
+
+
+def histograms():
+    """Return a snapshot of every stage's histogram, keyed by stage name."""
+    with _lock:
+        return {name: histogram.snapshot() for name, histogram in _histograms.items()}
+
+
+def reset():
+    """Forget all recorded timings."""
+    with _lock:
+        _histograms.clear()
+
+
+def solve_ivp_counts(result, method='RK45'):
+    """
+    Return the work counts of a ``solve_ivp`` result for a stage record.
+
+    ``nfev``, ``njev`` and ``nlu`` are scipy's own; ``accepted_steps`` is read
+    from the solution times, which hold every step when ``t_eval`` is not
+    given. ``rejected_steps`` is derived from ``nfev`` for RK23 and RK45,
+    where every step attempt costs a fixed number of evaluations.
+    """
+    counts = {
+        'nfev': int(result.nfev),
+        'njev': int(result.njev),
+        'nlu': int(result.nlu),
+        'accepted_steps': len(result.t) - 1,
+    }
+    stages = _EXPLICIT_RUNGE_KUTTA.get(method if isinstance(method, str) else getattr(method, '__name__', None))
+    if stages is not None:
+        counts['rejected_steps'] = max((counts['nfev'] - 2) // stages - counts['accepted_steps'], 0)
+    return counts
+
+
+if _enabled:
+    _ensure_handler()
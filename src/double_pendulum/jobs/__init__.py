@@ -0,0 +1,27 @@
+from .manager import (
+    CANCELLED,
+    DONE,
+    FAILED,
+    QUEUED,
+    RUNNING,
+    JobCancelled,
+    JobManager,
+    JobReporter,
+    JobStore,
+    grid_jobs,
+    simulation_jobs,
+)
+
+__all__ = [
+    "CANCELLED",
+    "DONE",
+    "FAILED",
+    "JobCancelled",
+    "JobManager",
+    "JobReporter",
+    "JobStore",
+    "QUEUED",
+    "RUNNING",
+    "grid_jobs",
+    "simulation_jobs",
+]
@@ -0,0 +1,373 @@
+import json
+import multiprocessing
+import os
+import pickle
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from ..cache.files import atomic_write_bytes, cache_directory
+from ..instrumentation import metrics
+
+
+JOB_WORKERS_ENV = "DOUBLE_PENDULUM_JOB_WORKERS"
+GRID_JOB_WORKERS_ENV = "DOUBLE_PENDULUM_GRID_JOB_WORKERS"
+BACKGROUND_JOBS_ENV = "DOUBLE_PENDULUM_BACKGROUND_JOBS"
+
+# A running job whose state has not changed for this long is assumed lost (e.g. its worker restarted)
+JOB_STALE_SECONDS = 300
+# Job files older than this are removed when new jobs are submitted
+JOB_RETENTION_SECONDS = 3600
+# A subscriber that has not polled its job for this long is assumed gone (e.g. its page was closed)
+SUBSCRIBER_STALE_SECONDS = 60
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation has been requested."""
+
+
+class JobStore:
+    """
+    File-based job state shared by every process using the same ``directory``.
+
+    Each job has ``<id>.json`` (status, progress, error, last update and
+    the token of its current run), ``<id>.result`` (the pickled result once
+    done), ``<id>.chunk<n>`` for every partial result it has published, an
+    empty ``<id>.watch-<token>`` per subscriber following the job (touched
+    on every poll) and, when cancellation of a run has been requested, an
+    empty ``<id>.cancel-<run>`` marker. All writes are atomic, so any
+    gunicorn worker can poll a job started by another one.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, job_id, suffix):
+        return self.directory / f"{job_id}.{suffix}"
+
+    def state(self, job_id):
+        """Return the job's state dict, or ``None`` for an unknown job."""
+        try:
+            return json.loads(self._path(job_id, 'json').read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    def update(self, job_id, status, progress=0.0, error=None, run=None):
+        state = {'status': status, 'progress': progress, 'error': error, 'updated': time.time(), 'run': run}
+        atomic_write_bytes(self._path(job_id, 'json'), json.dumps(state).encode())
+        return state
+
+    def current_run(self, job_id):
+        state = self.state(job_id)
+        return None if state is None else state.get('run')
+
+    def request_cancel(self, job_id, run=None):
+        self._path(job_id, f'cancel-{run}').touch()
+
+    def cancel_requested(self, job_id, run=None):
+        return self._path(job_id, f'cancel-{run}').exists()
+
+    def remove(self, job_id, *suffixes):
+        for suffix in suffixes:
+            try:
+                self._path(job_id, suffix).unlink()
+            except FileNotFoundError:
+                pass
+
+    def watch(self, job_id, subscriber):
+        """Record that ``subscriber`` is following the job, or refresh its last poll time."""
+        self._path(job_id, f'watch-{subscriber}').touch()
+
+    def unwatch(self, job_id, subscriber):
+        self.remove(job_id, f'watch-{subscriber}')
+
+    def watchers(self, job_id):
+        """Return how many subscribers have polled the job within ``SUBSCRIBER_STALE_SECONDS``."""
+        cutoff = time.time() - SUBSCRIBER_STALE_SECONDS
+        count = 0
+        for path in self.directory.glob(f"{job_id}.watch-*"):
+            try:
+                count += path.stat().st_mtime >= cutoff
+            except FileNotFoundError:
+                pass
+        return count
+
+    def write_result(self, job_id, result):
+        atomic_write_bytes(self._path(job_id, 'result'), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def has_result(self, job_id):
+        return self._path(job_id, 'result').exists()
+
+    def read_result(self, job_id):
+        return pickle.loads(self._path(job_id, 'result').read_bytes())
+
+    def write_chunk(self, job_id, index, chunk):
+        atomic_write_bytes(self._path(job_id, f'chunk{index}'), pickle.dumps(chunk, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def read_chunks(self, job_id, start=0):
+        """Return the chunks published from index ``start`` on, in order."""
+        chunks = []
+        while True:
+            try:
+                data = self._path(job_id, f'chunk{start + len(chunks)}').read_bytes()
+            except FileNotFoundError:
+                return chunks
+            chunks.append(pickle.loads(data))
+
+    def active(self):
+        """Return ``{status: count}`` for the queued and running jobs that are not stale."""
+        counts = dict.fromkeys(ACTIVE_STATES, 0)
+        cutoff = time.time() - JOB_STALE_SECONDS
+        for path in self.directory.glob("*.json"):
+            state = self.state(path.stem)
+            if state is not None and state['status'] in ACTIVE_STATES and state['updated'] >= cutoff:
+                counts[state['status']] += 1
+        return counts
+
+    def prune(self, max_age=JOB_RETENTION_SECONDS):
+        """Remove the files of jobs that have not been touched for ``max_age`` seconds and have no subscribers."""
+        cutoff = time.time() - max_age
+        watched = {}
+        for path in self.directory.iterdir():
+            job_id = path.name.partition('.')[0]
+            try:
+                if path.stat().st_mtime < cutoff:
+                    if job_id not in watched:
+                        watched[job_id] = self.watchers(job_id) > 0
+                    if not watched[job_id]:
+                        path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class JobReporter:
+    """
+    The ``progress`` callable handed to a job: records the fraction done and checks for cancellation.
+
+    Calling it with a fraction in ``[0, 1]`` updates the shared state; if a
+    cancellation has been requested it raises ``JobCancelled`` instead, which
+    unwinds the job (an integration aborts from inside its right-hand side).
+    ``publish(chunk)`` makes a partial result available to pollers through
+    ``JobManager.chunks`` before the job has finished. A run that has been
+    replaced by a newer one (``run`` is no longer the job's current run)
+    stops the same way, so it never writes over its successor.
+    """
+
+    def __init__(self, store, job_id, run=None):
+        self.store = store
+        self.job_id = job_id
+        self.run = run
+        self.published = 0
+
+    def _check(self):
+        if self.store.cancel_requested(self.job_id, self.run) or self.store.current_run(self.job_id) != self.run:
+            raise JobCancelled(self.job_id)
+
+    def __call__(self, fraction):
+        self._check()
+        self.store.update(self.job_id, RUNNING, progress=float(fraction), run=self.run)
+
+    def publish(self, chunk):
+        self._check()
+        self.store.write_chunk(self.job_id, self.published, chunk)
+        self.published += 1
+
+
+def _run_job(directory, job_id, run, function, args, kwargs):
+    # Executed in a pool process; every outcome of this run is recorded in the shared store,
+    # unless the job has been restarted meanwhile and the state belongs to a newer run
+    store = JobStore(directory)
+
+    def record(status, **details):
+        if store.current_run(job_id) == run:
+            store.update(job_id, status, run=run, **details)
+
+    if store.cancel_requested(job_id, run):
+        record(CANCELLED)
+        return
+    record(RUNNING)
+    try:
+        result = function(*args, progress=JobReporter(store, job_id, run), **kwargs)
+    except JobCancelled:
+        record(CANCELLED)
+        return
+    except Exception as exc:
+        record(FAILED, error=f"{type(exc).__name__}: {exc}")
+        return
+    finally:
+        # Share what the job recorded with the web workers serving the metrics endpoint
+        metrics.flush()
+    if store.current_run(job_id) == run:
+        store.write_result(job_id, result)
+        record(DONE, progress=1.0)
+
+
+class JobManager:
+    """
+    Runs long computations on a local process pool so the web worker stays free.
+
+    ``submit(job_id, function, *args)`` calls ``function(*args, progress=...)``
+    in a pool process, where ``progress(fraction)`` reports how far the job
+    has got and raises ``JobCancelled`` once ``cancel(job_id)`` has been
+    called; ``progress.publish(chunk)`` streams partial results. Job ids are
+    caller-chosen (e.g. the simulation cache key) and name deterministic work,
+    so identical requests from any session share one job and its published
+    chunks. Each session following a job holds a token from ``subscribe``
+    and passes it to ``status`` and ``cancel``: a job is only cancelled once
+    no other live subscriber is following it. State lives in a ``JobStore``;
+    the pool uses the ``spawn`` start method because web servers run threads,
+    and runs ``initializer`` (if given) once in each of its processes.
+    """
+
+    def __init__(self, directory, max_workers=None, initializer=None):
+        self.store = JobStore(directory)
+        self.max_workers = max_workers or max(1, min(2, os.cpu_count() or 1))
+        self.initializer = initializer
+        self._executor = None
+        self._futures = {}
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=self.initializer)
+        return self._executor
+
+    def subscribe(self, job_id):
+        """Return a new subscriber token for a session that follows ``job_id``."""
+        subscriber = uuid.uuid4().hex
+        self.store.watch(job_id, subscriber)
+        return subscriber
+
+    def submit(self, job_id, function, *args, **kwargs):
+        """
+        Start ``job_id`` unless an identical job is queued, running or done; return its state.
+
+        A job that failed, was cancelled or went stale is restarted as a new
+        run with its own token. A cancelled run may still be going until its
+        next progress report; it keeps its cancel marker and, no longer being
+        the current run, stops without writing over the new one. Published
+        chunks are kept for the sessions still polling them: the new run
+        writes the same chunks again.
+        """
+        state = self.store.state(job_id)
+        if (state is not None and state['status'] in ACTIVE_STATES
+                and time.time() - state['updated'] < JOB_STALE_SECONDS
+                and not self.store.cancel_requested(job_id, state.get('run'))):
+            return state
+        if state is not None and state['status'] == DONE and self.store.has_result(job_id):
+            return state
+        self.store.prune()
+        run = uuid.uuid4().hex
+        state = self.store.update(job_id, QUEUED, run=run)
+        self._futures[job_id] = run, self.executor.submit(_run_job, self.store.directory, job_id, run, function,
+                                                          args, kwargs)
+        return state
+
+    def forget(self, job_id):
+        """Drop a finished job's state and result, so the next ``submit`` runs it again."""
+        self.store.remove(job_id, 'json', 'result')
+
+    def status(self, job_id, subscriber=None):
+        """
+        Return ``{'status', 'progress', 'error', 'updated'}`` or ``None`` for an unknown job.
+
+        A ``subscriber`` token is kept alive by every call and released once
+        the job has finished, failed or been cancelled.
+        """
+        state = self.store.state(job_id)
+        run, future = self._futures.get(job_id, (None, None))
+        if future is not None and future.done():
+            self._futures.pop(job_id, None)
+            # A crashed pool process never records its own failure; a future cancelled while queued has no exception
+            error = None if future.cancelled() else future.exception()
+            if (error is not None and state is not None and state['status'] in ACTIVE_STATES
+                    and state.get('run') == run):
+                state = self.store.update(job_id, FAILED, error=str(error), run=run)
+        if subscriber is not None:
+            if state is None or state['status'] in ACTIVE_STATES:
+                self.store.watch(job_id, subscriber)
+            else:
+                self.store.unwatch(job_id, subscriber)
+        return state
+
+    def result(self, job_id):
+        """Return the result of a finished job."""
+        return self.store.read_result(job_id)
+
+    def chunks(self, job_id, start=0):
+        """Return the partial results the job has published from index ``start`` on."""
+        return self.store.read_chunks(job_id, start)
+
+    def active(self):
+        """Return ``{status: count}`` for the queued and running jobs of every process."""
+        return self.store.active()
+
+    def cancel(self, job_id, subscriber=None):
+        """
+        Request cancellation; a queued job never starts and a running one stops at its next report.
+
+        With a ``subscriber`` token only that session stops following the job,
+        which is cancelled only if no other live subscriber remains.
+        """
+        if subscriber is not None:
+            self.store.unwatch(job_id, subscriber)
+            if self.store.watchers(job_id):
+                return
+        run = self.store.current_run(job_id)
+        self.store.request_cancel(job_id, run)
+        _, future = self._futures.pop(job_id, (None, None))
+        if future is not None and future.cancel():
+            self.store.update(job_id, CANCELLED, run=run)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+def _warm_up_worker():
+    # Spawned pool processes inherit nothing from a preloaded master, so each loads the kernels once
+    from ..models.compiled import warm_up
+
+    warm_up()
+
+
+def _background_jobs_enabled():
+    return os.environ.get(BACKGROUND_JOBS_ENV, "1").lower() not in {"0", "false", "no", "off"}
+
+
+@lru_cache(maxsize=None)
+def simulation_jobs():
+    """
+    Return the process-wide job manager for simulations, or ``None`` when disabled.
+
+    Job state is kept in ``cache_directory("jobs")`` so every worker can poll
+    any job; ``DOUBLE_PENDULUM_JOB_WORKERS`` sets the pool size per worker and
+    ``DOUBLE_PENDULUM_BACKGROUND_JOBS=0`` runs simulations inside the request.
+    """
+    if not _background_jobs_enabled():
+        return None
+    max_workers = int(os.environ.get(JOB_WORKERS_ENV, 0)) or None
+    return JobManager(cache_directory("jobs"), max_workers=max_workers, initializer=_warm_up_worker)
+
+
+@lru_cache(maxsize=None)
+def grid_jobs():
+    """
+    Return the process-wide job manager for chaos-page grids, or ``None`` when background jobs are disabled.
+
+    Grids take minutes, so they get their own pool (one process per worker
+    unless ``DOUBLE_PENDULUM_GRID_JOB_WORKERS`` says otherwise) and their
+    own ``cache_directory("grid-jobs")``: they queue behind each other
+    instead of holding the slots user simulations run in.
+    """
+    if not _background_jobs_enabled():
+        return None
+    max_workers = int(os.environ.get(GRID_JOB_WORKERS_ENV, 0)) or 1
+    return JobManager(cache_directory("grid-jobs"), max_workers=max_workers, initializer=_warm_up_worker)
@@ -396,6 +396,25 @@ def first_order_system(RHS_1, RHS_2):
     return MAT_EQ, eqn1, eqn2, eqn3, eqn4
 
 
+def first_order_jacobian(rhs, state):
+    """
+    Compute the Jacobian matrix of a first-order system y' = f(y).
+
+    Parameters:
+    rhs : sequence of sympy.Expr
+        The right-hand sides f_i of the first-order system, in state order.
+    state : sequence of sympy.Function
+        The state variables y_j, e.g. (theta1, theta2, omega1, omega2) or
+        (theta1, theta2, p_theta_1, p_theta_2).
+
+    Returns:
+    sympy.Matrix
+        The len(rhs) x len(state) matrix with entries df_i/dy_j. No simplification
+        is applied; the compiled kernels eliminate common subexpressions instead.
+    """
+    return sp.Matrix(list(rhs)).jacobian(sp.Matrix(list(state)))
+
+
 # -------------------------------------------
 # Hamiltonian functions
 
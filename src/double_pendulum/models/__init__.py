@@ -1,7 +1,9 @@
+from .ensemble import DoublePendulumEnsemble
 from .hamiltonian import DoublePendulumHamiltonian, hamiltonian_first_order_system
 from .lagrangian import DoublePendulumLagrangian, add_equations
 
 __all__ = [
+    "DoublePendulumEnsemble",
     "DoublePendulumHamiltonian",
     "DoublePendulumLagrangian",
     "add_equations",
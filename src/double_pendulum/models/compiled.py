@@ -0,0 +1,214 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+import sympy as sp
+from scipy.integrate import BDF, LSODA, Radau
+from sympy.printing.numpy import NumPyPrinter
+from sympy.printing.pycode import PythonCodePrinter
+
+from ..math.functions import M1, M2, g, l1, l2, m1, m2, p_theta_1, p_theta_2, t, theta1, theta2
+
+
+# Order of the runtime parameter arguments of every compiled function
+PARAMETER_SYMBOLS = (l1, l2, m1, m2, M1, M2, g)
+
+# solve_ivp methods that accept an analytic Jacobian through ``jac``
+IMPLICIT_METHODS = ('Radau', 'BDF', 'LSODA')
+
+# State variables of each formulation, in solver order
+STATE_FUNCTIONS = {
+    'lagrangian': (theta1, theta2, sp.Function('omega1')(t), sp.Function('omega2')(t)),
+    'hamiltonian': (theta1, theta2, p_theta_1, p_theta_2),
+}
+
+# Plain names the state variables take inside generated kernels
+STATE_NAMES = {
+    'lagrangian': ('th1', 'th2', 'w1', 'w2'),
+    'hamiltonian': ('th1', 'th2', 'p1', 'p2'),
+}
+
+
+def _model_class(formulation):
+    if formulation == 'lagrangian':
+        from .lagrangian import DoublePendulumLagrangian
+        return DoublePendulumLagrangian
+    if formulation == 'hamiltonian':
+        from .hamiltonian import DoublePendulumHamiltonian
+        return DoublePendulumHamiltonian
+    raise ValueError("Invalid formulation. Please choose 'lagrangian' or 'hamiltonian'.")
+
+
+def uses_jacobian(method):
+    """Return True when the solve_ivp ``method`` (name or solver class) takes a ``jac`` argument."""
+    if isinstance(method, str):
+        return method in IMPLICIT_METHODS
+    return isinstance(method, type) and issubclass(method, (Radau, BDF, LSODA))
+
+
+def system_equations(formulation, model):
+    """
+    Return the cached symbolic first-order system ``(MAT_EQ, eqn1, eqn2, eqn3, eqn4)``.
+
+    The lookup goes through the model classes so the in-process and on-disk
+    equation caches are shared with them.
+    """
+    return _model_class(formulation)._compute_and_cache_equations(model)
+
+
+def system_jacobian(formulation, model):
+    """Return the cached symbolic 4x4 Jacobian of the first-order system."""
+    return _model_class(formulation)._compute_and_cache_jacobian(model)
+
+
+def system_energy(formulation, model):
+    """Return the cached symbolic total energy: ``T + V`` (Lagrangian) or ``H`` (Hamiltonian)."""
+    return _model_class(formulation)._compute_and_cache_energy(model)
+
+
+@lru_cache(maxsize=None)
+def required_parameters(formulation, model):
+    """Return the parameter symbols that actually appear in the equations of motion."""
+    _, *rhs = system_equations(formulation, model)
+    free = set().union(*(sp.sympify(expr).free_symbols for expr in rhs))
+    return tuple(symbol for symbol in PARAMETER_SYMBOLS if symbol in free)
+
+
+def parameter_values(parameters, formulation, model):
+    """
+    Convert a parameter mapping into the positional tuple expected by compiled functions.
+
+    Keys may be the SymPy symbols from ``math/functions.py`` or their names.
+    Parameters not used by the model (e.g. ``M1`` for the simple model) default
+    to 0.0; a missing parameter that the model needs raises ``ValueError``.
+    """
+    required = required_parameters(formulation, model)
+    values = []
+    for symbol in PARAMETER_SYMBOLS:
+        if symbol in parameters:
+            value = parameters[symbol]
+        elif str(symbol) in parameters:
+            value = parameters[str(symbol)]
+        elif symbol in required:
+            raise ValueError(f"Missing value for parameter '{symbol}' required by the {model} model.")
+        else:
+            value = 0.0
+        values.append(float(value) if np.ndim(value) == 0 else np.asarray(value, dtype=float))
+    return tuple(values)
+
+
+def _generate_function(name, outputs, formulation, vectorized):
+    """
+    Generate and compile ``name(t, y, out, params)`` writing ``outputs`` into ``out``.
+
+    ``outputs`` is a sequence of ``(index, expression)`` pairs. Common
+    subexpressions (``sin(theta1 - theta2)``, the mass-matrix determinant, ...)
+    are eliminated across *all* outputs, so each is evaluated once per call.
+    Scalar kernels use the ``math`` module; vectorized kernels use NumPy and
+    index the trailing axes so ``y`` may be ``(4,)`` or ``(N, 4)`` and every
+    parameter may be a scalar or an ``(N,)`` array.
+    """
+    state_names = STATE_NAMES[formulation]
+    state_symbols = [sp.Symbol(state_name) for state_name in state_names]
+    replacements = dict(zip(STATE_FUNCTIONS[formulation], state_symbols))
+    indices = [index for index, _ in outputs]
+    expressions = [sp.sympify(expression).xreplace(replacements) for _, expression in outputs]
+
+    common, reduced = sp.cse(expressions, symbols=sp.numbered_symbols('_x'), optimizations='basic')
+
+    printer = NumPyPrinter() if vectorized else PythonCodePrinter()
+    prefix = '...,' if vectorized else ''
+    lines = [
+        f"def {name}(t, y, out, params):",
+        f"    {', '.join(str(symbol) for symbol in PARAMETER_SYMBOLS)} = params",
+    ]
+    lines += [f"    {state_name} = y[{prefix}{i}]" for i, state_name in enumerate(state_names)]
+    lines += [f"    {symbol} = {printer.doprint(expression)}" for symbol, expression in common]
+    for index, expression in zip(indices, reduced):
+        lines.append(f"    out[{prefix}{', '.join(map(str, index))}] = {printer.doprint(expression)}")
+    lines.append("    return out")
+    source = "\n".join(lines) + "\n"
+
+    namespace = {'math': math, 'numpy': np}
+    exec(compile(source, f"<compiled {name}>", 'exec'), namespace)
+    function = namespace[name]
+    function.source = source
+    return function
+
+
+@lru_cache(maxsize=None)
+def state_kernel(formulation, model, vectorized=False):
+    """
+    Return the fused state-derivative kernel ``kernel(t, y, out, params) -> out``.
+
+    All four components of the first-order system are generated into one
+    function that shares common subexpressions and writes into the caller's
+    preallocated ``out`` array. ``params`` is the tuple returned by
+    ``parameter_values``. The kernel is generated once per
+    (formulation, model, vectorized) and cached for the life of the process.
+    """
+    _, *rhs = system_equations(formulation, model)
+    name = f"{formulation}_{model}_rhs{'_vectorized' if vectorized else ''}"
+    return _generate_function(name, [((i,), expression) for i, expression in enumerate(rhs)],
+                              formulation, vectorized)
+
+
+@lru_cache(maxsize=None)
+def jacobian_kernel(formulation, model, vectorized=False):
+    """
+    Return the fused Jacobian kernel ``kernel(t, y, out, params) -> out``.
+
+    ``out`` has shape ``(4, 4)`` (or ``(N, 4, 4)`` for the vectorized variant)
+    and receives ``d f_i / d y_j``. Generated once per
+    (formulation, model, vectorized), like ``state_kernel``.
+    """
+    jacobian = system_jacobian(formulation, model)
+    outputs = [((i, j), jacobian[i, j]) for i in range(jacobian.rows) for j in range(jacobian.cols)]
+    name = f"{formulation}_{model}_jacobian{'_vectorized' if vectorized else ''}"
+    return _generate_function(name, outputs, formulation, vectorized)
+
+
+@lru_cache(maxsize=None)
+def energy_kernel(formulation, model, vectorized=False):
+    """
+    Return the total-energy kernel ``kernel(t, y, out, params) -> out``.
+
+    ``out`` has shape ``(1,)`` (or ``(N, 1)``) and receives the energy in
+    joules of the state ``y``. Generated once per (formulation, model,
+    vectorized), like ``state_kernel``.
+    """
+    name = f"{formulation}_{model}_energy{'_vectorized' if vectorized else ''}"
+    return _generate_function(name, [((0,), system_energy(formulation, model))], formulation, vectorized)
+
+
+@lru_cache(maxsize=None)
+def expression_kernel(expressions, formulation, vectorized=False):
+    """
+    Return a kernel ``kernel(t, y, out, params) -> out`` evaluating a tuple of SymPy ``expressions``.
+
+    The expressions are written in the state functions of ``formulation``
+    (``STATE_FUNCTIONS``) and the parameter symbols; ``out[..., i]``
+    receives the ``i``-th. Used for event functions such as Poincare
+    sections, and cached per distinct tuple like the other kernels.
+    """
+    name = f"{formulation}_expression{'_vectorized' if vectorized else ''}"
+    return _generate_function(name, [((i,), expression) for i, expression in enumerate(expressions)],
+                              formulation, vectorized)
+
+
+def warm_up(formulations=('lagrangian', 'hamiltonian'), models=('simple', 'compound')):
+    """
+    Load (or derive) every equation system and generate its kernels in this process.
+
+    Covers the state, Jacobian and energy kernels, scalar and vectorized.
+    Run in a pre-forking server's master process (see ``gunicorn.conf.py``),
+    they are inherited copy-on-write by every forked worker; the spawned job
+    pools run it as their initializer instead, since they inherit nothing.
+    Expression kernels (Poincare sections) depend on the request and are
+    still generated on first use.
+    """
+    for formulation in formulations:
+        for model in models:
+            for factory in (state_kernel, jacobian_kernel, energy_kernel):
+                factory(formulation, model)
+                factory(formulation, model, vectorized=True)
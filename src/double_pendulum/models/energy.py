@@ -0,0 +1,97 @@
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from ..numerics import BoundSystem
+from .compiled import energy_kernel
+
+
+# What a run does once its energy drift passes the tolerance
+ENERGY_ACTIONS = ('stop', 'tighten')
+# 'tighten' divides rtol and atol by this factor per retry, at most MAX_TIGHTENINGS times
+TIGHTENING_FACTOR = 10.0
+MAX_TIGHTENINGS = 4
+# Initial energies below this many joules (rounding of cancelling terms) make the drift absolute
+ZERO_ENERGY = 1e-9
+
+
+class EnergyMonitor:
+    """
+    Measures the relative drift of the total energy of a run from its initial value.
+
+    The drift of a state is ``|E - E0| / |E0|`` (``|E - E0|`` in joules when
+    ``|E0|`` is below ``ZERO_ENERGY``), with ``E`` the compiled total energy: ``T + V``
+    for the Lagrangian formulation, ``H`` for the Hamiltonian one. It is
+    evaluated vectorized over a sampled solution by ``drift``, and step by
+    step during a ``solve_ivp`` integration through ``event``, a terminal
+    event that fires once the drift passes ``tolerance``.
+
+        Attributes:
+            initial (float): Energy of the initial state, in joules.
+            tolerance (float): Drift that ends (or restarts) an integration; None to only report.
+            max_drift (float): Largest drift seen by the event over the integrations kept.
+            tightenings (int): Retries with tighter tolerances made by ``solve_ivp_within_tolerance``;
+                ``MAX_TIGHTENINGS`` is a budget for the whole run, across windows.
+    """
+
+    def __init__(self, formulation, model, params, initial_state, tolerance=None):
+        self._scalar = BoundSystem(energy_kernel(formulation, model), params)
+        self._vectorized = BoundSystem(energy_kernel(formulation, model, vectorized=True), params)
+        self.initial = float(self._scalar(0.0, np.asarray(initial_state, dtype=float), np.empty(1))[0])
+        self._scale = abs(self.initial) if abs(self.initial) >= ZERO_ENERGY else 1.0
+        self.tolerance = tolerance
+        self.max_drift = 0.0
+        self.tightenings = 0
+
+    def energies(self, states):
+        """Return the total energy of ``(T, 4)`` states, as a ``(T,)`` array."""
+        states = np.asarray(states, dtype=float)
+        return self._vectorized(0.0, states, np.empty(states.shape[:-1] + (1,)))[..., 0]
+
+    def drift(self, states):
+        """Return the relative energy drift of ``(T, 4)`` states, as a ``(T,)`` array."""
+        return np.abs(self.energies(states) - self.initial) / self._scale
+
+    def event(self):
+        """Return a terminal ``solve_ivp`` event crossing zero when the drift passes ``tolerance``."""
+        out = np.empty(1)
+
+        def energy_drift(t, y):
+            drift = abs(self._scalar(t, y, out)[0] - self.initial) / self._scale
+            self.max_drift = max(self.max_drift, drift)
+            return self.tolerance - drift
+
+        energy_drift.terminal = True
+        energy_drift.direction = -1
+        return energy_drift
+
+
+def solve_ivp_within_tolerance(fun, t_span, y0, monitor, action='stop', **integrator_args):
+    """
+    Run ``solve_ivp`` with the ``monitor``'s energy-drift event.
+
+    With ``action='stop'`` the integration ends at the first point where the
+    drift reaches ``monitor.tolerance`` (``status == 1``), leaving a shorter
+    solution. With ``'tighten'`` it is restarted from ``y0`` with ``rtol`` and
+    ``atol`` divided by ``TIGHTENING_FACTOR``, up to ``MAX_TIGHTENINGS``
+    times per run, and only then stopped; the windows after it keep the
+    tightened tolerances. Events passed in ``integrator_args`` are kept; the
+    energy event is the last one.
+    """
+    if action not in ENERGY_ACTIONS:
+        raise ValueError(f"Invalid energy drift action '{action}'. Please choose 'stop' or 'tighten'.")
+    events = integrator_args.pop('events', None)
+    events = [] if events is None else list(events) if isinstance(events, (list, tuple)) else [events]
+    integrator_args['events'] = events + [monitor.event()]
+
+    # Steps of an abandoned attempt do not count towards ``max_drift``
+    previous_drift = monitor.max_drift
+    rtol, atol = integrator_args.get('rtol', 1e-3), np.asarray(integrator_args.get('atol', 1e-6))
+    while True:
+        # Later windows of a chunked run start from the tolerances earlier ones were tightened to
+        scale = TIGHTENING_FACTOR ** monitor.tightenings
+        integrator_args.update(rtol=rtol / scale, atol=atol / scale)
+        monitor.max_drift = previous_drift
+        sol = solve_ivp(fun, t_span, y0, **integrator_args)
+        if not sol.t_events[-1].size or action == 'stop' or monitor.tightenings >= MAX_TIGHTENINGS:
+            return sol
+        monitor.tightenings += 1
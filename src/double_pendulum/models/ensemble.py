@@ -0,0 +1,112 @@
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from ..numerics import HAMILTONIAN_INTEGRATORS, INTEGRATORS, BoundSystem
+from .compiled import parameter_values, state_kernel
+
+
+class DoublePendulumEnsemble:
+    """
+    Simulates many double pendulums with shared physics in a single vectorized integration.
+
+    Every trajectory is advanced together by the vectorized kernel generated from
+    the same derived equations as ``DoublePendulumLagrangian`` and
+    ``DoublePendulumHamiltonian``, so there is no Python loop over pendulums.
+
+        Attributes:
+            initial_conditions (numpy.ndarray): (N, 4) initial states in radians.
+            time (numpy.ndarray): Discrete time points at which the states are evaluated.
+            parameters (dict): Parameters of the pendulum system. Values may be scalars, or
+                arrays of shape (N,) to give every trajectory its own value.
+            model (str): The model type used for the pendulum ('simple' or 'compound').
+            formulation (str): 'lagrangian' (states are angles and angular velocities) or
+                'hamiltonian' (states are angles and canonical momenta).
+            sol (numpy.ndarray): (N, T, 4) states of every trajectory at every time point.
+    """
+
+    def __init__(self, parameters, initial_conditions, time_vector, model='simple',
+                 formulation='lagrangian', integrator=solve_ivp, **integrator_args):
+        initial_conditions = np.atleast_2d(np.asarray(initial_conditions, dtype=float))
+        if initial_conditions.ndim != 2 or initial_conditions.shape[1] != 4:
+            raise ValueError("Initial conditions must have shape (N, 4).")
+
+        # Degrees in, radians internally, matching the single-pendulum classes
+        self.initial_conditions = np.deg2rad(initial_conditions)
+        self.time = np.linspace(time_vector[0], time_vector[1], time_vector[2])
+        self.parameters = parameters
+        self.model = model
+        self.formulation = formulation
+
+        self._kernel = state_kernel(formulation, model, vectorized=True)
+        self._parameter_values = parameter_values(parameters, formulation, model)
+
+        self.sol = self._solve_ode(integrator, **integrator_args)
+
+    def __len__(self):
+        return self.initial_conditions.shape[0]
+
+    def _system(self, t, y):
+        # y is the flattened (N, 4) batch; a fresh output keeps solve_ivp's references valid
+        states = y.reshape(-1, 4)
+        out = np.empty_like(states)
+        return self._kernel(t, states, out, self._parameter_values).reshape(-1)
+
+    def _solve_ode(self, integrator, **integrator_args):
+        """
+        Integrate every trajectory together and return an (N, T, 4) array.
+
+        With ``solve_ivp`` the whole batch shares one adaptive step size.
+        solve_ivp accepts a step when the RMS of the scaled error over all
+        ``N * 4`` components is below one, which on its own would dilute one
+        diverging trajectory's error by ``sqrt(N)``; ``rtol`` and ``atol``
+        (solve_ivp's defaults unless given) are therefore divided by
+        ``sqrt(N)``, so every accepted step also keeps each trajectory's own
+        RMS error within the tolerances, as a single run would. The price is
+        smaller steps for the whole batch as ``N`` grows. ``rk4`` steps the
+        batch in place with a fixed step and ``dormand_prince`` gives every
+        trajectory its own adaptive step size.
+        """
+        if integrator == solve_ivp:
+            t_span = (self.time[0], self.time[-1])
+            dilution = np.sqrt(len(self))
+            integrator_args['rtol'] = integrator_args.get('rtol', 1e-3) / dilution
+            integrator_args['atol'] = np.asarray(integrator_args.get('atol', 1e-6)) / dilution
+            sol = solve_ivp(self._system, t_span, self.initial_conditions.reshape(-1),
+                            t_eval=self.time, **integrator_args)
+            if not sol.success:
+                raise RuntimeError(f"Ensemble integration failed: {sol.message}")
+            states = sol.y.reshape(len(self), 4, -1)
+            return np.ascontiguousarray(states.transpose(0, 2, 1))
+        allowed = HAMILTONIAN_INTEGRATORS if self.formulation == 'hamiltonian' else INTEGRATORS
+        if integrator in allowed:
+            system = BoundSystem(self._kernel, self._parameter_values)
+            sol = integrator(system, self.time, self.initial_conditions, **integrator_args)
+            return np.ascontiguousarray(sol.transpose(1, 0, 2))
+        raise ValueError("Unsupported integrator")
+
+    def _calculate_positions(self):
+        # Lengths may be per-trajectory arrays, so broadcast them over the time axis
+        l_1 = np.reshape(self._parameter_values[0], (-1, 1))
+        l_2 = np.reshape(self._parameter_values[1], (-1, 1))
+        theta_1, theta_2 = self.sol[..., 0], self.sol[..., 1]
+
+        x_1 = l_1 * np.sin(theta_1)
+        y_1 = -l_1 * np.cos(theta_1)
+        x_2 = x_1 + l_2 * np.sin(theta_2)
+        y_2 = y_1 - l_2 * np.cos(theta_2)
+
+        return x_1, y_1, x_2, y_2
+
+    def precompute_positions(self):
+        """
+        Precomputes the bob positions of every trajectory as a (4, N, T) array of
+        (x_1, y_1, x_2, y_2), mirroring the single-pendulum classes.
+        """
+        self.precomputed_positions = np.array(self._calculate_positions())
+
+    def separation(self, reference=0):
+        """
+        Return the (N, T) Euclidean phase-space distance of every trajectory from
+        trajectory ``reference``, the basic sensitivity-to-initial-conditions signal.
+        """
+        return np.linalg.norm(self.sol - self.sol[reference], axis=-1)
@@ -1,12 +1,15 @@
+import time
+
 import sympy as sp
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib import cm
-from matplotlib.ticker import FuncFormatter
 from scipy.integrate import odeint, solve_ivp
-import plotly.graph_objs as go
-from plotly.subplots import make_subplots
+from ..cache.equations import load_or_derive_equations
+from ..instrumentation import current_stage, metrics, solve_ivp_counts, stage
 from ..math.functions import *
+from ..numerics import HAMILTONIAN_INTEGRATORS, BoundSystem, ProgressTracker, Trajectory, time_windows
+from ..plotting.animation import pendulum_figure
+from .compiled import jacobian_kernel, parameter_values, state_kernel, uses_jacobian
+from .energy import ENERGY_ACTIONS, EnergyMonitor, solve_ivp_within_tolerance
 
 p_theta_1 = sp.Function('p_theta_1')(t)
 p_theta_2 = sp.Function('p_theta_2')(t)
@@ -23,9 +26,16 @@ def hamiltonian_first_order_system(model='simple'):
     return MAT_EQ, Heq1.rhs, Heq2.rhs, Heq3.rhs, Heq4.rhs
 
 
+def hamiltonian_jacobian(model='simple'):
+    MAT_EQ, eqn1, eqn2, eqn3, eqn4 = DoublePendulumHamiltonian._compute_and_cache_equations(model)
+    return first_order_jacobian([eqn1, eqn2, eqn3, eqn4], (theta1, theta2, p_theta_1, p_theta_2))
+
+
 class DoublePendulumHamiltonian:
-    # Class variable for caching
+    # Class variables for caching
     _cache = {}
+    _jacobian_cache = {}
+    _energy_cache = {}
 
     # Declare variables & constants
     t = sp.Symbol("t")
@@ -40,68 +50,199 @@ class DoublePendulumHamiltonian:
     @classmethod
     def _compute_and_cache_equations(cls, model):
         if model not in cls._cache:
-            cls._cache[model] = hamiltonian_first_order_system(model)
+            cls._cache[model] = load_or_derive_equations('hamiltonian', model, hamiltonian_first_order_system)
         return cls._cache[model]
 
+    @classmethod
+    def _compute_and_cache_jacobian(cls, model):
+        if model not in cls._jacobian_cache:
+            cls._jacobian_cache[model] = load_or_derive_equations('hamiltonian-jacobian', model,
+                                                                  hamiltonian_jacobian)
+        return cls._jacobian_cache[model]
+
+    @classmethod
+    def _compute_and_cache_energy(cls, model):
+        if model not in cls._energy_cache:
+            cls._energy_cache[model] = load_or_derive_equations('hamiltonian-energy', model, compute_hamiltonian)
+        return cls._energy_cache[model]
+
     def __init__(self, parameters, initial_conditions, time_vector,
-                 model='simple', integrator=solve_ivp, **integrator_args):
+                 model='simple', integrator=solve_ivp, progress=None, chunk_duration=None, on_chunk=None,
+                 energy_tolerance=None, on_energy_drift='stop', **integrator_args):
+        if on_energy_drift not in ENERGY_ACTIONS:
+            raise ValueError(f"Invalid energy drift action '{on_energy_drift}'. Please choose 'stop' or 'tighten'.")
+        if energy_tolerance is not None and integrator != solve_ivp:
+            raise ValueError("energy_tolerance needs the adaptive solve_ivp integrator")
         self.initial_conditions = np.deg2rad(initial_conditions)
         self.time = np.linspace(time_vector[0], time_vector[1], time_vector[2])
+        # ``progress(fraction)`` is told how much of the time span has been integrated; raising aborts the run
+        self._tracker = None if progress is None else ProgressTracker(progress, self.time[0], self.time[-1])
+        # With ``chunk_duration`` the span is solved in windows and ``on_chunk(piece)`` sees each one as it lands
+        self._chunk_duration = chunk_duration
+        self._on_chunk = on_chunk
+        # With ``energy_tolerance`` solve_ivp stops (or retries with tighter tolerances) once the relative
+        # drift of the total energy passes it; see ``models/energy.py``
+        self._energy_tolerance = energy_tolerance
+        self._on_energy_drift = on_energy_drift
+        self._energy_monitor = None
+        # Set when the energy event, rather than a solver failure, ended the run early
+        self.stopped_by_energy_drift = False
         self.parameters = parameters
         self.model = model
 
         # Get equations for the specified model
-        MAT_EQ, eqn1, eqn2, eqn3, eqn4 = self._compute_and_cache_equations(model)
+        with stage('equations', formulation='hamiltonian', model=model):
+            MAT_EQ, eqn1, eqn2, eqn3, eqn4 = self._compute_and_cache_equations(model)
         self.matrix = MAT_EQ
 
-        # Substitute parameters into the equations
-        eq1_subst = eqn1.subs(parameters)
-        eq2_subst = eqn2.subs(parameters)
-        eq3_subst = eqn3.subs(parameters)
-        eq4_subst = eqn4.subs(parameters)
-
-        # Lambdify the equations after substitution
-        self.eqn1_func = sp.lambdify((theta1, theta2, p_theta_1, p_theta_2, t), eq1_subst, 'numpy')
-        self.eqn2_func = sp.lambdify((theta1, theta2, p_theta_1, p_theta_2, t), eq2_subst, 'numpy')
-        self.eqn3_func = sp.lambdify((theta1, theta2, p_theta_1, p_theta_2, t), eq3_subst, 'numpy')
-        self.eqn4_func = sp.lambdify((theta1, theta2, p_theta_1, p_theta_2, t), eq4_subst, 'numpy')
+        # Fused kernel compiled once per model with the parameters as runtime arguments
+        with stage('kernel', formulation='hamiltonian', model=model):
+            self._kernel = state_kernel('hamiltonian', model)
+            self._parameter_values = parameter_values(parameters, 'hamiltonian', model)
 
         # Run the solver
-        self.sol = self._solve_ode(integrator, **integrator_args)
-
-    def _system(self, y, t):
-        th1, th2, p_th1, p_th2 = y
-        system = [
-            self.eqn1_func(th1, th2, p_th1, p_th2, t),
-            self.eqn2_func(th1, th2, p_th1, p_th2, t),
-            self.eqn3_func(th1, th2, p_th1, p_th2, t),
-            self.eqn4_func(th1, th2, p_th1, p_th2, t)
-        ]
-        return system
+        # Right-hand-side evaluations made by the integrator, for the metrics endpoint
+        self.evaluations = 0
+        started = time.perf_counter()
+        with stage('integration', integrator=getattr(integrator, '__name__', repr(integrator)),
+                   method=integrator_args.get('method')):
+            # Continuous solution; ``sol`` is sampled from it on first access
+            self.trajectory = self._solve_ode(integrator, **integrator_args)
+        metrics.observe('double_pendulum_integration_seconds', time.perf_counter() - started,
+                        formulation='hamiltonian', model=model)
+        metrics.increment('double_pendulum_rhs_evaluations_total', self.evaluations,
+                          formulation='hamiltonian', model=model)
+        self._sol = None
+
+    @property
+    def sol(self):
+        """The states at ``self.time``, evaluated from ``trajectory`` on first access."""
+        if self._sol is None:
+            # A failed solve_ivp run stops early; as with t_eval, only the solved times are sampled
+            self._sol = self.trajectory(self.time[self.time <= self.trajectory.t_end])
+        return self._sol
+
+    def _states(self, times=None):
+        # Default to the time_vector grid; otherwise evaluate the dense output at ``times``
+        if times is None:
+            return self.time[:len(self.sol)], self.sol
+        times = np.asarray(times, dtype=float)
+        return times, self.trajectory(times)
+
+    def _system(self, y, t, out=None):
+        self.evaluations += 1
+        if self._tracker is not None:
+            self._tracker.update(t)
+        if out is None:
+            out = np.empty(4)
+        return self._kernel(t, y, out, self._parameter_values)
+
+    def _jacobian(self, y, t):
+        # Compiled on first use so explicit integrators never pay for it
+        kernel = jacobian_kernel('hamiltonian', self.model)
+        return kernel(t, y, np.empty((4, 4)), self._parameter_values)
 
     def _solve_ode(self, integrator, **integrator_args):
         """
         Solve the system of ODEs using the specified integrator.
 
         Parameters:
-        - integrator: The integrator function to use. Default is scipy's solve_ivp.
+        - integrator: The integrator function to use. Default is scipy's solve_ivp; odeint and
+          the integrators in ``numerics.HAMILTONIAN_INTEGRATORS`` (rk4, dormand_prince and the
+          symplectic implicit_midpoint, gauss_legendre and tao) are also accepted.
         - system: The system function defining the ODEs.
         - **integrator_args: Additional arguments specific to the chosen integrator.
+
+        When ``chunk_duration`` was given, the time grid is split into consecutive windows of
+        about that many seconds, each started from the end state of the previous one, and
+        ``on_chunk`` receives every window's ``Trajectory`` as soon as it is solved; the pieces
+        are then joined into one trajectory.
+
+        Returns a ``numerics.Trajectory``. solve_ivp runs with ``dense_output=True`` and no
+        ``t_eval``, so its continuous extension is kept as-is; the grid-based integrators are
+        interpolated between their outputs with cubic Hermite polynomials.
+
+        The analytic Jacobian is supplied automatically as ``Dfun`` for odeint and as
+        ``jac`` for the implicit solve_ivp methods (Radau, BDF, LSODA) unless given.
         """
+        if integrator not in (odeint, solve_ivp) + HAMILTONIAN_INTEGRATORS:
+            raise ValueError("Unsupported integrator")
+        if self._chunk_duration is None:
+            return self._solve_window(integrator, self.time, self.initial_conditions, **integrator_args)
+
+        pieces = []
+        y0 = self.initial_conditions
+        for times in time_windows(self.time, self._chunk_duration):
+            piece = self._solve_window(integrator, times, y0, **integrator_args)
+            pieces.append(piece)
+            if self._on_chunk is not None:
+                self._on_chunk(piece)
+            if piece.t_end < times[-1]:
+                break  # A failed solve_ivp run stops early; keep what was solved
+            y0 = piece(piece.t_end)
+        return Trajectory.concatenate(pieces)
+
+    def _solve_window(self, integrator, times, y0, **integrator_args):
+        # Solve from ``y0`` at ``times[0]`` over the grid ``times``
         if integrator == odeint:
-            sol = odeint(self._system, self.initial_conditions, self.time, **integrator_args)
+            integrator_args.setdefault('Dfun', self._jacobian)
+            # odeint copies each derivative out, so one buffer serves every call
+            buffer = np.empty(4)
+            sol = odeint(lambda y, t: self._system(y, t, buffer), y0, times, **integrator_args)
+            return self._sampled_trajectory(times, sol)
         elif integrator == solve_ivp:
-            t_span = (self.time[0], self.time[-1])
-            sol = solve_ivp(lambda t, y: self._system(y, t), t_span, self.initial_conditions,
-                            t_eval=self.time, **integrator_args)
-            sol = sol.y.T  # Transpose
+            # solve_ivp keeps references to returned derivatives, so each call gets a fresh array
+            t_span = (times[0], times[-1])
+            if 'jac' not in integrator_args and uses_jacobian(integrator_args.get('method', 'RK45')):
+                integrator_args['jac'] = lambda t, y: self._jacobian(y, t)
+            integrator_args.setdefault('dense_output', True)
+            if self._energy_tolerance is None:
+                sol = solve_ivp(lambda t, y: self._system(y, t), t_span, y0, **integrator_args)
+            else:
+                sol = solve_ivp_within_tolerance(lambda t, y: self._system(y, t), t_span, y0,
+                                                 self.energy_monitor, self._on_energy_drift, **integrator_args)
+                self.stopped_by_energy_drift = sol.status == 1 and sol.t_events[-1].size > 0
+            current_stage().add(**solve_ivp_counts(sol, integrator_args.get('method', 'RK45')))
+            return Trajectory.from_ode_solution(sol.sol)
         else:
-            raise ValueError("Unsupported integrator")
-        return sol
-
-    def _calculate_positions(self):
+            # In-place fixed-step / per-trajectory adaptive integrators from numerics
+            system = BoundSystem(self._kernel, self._parameter_values, self._tracker)
+            sol = integrator(system, times, y0, **integrator_args)
+            self.evaluations += system.evaluations
+            return self._sampled_trajectory(times, sol)
+
+    def _sampled_trajectory(self, times, sol):
+        system = BoundSystem(state_kernel('hamiltonian', self.model, vectorized=True), self._parameter_values)
+        return Trajectory.from_samples(times, sol, system)
+
+    @property
+    def energy_monitor(self):
+        """The ``EnergyMonitor`` measuring drift from the energy of the initial conditions."""
+        if self._energy_monitor is None:
+            self._energy_monitor = EnergyMonitor('hamiltonian', self.model, self._parameter_values,
+                                                 self.initial_conditions, self._energy_tolerance)
+        return self._energy_monitor
+
+    def energy(self, times=None):
+        """Return the total energy H (J) at ``times`` (default ``self.time``), vectorized over the solution."""
+        _, states = self._states(times)
+        return self.energy_monitor.energies(states)
+
+    def energy_drift(self, times=None):
+        """Return the relative energy drift ``|E - E0| / |E0|`` at ``times``, by default ``self.time``."""
+        _, states = self._states(times)
+        return self.energy_monitor.drift(states)
+
+    @property
+    def max_energy_drift(self):
+        """Largest relative energy drift over ``self.time`` and, with ``energy_tolerance``, every solver step."""
+        drift = self.energy_drift()
+        return max(float(drift.max()) if drift.size else 0.0, self.energy_monitor.max_drift)
+
+    def _calculate_positions(self, states=None):
         # Unpack solution for theta1 and theta2
-        theta_1, theta_2 = self.sol[:, 0], self.sol[:, 1]
+        states = self.sol if states is None else states
+        theta_1, theta_2 = states[:, 0], states[:, 1]
 
         # Evaluate lengths of the pendulum arms using the provided parameter values
         l_1 = float(self.parameters[l1])
@@ -117,12 +258,14 @@ class DoublePendulumHamiltonian:
 
         return x_1, y_1, x_2, y_2
 
-    def time_graph(self):
+    def time_graph(self, times=None):
+        import matplotlib.pyplot as plt  # Imported on first use to keep matplotlib out of app start-up
+        times, states = self._states(times)
         plt.style.use('default')  # Reset to the default style
         fig, ax = plt.subplots()
         # Plot settings to match the animation's appearance
-        ax.plot(self.time, np.rad2deg(self.sol[:, 0]), color='#F4762F', label="θ1", linewidth=2)
-        ax.plot(self.time, np.rad2deg(self.sol[:, 1]), color='#4EC5AE', label="θ2", linewidth=2)
+        ax.plot(times, np.rad2deg(states[:, 0]), color='#F4762F', label="θ1", linewidth=2)
+        ax.plot(times, np.rad2deg(states[:, 1]), color='#4EC5AE', label="θ2", linewidth=2)
 
         # Set the labels, title, and grid
         ax.set_xlabel('Time / seconds')
@@ -132,12 +275,14 @@ class DoublePendulumHamiltonian:
         plt.legend(loc='best')
         return fig
 
-    def phase_path(self):
+    def phase_path(self, times=None):
+        import matplotlib.pyplot as plt  # Imported on first use to keep matplotlib out of app start-up
+        _, states = self._states(times)
         plt.style.use('default')  # Reset to the default style
         fig, ax = plt.subplots()
 
         # Plot settings to match the animation's appearance
-        ax.plot(np.rad2deg(self.sol[:, 0]), np.rad2deg(self.sol[:, 1]), color='#4410AD', label="Phase Path",
+        ax.plot(np.rad2deg(states[:, 0]), np.rad2deg(states[:, 1]), color='#4410AD', label="Phase Path",
                 linewidth=2)
 
         # Set the labels, title, and grid
@@ -148,18 +293,22 @@ class DoublePendulumHamiltonian:
         plt.legend(loc='best')
         return fig
 
-    def precompute_positions(self):
+    def precompute_positions(self, times=None):
         """
         Precomputes and stores the positions of both pendulum bobs for each time step.
 
         This method calculates the (x, y) positions of the first and second pendulum bobs at each time step,
         using the provided initial conditions and system parameters. The positions are stored in a NumPy array
         as an instance attribute, which can be used for plotting and animation purposes, reducing the
-        computational load at rendering time.
+        computational load at rendering time. Pass ``times`` to sample the trajectory at exactly the
+        resolution the animation needs instead of at ``self.time``.
         """
-        self.precomputed_positions = np.array(self._calculate_positions())
+        times, states = self._states(times)
+        self.position_times = times
+        self.precomputed_positions = np.array(self._calculate_positions(states))
 
-    def animate_pendulum(self, fig_width=600, fig_height=600, trace=False, static=False, appearance='light'):
+    def animate_pendulum(self, fig_width=600, fig_height=600, trace=False, static=False, appearance='light',
+                         frame_step=10, client_side=False):
         """
         Generates an animation for the double pendulum using precomputed positions.
 
@@ -169,6 +318,10 @@ class DoublePendulumHamiltonian:
             trace (bool): If True, show the trace of the pendulum.
             static (bool): disables extra interactivity
             appearance (str): 'dark' for dark mode (default), 'light' for light mode.
+            frame_step (int): Use every ``frame_step``-th precomputed position as a frame (default 10).
+            client_side (bool): Omit the Plotly frames and path data; the Play button only emits
+                ``plotly_buttonclicked`` and ``assets/pendulum-animation.js`` draws the paths and animates
+                the payload from ``plotting.pack_positions``.
 
         Raises:
             AttributeError: If `precompute_positions` has not been called before animation.
@@ -181,134 +334,6 @@ class DoublePendulumHamiltonian:
             raise AttributeError("Precomputed positions must be calculated before animating. "
                                  "Please call 'precompute_positions' method first.")
 
-        x_1, y_1, x_2, y_2 = self.precomputed_positions
-
-        # Check appearance and set colors
-        if appearance == 'dark':
-            pendulum_color = 'rgba(255, 255, 255, 0.9)'  # White with slight transparency for visibility
-            trace_color_theta1 = 'rgba(255, 165, 0, 0.6)'  # Soft orange with transparency for trace of P1
-            trace_color_theta2 = 'rgba(0, 255, 0, 0.6)'  # Soft green with transparency for trace of P2
-            background_color = 'rgb(17, 17, 17)'  # Very dark (almost black) for the plot background
-            text_color = 'rgba(255, 255, 255, 0.9)'  # White text color for better visibility in dark mode
-            grid_color = 'rgba(255, 255, 255, 0.3)'  # Light grey for grid lines
-
-        elif appearance == 'light':
-            pendulum_color = '#4410AD'  # Dark blue for better visibility against light background
-            trace_color_theta1 = '#F4762F'  # Dark orange for a vivid contrast for trace of P1
-            trace_color_theta2 = '#4EC5AE'  # Dark green for trace of P2
-            background_color = 'rgb(255, 255, 255)'  # White for the plot background
-            text_color = 'rgb(0, 0, 0)'  # Black text color for better visibility in light mode
-            grid_color = 'rgba(0, 0, 0, 0.1)'  # Light black (gray) for grid lines, with transparency for subtlety
-
-        else:
-            print("Invalid appearance setting. Please choose 'dark' or 'light'.")
-            return None  # Exit the function if invalid appearance
-
-        # Create figure with initial trace
-        fig = go.Figure(
-            data=[go.Scatter(
-                x=[0, x_1[0], x_2[0]],
-                y=[0, y_1[0], y_2[0]],
-                mode='lines+markers',
-                name='Pendulum',
-                line=dict(width=2, color=pendulum_color),
-                marker=dict(size=10, color=pendulum_color)
-            )]
-        )
-
-        # If trace is True, add path traces
-        if trace:
-            path_1 = go.Scatter(
-                x=x_1, y=y_1,
-                mode='lines',
-                name='Path of P1',
-                line=dict(width=1, color=trace_color_theta1),
-            )
-            path_2 = go.Scatter(
-                x=x_2, y=y_2,
-                mode='lines',
-                name='Path of P2',
-                line=dict(width=1, color=trace_color_theta2),
-            )
-            fig.add_trace(path_1)
-            fig.add_trace(path_2)
-
-        # Calculate the max extent based on the precomputed positions
-        max_extent = max(
-            np.max(np.abs(x_1)),
-            np.max(np.abs(y_1)),
-            np.max(np.abs(x_2)),
-            np.max(np.abs(y_2))
-        )
-
-        # Add padding to the max extent
-        padding = 0.1 * max_extent  # 10% padding
-        axis_range_with_padding = [-max_extent - padding, max_extent + padding]
-
-        # Add frames to the animation
-        step = 10
-        frames = [go.Frame(data=[go.Scatter(x=[0, x_1[k], x_2[k]], y=[0, y_1[k], y_2[k]],
-                                            mode='lines+markers',
-                                            line=dict(width=2))])
-                  for k in range(0, len(x_1), step)]  # Use a step to reduce the number of frames
-        fig.frames = frames
-
-        # Define the base layout configuration
-        base_layout = dict(
-            plot_bgcolor=background_color,
-            paper_bgcolor=background_color,
-            xaxis=dict(
-                showgrid=True, gridwidth=1, gridcolor=grid_color,
-                range=axis_range_with_padding,
-                autorange=False, zeroline=False, tickcolor=text_color,
-                tickfont=dict(size=12, color=text_color),
-            ),
-            yaxis=dict(
-                showgrid=True, gridwidth=1, gridcolor=grid_color,
-                range=axis_range_with_padding,
-                autorange=False, zeroline=False,
-                scaleanchor='x', scaleratio=1,
-                tickcolor=text_color,
-                tickfont=dict(size=12, color=text_color),
-            ),
-            autosize=False,
-            width=fig_width,
-            height=fig_height,
-            updatemenus=[{
-                'type': 'buttons',
-                'buttons': [
-                    dict(
-                        label="Play",
-                        method="animate",
-                        args=[None, {"frame": {"duration": 33, "redraw": True}, "fromcurrent": True,
-                                    "mode": "immediate",
-                                    'label': 'Play',
-                                    'font': {'size': 14, 'color': 'black'},
-                                    'bgcolor': 'lightblue'
-                        }],
-                    )
-                ],
-                'direction': "left",
-                'pad': {"r": 10, "t": 10},  # Adjust padding if needed
-                'showactive': False,
-                'type': 'buttons',
-                'x': 0.05,  # Position for x
-                'y': 0.95,  # Position for y,(the top of the figure)
-                'xanchor': "left",
-                'yanchor': "top"
-            }],
-            margin=dict(l=20, r=20, t=20, b=20),
-        )
-        # Update the layout based on the 'static' argument
-        if static:
-            static_updates = dict(
-                xaxis_fixedrange=True,  # Disables horizontal zoom/pan
-                yaxis_fixedrange=True,  # Disables vertical zoom/pan
-                dragmode=False,         # Disables dragging
-                showlegend=False        # Hides legend
-            )
-            fig.update_layout(**base_layout, **static_updates)
-        else:
-            fig.update_layout(**base_layout)
-
-        return fig
+        return pendulum_figure(self.precomputed_positions, fig_width=fig_width, fig_height=fig_height, trace=trace,
+                               static=static, appearance=appearance, frame_step=frame_step,
+                               client_side=client_side)
@@ -0,0 +1,30 @@
+from .masked import MaskedRK4
+from .runge_kutta import RK4Workspace, dormand_prince, fixed_step, rk4, rk4_step
+from .symplectic import gauss_legendre, implicit_midpoint, tao
+from .system import BoundSystem, ProgressTracker, take_rows
+from .trajectory import Trajectory, time_windows
+
+# Integrators accepted through the ``integrator=`` argument of the model classes
+INTEGRATORS = (rk4, dormand_prince, implicit_midpoint, gauss_legendre)
+
+# Tao's method needs the Hamiltonian (q, p) structure, so only the Hamiltonian model accepts it
+HAMILTONIAN_INTEGRATORS = INTEGRATORS + (tao,)
+
+__all__ = [
+    "BoundSystem",
+    "HAMILTONIAN_INTEGRATORS",
+    "INTEGRATORS",
+    "MaskedRK4",
+    "ProgressTracker",
+    "RK4Workspace",
+    "Trajectory",
+    "dormand_prince",
+    "fixed_step",
+    "gauss_legendre",
+    "implicit_midpoint",
+    "rk4",
+    "rk4_step",
+    "take_rows",
+    "tao",
+    "time_windows",
+]
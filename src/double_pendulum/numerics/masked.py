@@ -0,0 +1,85 @@
+import numpy as np
+
+from .runge_kutta import RK4Workspace, rk4_step
+from .system import take_rows
+
+
+class MaskedRK4:
+    """
+    Fixed-step RK4 over a batch of trajectories that can be retired individually.
+
+    Trajectories that have finished (e.g. reached an event such as a flip or a
+    target number of section crossings) are retired and no longer evaluated:
+    the active rows are kept compacted in preallocated buffers so every step
+    costs time proportional to the number of *live* trajectories only.
+
+    Typical use::
+
+        stepper = MaskedRK4(system, initial_states, h=0.01)
+        while stepper.n_active and stepper.t < t_max:
+            previous = stepper.step()
+            finished = event_detected(previous, stepper.y)
+            stepper.retire(finished)
+
+        Attributes:
+            t (float): Current time, shared by all active trajectories.
+            h (float): Step size.
+            y (numpy.ndarray): Compacted ``(n_active, 4)`` states of the active rows.
+            rows (numpy.ndarray): Original row index of every active trajectory.
+            states (numpy.ndarray): ``(N, 4)`` states of all rows; retired rows hold the
+                state at which they were retired.
+            retired_at (numpy.ndarray): Time each row was retired (NaN while active).
+    """
+
+    def __init__(self, fun, y0, h, t0=0.0):
+        self.fun = fun
+        self.h = float(h)
+        self.t = float(t0)
+        self.states = np.array(y0, dtype=float)
+        self.rows = np.arange(self.states.shape[0])
+        self.y = self.states.copy()
+        self.retired_at = np.full(self.states.shape[0], np.nan)
+        self._active_fun = fun
+        self._previous = np.empty_like(self.y)
+        self._work = RK4Workspace(self.y.shape)
+
+    @property
+    def n_active(self):
+        return self.rows.size
+
+    def step(self):
+        """
+        Advance every active row by ``h`` in place and return the previous states.
+
+        The returned array is an internal buffer, valid until the next ``step`` call.
+        """
+        np.copyto(self._previous, self.y)
+        rk4_step(self._active_fun, self.t, self.y, self.h, self._work)
+        self.t += self.h
+        return self._previous
+
+    def retire(self, finished):
+        """
+        Stop integrating the active rows selected by the boolean mask ``finished``.
+
+        ``finished`` is aligned with ``y`` (the compacted active rows). Their current
+        states are written back to ``states`` and the buffers are compacted.
+        """
+        finished = np.asarray(finished, dtype=bool)
+        if not finished.any():
+            return
+        done = self.rows[finished]
+        self.states[done] = self.y[finished]
+        self.retired_at[done] = self.t
+
+        keep = ~finished
+        self.rows = self.rows[keep]
+        self.y = self.y[keep]
+        self._active_fun = take_rows(self.fun, self.rows)
+        self._previous = np.empty_like(self.y)
+        self._work = RK4Workspace(self.y.shape)
+
+    def finalize(self):
+        """Write the active rows back to ``states`` and return the full ``(N, 4)`` array."""
+        self.states[self.rows] = self.y
+        return self.states
@@ -0,0 +1,284 @@
+import numpy as np
+
+from .system import take_rows
+
+
+# Dormand-Prince 5(4) tableau, error weights and 4th-order dense output (as in scipy's RK45)
+DP_C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1])
+DP_A = [
+    np.array([]),
+    np.array([1/5]),
+    np.array([3/40, 9/40]),
+    np.array([44/45, -56/15, 32/9]),
+    np.array([19372/6561, -25360/2187, 64448/6561, -212/729]),
+    np.array([9017/3168, -355/33, 46732/5247, 49/176, -5103/18656]),
+]
+DP_B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84])
+DP_E = np.array([-71/57600, 0, 71/16695, -71/1920, 17253/339200, -22/525, 1/40])
+DP_P = np.array([
+    [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+    [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+    [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+    [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+    [0, 40617522/29380423, -110615467/29380423, 69997945/29380423],
+])
+
+SAFETY = 0.9
+MIN_FACTOR = 0.2
+MAX_FACTOR = 10.0
+ERROR_EXPONENT = -1 / 5
+
+
+class RK4Workspace:
+    """Preallocated stage buffers for in-place classical Runge-Kutta steps on arrays of one shape."""
+
+    def __init__(self, shape):
+        self.k1 = np.empty(shape)
+        self.k2 = np.empty(shape)
+        self.k3 = np.empty(shape)
+        self.k4 = np.empty(shape)
+        self.stage = np.empty(shape)
+
+
+def _column(h):
+    # Per-row step sizes broadcast over the trailing state axis
+    return h if np.ndim(h) == 0 else np.asarray(h)[..., None]
+
+
+def rk4_step(fun, t, y, h, work):
+    """
+    Advance ``y`` by one classical RK4 step of size ``h`` *in place*.
+
+    ``fun(t, y, out)`` must write the derivatives into ``out``. ``h`` may be a
+    scalar or an array with one entry per row of ``y``. ``work`` is an
+    ``RK4Workspace`` matching ``y.shape``; no other memory is allocated.
+    """
+    hc = _column(h)
+    k1, k2, k3, k4, stage = work.k1, work.k2, work.k3, work.k4, work.stage
+
+    fun(t, y, k1)
+    np.multiply(k1, hc / 2, out=stage)
+    stage += y
+    fun(t + h / 2, stage, k2)
+    np.multiply(k2, hc / 2, out=stage)
+    stage += y
+    fun(t + h / 2, stage, k3)
+    np.multiply(k3, hc, out=stage)
+    stage += y
+    fun(t + h, stage, k4)
+
+    # y += h/6 * (k1 + 2 k2 + 2 k3 + k4), accumulated in the stage buffers
+    k2 += k3
+    k2 *= 2
+    k1 += k2
+    k1 += k4
+    k1 *= hc / 6
+    y += k1
+    return y
+
+
+def fixed_step(step, t_eval, y0, max_step=None):
+    """
+    Drive an in-place one-step method ``step(t, y, h)`` and sample it at ``t_eval``.
+
+    Each output interval is split into equal substeps no longer than
+    ``max_step`` (one step per interval by default). Returns an array of shape
+    ``(len(t_eval), *y0.shape)``.
+    """
+    t_eval = np.asarray(t_eval, dtype=float)
+    y = np.array(y0, dtype=float)
+    sol = np.empty((len(t_eval),) + y.shape)
+    sol[0] = y
+
+    for k in range(1, len(t_eval)):
+        t, interval = t_eval[k - 1], t_eval[k] - t_eval[k - 1]
+        substeps = 1 if max_step is None else max(1, int(np.ceil(interval / max_step)))
+        h = interval / substeps
+        for i in range(substeps):
+            step(t + i * h, y, h)
+        sol[k] = y
+    return sol
+
+
+def rk4(fun, t_eval, y0, max_step=None):
+    """
+    Fixed-step classical Runge-Kutta integration sampled at ``t_eval``.
+
+    Parameters:
+        fun (callable): ``fun(t, y, out)`` writing dy/dt into ``out``.
+        t_eval (array_like): Increasing output times; the first is the initial time.
+        y0 (array_like): Initial state, ``(4,)`` for one trajectory or ``(N, 4)`` for a batch.
+        max_step (float, optional): Largest step. Each output interval is split into
+            equal substeps no longer than this; by default one step per interval.
+
+    Returns:
+        numpy.ndarray of shape ``(len(t_eval), *y0.shape)``.
+    """
+    work = RK4Workspace(np.shape(y0))
+    return fixed_step(lambda t, y, h: rk4_step(fun, t, y, h, work), t_eval, y0, max_step)
+
+
+def _rms(values):
+    return np.sqrt(np.mean(values ** 2, axis=-1))
+
+
+def _combine(weights, K, hc, out, term):
+    # out = hc * sum_j weights[j] * K[j] without temporaries, using ``term`` as scratch
+    out.fill(0.0)
+    for weight, k in zip(weights, K):
+        if weight:
+            np.multiply(k, weight, out=term)
+            out += term
+    out *= hc
+    return out
+
+
+def _initial_step(fun, t0, y, f, rtol, atol):
+    # Hairer, Norsett & Wanner's starting-step heuristic, evaluated per row
+    scale = atol + np.abs(y) * rtol
+    d0 = _rms(y / scale)
+    d1 = _rms(f / scale)
+    h0 = np.where((d0 < 1e-5) | (d1 < 1e-5), 1e-6, 0.01 * d0 / np.maximum(d1, 1e-300))
+
+    f1 = fun(t0 + h0, y + h0[:, None] * f, np.empty_like(y))
+    d2 = _rms((f1 - f) / scale) / h0
+    h1 = np.where(np.maximum(d1, d2) <= 1e-15, np.maximum(1e-6, h0 * 1e-3),
+                  (0.01 / np.maximum(np.maximum(d1, d2), 1e-300)) ** (1 / 5))
+    return np.minimum(100 * h0, h1)
+
+
+def dormand_prince(fun, t_eval, y0, rtol=1e-6, atol=1e-9, max_step=np.inf, first_step=None):
+    """
+    Adaptive Dormand-Prince 5(4) integration with an independent step size per trajectory.
+
+    Every row of an ``(N, 4)`` batch accepts or rejects its own steps, so a
+    regular trajectory is not dragged down to the step size of a chaotic one.
+    Only rows that have not yet reached the final time are evaluated, and
+    outputs at ``t_eval`` come from the method's 4th-order dense output. The
+    stage, state and error buffers are allocated once for the whole batch and
+    every step works in place on their leading rows; only per-row step sizes
+    and the dense-output samples are allocated as the integration proceeds.
+
+    Parameters:
+        fun (callable): ``fun(t, y, out)`` writing dy/dt into ``out``; ``t`` is an
+            array of per-row times. Objects with a ``take(rows)`` method (such as
+            ``BoundSystem``) are restricted to the active rows.
+        t_eval (array_like): Increasing output times; the first is the initial time.
+        y0 (array_like): ``(4,)`` or ``(N, 4)`` initial state.
+        rtol, atol (float): Relative and absolute tolerances, as for ``solve_ivp``.
+        max_step (float): Upper bound on every step.
+        first_step (float, optional): Initial step; estimated per row when omitted.
+
+    Returns:
+        numpy.ndarray of shape ``(len(t_eval), *y0.shape)``.
+    """
+    y0 = np.asarray(y0, dtype=float)
+    if y0.ndim == 1:
+        # Present a single trajectory as a batch of one
+        sol = dormand_prince(lambda t, y, out: (fun(t[0], y[0], out[0]), out)[1],
+                             t_eval, y0[None], rtol=rtol, atol=atol,
+                             max_step=max_step, first_step=first_step)
+        return sol[:, 0]
+
+    t_eval = np.asarray(t_eval, dtype=float)
+    n_rows = y0.shape[0]
+    t_end = t_eval[-1]
+    sol = np.empty((len(t_eval),) + y0.shape)
+    sol[0] = y0
+
+    y = y0.copy()
+    t = np.full(n_rows, t_eval[0])
+    f = fun(t, y, np.empty_like(y))
+    if first_step is None:
+        h = np.minimum(_initial_step(fun, t, y, f, rtol, atol), max_step)
+    else:
+        h = np.full(n_rows, float(first_step))
+    next_output = np.ones(n_rows, dtype=int)
+    active = np.flatnonzero(next_output < len(t_eval))
+
+    # Stage, state and error buffers for the whole batch, allocated once; each step
+    # works on their first ``m`` rows, the active trajectories gathered in order
+    K = np.empty((7,) + y0.shape)
+    y_start = np.empty_like(y0)
+    y_new = np.empty_like(y0)
+    stage = np.empty_like(y0)
+    term = np.empty_like(y0)
+    error = np.empty_like(y0)
+    scale = np.empty_like(y0)
+    t_start = np.empty(n_rows)
+
+    while active.size:
+        m = active.size
+        rows_fun = fun if m == n_rows else take_rows(fun, active)
+        Km, ya, yn, st, tm, err, sc = K[:, :m], y_start[:m], y_new[:m], stage[:m], term[:m], error[:m], scale[:m]
+        ta = np.take(t, active, out=t_start[:m])
+        np.take(y, active, axis=0, out=ya)
+        np.take(f, active, axis=0, out=Km[0])
+        ha = np.minimum(np.minimum(h[active], max_step), t_end - ta)
+        if np.any(ha <= 10 * np.finfo(float).eps * np.maximum(1.0, np.abs(ta))):
+            raise RuntimeError("Required step size is less than spacing between numbers.")
+        hc = ha[:, None]
+
+        for s in range(1, 6):
+            _combine(DP_A[s], Km, hc, st, tm)
+            st += ya
+            rows_fun(ta + DP_C[s] * ha, st, Km[s])
+        _combine(DP_B, Km, hc, yn, tm)
+        yn += ya
+        rows_fun(ta + ha, yn, Km[6])
+
+        # Scaled error estimate, RMS over each row
+        _combine(DP_E, Km, hc, err, tm)
+        np.abs(ya, out=sc)
+        np.abs(yn, out=tm)
+        np.maximum(sc, tm, out=sc)
+        sc *= rtol
+        sc += atol
+        err /= sc
+        np.square(err, out=err)
+        error_norm = np.sqrt(err.mean(axis=-1))
+        accepted = error_norm <= 1
+
+        with np.errstate(divide='ignore'):
+            factor = SAFETY * error_norm ** ERROR_EXPONENT
+        factor = np.where(error_norm == 0, MAX_FACTOR, factor)
+        factor = np.where(accepted, np.clip(factor, MIN_FACTOR, MAX_FACTOR),
+                          np.clip(factor, MIN_FACTOR, 1.0))
+        h[active] = ha * factor
+
+        if accepted.any():
+            local = np.flatnonzero(accepted)
+            rows = active[local]
+            t_new = ta[local] + ha[local]
+
+            # Emit every output time passed by this step from the dense output
+            pending = next_output[rows] < len(t_eval)
+            while pending.any():
+                idx = np.flatnonzero(pending)
+                t_out = t_eval[next_output[rows[idx]]]
+                due = t_out <= t_new[idx] + 1e-12 * np.maximum(1.0, np.abs(t_new[idx]))
+                if not due.any():
+                    break
+                idx, t_out = idx[due], t_out[due]
+                step_rows = local[idx]
+                x = (t_out - ta[step_rows]) / ha[step_rows]
+                powers = np.stack([x, x ** 2, x ** 3, x ** 4], axis=-1)
+                Q = np.einsum('sni,sk->nik', Km[:, step_rows], DP_P)
+                values = ya[step_rows] + ha[step_rows, None] * np.einsum('nik,nk->ni', Q, powers)
+                sol[next_output[rows[idx]], rows[idx]] = values
+                next_output[rows[idx]] += 1
+                pending[idx] = next_output[rows[idx]] < len(t_eval)
+
+            # Rejected rows keep their state and derivative; accepted ones advance
+            rejected = ~accepted[:, None]
+            np.copyto(yn, ya, where=rejected)
+            np.copyto(Km[6], Km[0], where=rejected)
+            y[active] = yn
+            f[active] = Km[6]
+            t[rows] = t_new
+
+        active = np.flatnonzero(next_output < len(t_eval))
+
+    return sol
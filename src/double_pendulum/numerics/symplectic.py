@@ -0,0 +1,177 @@
+import numpy as np
+
+from .runge_kutta import fixed_step
+
+
+# Two-stage Gauss-Legendre collocation (order 4)
+_SQRT3_6 = np.sqrt(3) / 6
+GAUSS_A = np.array([[1/4, 1/4 - _SQRT3_6], [1/4 + _SQRT3_6, 1/4]])
+GAUSS_B = np.array([1/2, 1/2])
+GAUSS_C = np.array([1/2 - _SQRT3_6, 1/2 + _SQRT3_6])
+
+# Yoshida/Suzuki triple-jump coefficients lifting a symmetric 2nd-order map to 4th order
+_TRIPLE_JUMP = 1 / (2 - 2 ** (1 / 3))
+TRIPLE_JUMP = (_TRIPLE_JUMP, 1 - 2 * _TRIPLE_JUMP, _TRIPLE_JUMP)
+
+
+def _max_change(new, old):
+    return np.max(np.abs(new - old)) if new.size else 0.0
+
+
+def implicit_midpoint(fun, t_eval, y0, max_step=None, tol=1e-12, max_iter=50):
+    """
+    Implicit midpoint rule, the one-stage Gauss-Legendre method (order 2, symplectic).
+
+    Solves ``y1 = y0 + h f((y0 + y1) / 2)`` by fixed-point iteration on the
+    midpoint. For Hamilton's equations in canonical coordinates, such as
+    ``DoublePendulumHamiltonian``, it preserves the symplectic form, so the
+    energy error stays bounded instead of drifting.
+
+    Parameters:
+        fun (callable): ``fun(t, y, out)`` writing dy/dt into ``out``.
+        t_eval (array_like): Increasing output times; the first is the initial time.
+        y0 (array_like): ``(4,)`` or ``(N, 4)`` initial state.
+        max_step (float, optional): Largest step (default: one step per output interval).
+        tol (float): Convergence threshold on the fixed-point update.
+        max_iter (int): Iterations allowed per step before raising ``RuntimeError``.
+    """
+    shape = np.shape(y0)
+    midpoint, previous, derivative = np.empty(shape), np.empty(shape), np.empty(shape)
+
+    def step(t, y, h):
+        fun(t, y, derivative)
+        np.multiply(derivative, h / 2, out=midpoint)
+        np.add(midpoint, y, out=midpoint)
+        for _ in range(max_iter):
+            np.copyto(previous, midpoint)
+            fun(t + h / 2, midpoint, derivative)
+            np.multiply(derivative, h / 2, out=midpoint)
+            np.add(midpoint, y, out=midpoint)
+            if _max_change(midpoint, previous) <= tol:
+                break
+        else:
+            raise RuntimeError("Implicit midpoint iteration did not converge; reduce max_step.")
+        # y1 = 2 * midpoint - y0
+        y *= -1
+        y += 2 * midpoint
+
+    return fixed_step(step, t_eval, y0, max_step)
+
+
+def gauss_legendre(fun, t_eval, y0, max_step=None, tol=1e-12, max_iter=50):
+    """
+    Two-stage Gauss-Legendre collocation (order 4, symplectic, symmetric).
+
+    The stage derivatives ``K_i = f(y + h sum_j a_ij K_j)`` are found by
+    fixed-point iteration, warm-started from the previous step. Arguments are as
+    for ``implicit_midpoint``.
+    """
+    shape = np.shape(y0)
+    K = np.zeros((2,) + shape)
+    previous = np.empty_like(K)
+    stage = np.empty(shape)
+    started = False
+
+    def step(t, y, h):
+        nonlocal started
+        if not started:
+            fun(t, y, K[0])
+            K[1] = K[0]
+            started = True
+        for _ in range(max_iter):
+            np.copyto(previous, K)
+            for i in range(2):
+                np.multiply(previous[0], h * GAUSS_A[i, 0], out=stage)
+                np.add(stage, h * GAUSS_A[i, 1] * previous[1], out=stage)
+                np.add(stage, y, out=stage)
+                fun(t + GAUSS_C[i] * h, stage, K[i])
+            # Measure the update on the state increment h K, not on K itself
+            if h * _max_change(K, previous) <= tol:
+                break
+        else:
+            raise RuntimeError("Gauss-Legendre iteration did not converge; reduce max_step.")
+        y += h * (GAUSS_B[0] * K[0] + GAUSS_B[1] * K[1])
+
+    return fixed_step(step, t_eval, y0, max_step)
+
+
+def tao(fun, t_eval, y0, max_step=None, omega=None, order=2):
+    """
+    Tao's explicit symplectic integrator for non-separable Hamiltonians.
+
+    The phase space ``(q, p)`` is doubled with a copy ``(x, y)`` and the
+    augmented Hamiltonian ``H(q, y) + H(x, p) + omega * |q - x|^2 / 2 + omega * |p - y|^2 / 2``
+    is split into three exactly solvable flows, composed symmetrically
+    (Tao, Phys. Rev. E 94, 043303, 2016). Only evaluations of Hamilton's
+    equations are needed, so every step is explicit.
+
+    ``fun`` must be the Hamiltonian right-hand side, i.e. the state is
+    ``(q, p)`` (``(q1, q2, p1, p2)`` here) and ``fun`` returns ``(dH/dp, -dH/dq)``; use it with
+    ``DoublePendulumHamiltonian`` only. ``omega`` couples the two copies: it must
+    be large enough to keep them bound yet satisfy ``omega * h <~ 0.5`` for
+    stability, and defaults to ``0.5 / h``. For the chaotic double pendulum this
+    means small steps (``h <= 0.0025`` at high energy); see
+    ``benchmarks/symplectic.py``. ``order`` is 2 or 4 (triple-jump composition of
+    the second-order map).
+    """
+    if order == 2:
+        weights = (1.0,)
+    elif order == 4:
+        weights = TRIPLE_JUMP
+    else:
+        raise ValueError("Tao's integrator supports order=2 or order=4.")
+
+    shape = np.shape(y0)
+    n = shape[-1] // 2  # positions first, then conjugate momenta
+    copy = np.empty(shape)  # (x, y) shadow of (q, p)
+    mixed = np.empty(shape)
+    derivative = np.empty(shape)
+
+    def flow_a(t, z, w, delta):
+        # H(q, y): p -= delta dH/dq(q, y), x += delta dH/dp(q, y)
+        mixed[..., :n] = z[..., :n]
+        mixed[..., n:] = w[..., n:]
+        fun(t, mixed, derivative)
+        z[..., n:] += delta * derivative[..., n:]
+        w[..., :n] += delta * derivative[..., :n]
+
+    def flow_b(t, z, w, delta):
+        # H(x, p): q += delta dH/dp(x, p), y -= delta dH/dq(x, p)
+        mixed[..., :n] = w[..., :n]
+        mixed[..., n:] = z[..., n:]
+        fun(t, mixed, derivative)
+        z[..., :n] += delta * derivative[..., :n]
+        w[..., n:] += delta * derivative[..., n:]
+
+    def flow_c(z, w, delta, coupling):
+        # Exact rotation of the differences (q - x, p - y) by angle 2 omega delta
+        cos, sin = np.cos(2 * coupling * delta), np.sin(2 * coupling * delta)
+        total = z + w
+        dq = z[..., :n] - w[..., :n]
+        dp = z[..., n:] - w[..., n:]
+        rotated_q = cos * dq + sin * dp
+        rotated_p = -sin * dq + cos * dp
+        z[..., :n] = (total[..., :n] + rotated_q) / 2
+        z[..., n:] = (total[..., n:] + rotated_p) / 2
+        w[..., :n] = (total[..., :n] - rotated_q) / 2
+        w[..., n:] = (total[..., n:] - rotated_p) / 2
+
+    def second_order(t, z, w, delta, coupling):
+        flow_a(t, z, w, delta / 2)
+        flow_b(t, z, w, delta / 2)
+        flow_c(z, w, delta, coupling)
+        flow_b(t, z, w, delta / 2)
+        flow_a(t, z, w, delta / 2)
+
+    started = False
+
+    def step(t, z, h):
+        nonlocal started
+        if not started:
+            np.copyto(copy, z)
+            started = True
+        coupling = 0.5 / h if omega is None else omega
+        for weight in weights:
+            second_order(t, z, copy, weight * h, coupling)
+
+    return fixed_step(step, t_eval, y0, max_step)
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class BoundSystem:
+    """
+    A compiled kernel bound to its parameter tuple, callable as ``fun(t, y, out)``.
+
+    This is the right-hand-side protocol used by every integrator in
+    ``numerics``: derivatives are written into the caller's ``out`` buffer and
+    ``out`` is returned. Parameters may be scalars or per-row ``(N,)`` arrays;
+    ``take`` restricts the array-valued ones to a subset of rows so masked
+    integrators can evaluate only the trajectories that are still active.
+    ``evaluations`` counts the calls made so far.
+    """
+
+    def __init__(self, kernel, params, tracker=None):
+        self.kernel = kernel
+        self.params = tuple(params)
+        self.tracker = tracker
+        self.evaluations = 0
+
+    def __call__(self, t, y, out):
+        self.evaluations += 1
+        if self.tracker is not None:
+            self.tracker.update(t)
+        return self.kernel(t, y, out, self.params)
+
+    def take(self, rows):
+        params = tuple(value if np.ndim(value) == 0 else value[rows] for value in self.params)
+        return BoundSystem(self.kernel, params, self.tracker)
+
+
+class ProgressTracker:
+    """
+    Report the fraction of ``[t_start, t_end]`` integrated so far to ``callback(fraction)``.
+
+    Right-hand-side wrappers call ``update(t)`` on every evaluation; the
+    callback only fires each time the integration advances by another
+    ``resolution`` of the span, so the overhead per evaluation is one
+    comparison. The callback may raise to abort the integration, which is how
+    background jobs are cancelled.
+    """
+
+    def __init__(self, callback, t_start, t_end, resolution=0.01):
+        self.callback = callback
+        self.t_start = float(t_start)
+        self.span = float(t_end) - self.t_start
+        self.resolution = resolution
+        self._next = resolution
+
+    def update(self, t):
+        fraction = (t - self.t_start) / self.span if self.span else 1.0
+        if fraction >= self._next:
+            self._next = fraction + self.resolution
+            self.callback(min(float(fraction), 1.0))
+
+
+def take_rows(fun, rows):
+    """Return ``fun`` restricted to ``rows``; plain callables are assumed row-independent."""
+    take = getattr(fun, 'take', None)
+    return fun if take is None else take(rows)
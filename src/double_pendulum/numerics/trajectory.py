@@ -0,0 +1,105 @@
+import numpy as np
+from scipy.interpolate import CubicHermiteSpline
+
+
+class Trajectory:
+    """
+    A continuous solution ``y(t)`` on ``[t_start, t_end]`` evaluated on demand.
+
+    The trajectory keeps the integrator's interpolant instead of a fixed grid
+    of samples, so every consumer (time graph, phase path, animation, export)
+    asks for exactly the times it needs and memory no longer scales with a
+    hard-coded sampling rate. Calling it with times of shape ``S`` returns
+    states of shape ``S + (4,)``. Both interpolant types pickle, so
+    trajectories can be cached or sent between processes.
+    """
+
+    def __init__(self, interpolant, t_start, t_end, states_first=False):
+        self._interpolant = interpolant
+        self._states_first = states_first
+        self.t_start = float(t_start)
+        self.t_end = float(t_end)
+
+    @classmethod
+    def from_ode_solution(cls, solution):
+        """Wrap the ``OdeSolution`` that ``solve_ivp(..., dense_output=True)`` returns in ``.sol``."""
+        return cls(solution, solution.t_min, solution.t_max, states_first=True)
+
+    @classmethod
+    def concatenate(cls, pieces):
+        """Join trajectories solved over consecutive intervals into one (see ``time_windows``)."""
+        if len(pieces) == 1:
+            return pieces[0]
+        return cls(_Piecewise(pieces), pieces[0].t_start, pieces[-1].t_end)
+
+    @classmethod
+    def from_samples(cls, t, y, fun):
+        """
+        Build a C1 cubic Hermite trajectory through samples ``y`` at times ``t``.
+
+        ``fun(t, y, out)`` supplies the derivative at every sample, so
+        fixed-grid integrators get third-order interpolation between their
+        outputs at the cost of one vectorized right-hand-side call.
+        """
+        t = np.asarray(t, dtype=float)
+        y = np.asarray(y, dtype=float)
+        derivatives = fun(t, y, np.empty_like(y))
+        return cls(CubicHermiteSpline(t, y, derivatives, axis=0), t[0], t[-1])
+
+    def __call__(self, times):
+        times = np.asarray(times, dtype=float)
+        tolerance = 1e-9 * max(abs(self.t_start), abs(self.t_end), 1.0)
+        if times.size and (times.min() < self.t_start - tolerance or times.max() > self.t_end + tolerance):
+            raise ValueError(f"Times must lie within the solved interval [{self.t_start}, {self.t_end}].")
+        states = self._interpolant(times)
+        return np.moveaxis(states, 0, -1) if self._states_first else states
+
+    def times(self, num=None, rate=None):
+        """
+        Return evenly spaced times spanning the trajectory.
+
+        Give either ``num`` points or a sampling ``rate`` in samples per second.
+        """
+        if (num is None) == (rate is None):
+            raise ValueError("Specify exactly one of 'num' or 'rate'.")
+        if rate is not None:
+            num = int(round((self.t_end - self.t_start) * rate)) + 1
+        return np.linspace(self.t_start, self.t_end, max(int(num), 2))
+
+    def sample(self, num=None, rate=None):
+        """Return ``(times, states)`` at the spacing chosen as for ``times``."""
+        times = self.times(num=num, rate=rate)
+        return times, self(times)
+
+
+class _Piecewise:
+    # Interpolant dispatching each time to the piece covering it; a shared end point belongs to the earlier piece
+    def __init__(self, pieces):
+        self.pieces = list(pieces)
+        self.breaks = np.array([piece.t_end for piece in self.pieces[:-1]])
+        self.dimension = self.pieces[0](self.pieces[0].t_start).shape[-1]
+
+    def __call__(self, times):
+        index = np.searchsorted(self.breaks, times)
+        states = np.empty(np.shape(times) + (self.dimension,))
+        for i, piece in enumerate(self.pieces):
+            mask = index == i
+            if mask.any():
+                states[mask] = piece(times[mask])
+        return states
+
+
+def time_windows(times, duration):
+    """
+    Split the sorted grid ``times`` into consecutive windows spanning about ``duration`` seconds.
+
+    Neighbouring windows share their boundary time, so the end state of one
+    window is the initial state of the next, and every window holds at least
+    two grid points.
+    """
+    times = np.asarray(times, dtype=float)
+    edges = np.arange(times[0], times[-1], duration)[1:]
+    # The tolerance keeps rounding in the grid from pushing a cut one point late
+    cuts = np.unique(np.clip(np.searchsorted(times, edges - 1e-9 * duration), 1, len(times) - 1))
+    bounds = [0, *cuts[cuts < len(times) - 1], len(times) - 1]
+    return [times[start:stop + 1] for start, stop in zip(bounds[:-1], bounds[1:])]
@@ -1,3 +1,16 @@
+from .animation import bob_positions, pack_positions, pendulum_figure, unpack_positions
+from .figures import flip_map_figure, ftle_figure, phase_path_figure, time_graph_figure
 from .helpers import generate_pendulum_figures, set_display_styles
 
-__all__ = ["generate_pendulum_figures", "set_display_styles"]
+__all__ = [
+    "bob_positions",
+    "flip_map_figure",
+    "ftle_figure",
+    "generate_pendulum_figures",
+    "pack_positions",
+    "pendulum_figure",
+    "phase_path_figure",
+    "set_display_styles",
+    "time_graph_figure",
+    "unpack_positions",
+]
@@ -0,0 +1,189 @@
+import base64
+
+import numpy as np
+import plotly.graph_objs as go
+
+
+# Milliseconds each frame is shown for, matching the server-side Play button
+FRAME_DURATION = 33
+
+
+def pack_positions(positions, frame_step=1, frame_duration=FRAME_DURATION):
+    """
+    Pack precomputed bob positions into the compact payload read by ``assets/pendulum-animation.js``.
+
+    The ``(4, T)`` array ``(x_1, y_1, x_2, y_2)`` is sent once as base64-encoded
+    little-endian float32 in row-major order. The browser draws the bob paths
+    from every sample and animates every ``frame_step``-th one with
+    ``Plotly.restyle``, so no ``go.Frame`` dicts are serialized at all.
+    """
+    positions = np.ascontiguousarray(positions, dtype='<f4')
+    return {
+        'dtype': 'float32',
+        'shape': list(positions.shape),
+        'data': base64.b64encode(positions.tobytes()).decode('ascii'),
+        'frame_step': int(frame_step),
+        'frame_duration': frame_duration,
+    }
+
+
+def bob_positions(theta_1, theta_2, l_1, l_2):
+    """Return the ``(4, T)`` bob positions ``(x_1, y_1, x_2, y_2)`` for angles in radians."""
+    x_1 = l_1 * np.sin(theta_1)
+    y_1 = -l_1 * np.cos(theta_1)
+    x_2 = x_1 + l_2 * np.sin(theta_2)
+    y_2 = y_1 - l_2 * np.cos(theta_2)
+    return np.array([x_1, y_1, x_2, y_2])
+
+
+def unpack_positions(payload):
+    """Inverse of ``pack_positions``: return the ``(4, T)`` float32 position array."""
+    positions = np.frombuffer(base64.b64decode(payload['data']), dtype='<f4')
+    return positions.reshape(payload['shape'])
+
+
+def pendulum_figure(positions, fig_width=600, fig_height=600, trace=False, static=False, appearance='light',
+                    frame_step=10, client_side=False, extent=None):
+    """
+    Build the pendulum animation figure from ``(4, T)`` bob positions ``(x_1, y_1, x_2, y_2)``.
+
+    This is the figure behind the models' ``animate_pendulum``; the arguments
+    are documented there. ``extent`` fixes the half-width of the square axes
+    instead of deriving it from ``positions``, e.g. ``l1 + l2`` while the
+    positions are still being streamed in.
+    """
+    x_1, y_1, x_2, y_2 = positions
+
+    # Check appearance and set colors
+    if appearance == 'dark':
+        pendulum_color = 'rgba(255, 255, 255, 0.9)'  # White with slight transparency for visibility
+        trace_color_theta1 = 'rgba(255, 165, 0, 0.6)'  # Soft orange with transparency for trace of P1
+        trace_color_theta2 = 'rgba(0, 255, 0, 0.6)'  # Soft green with transparency for trace of P2
+        background_color = 'rgb(17, 17, 17)'  # Very dark (almost black) for the plot background
+        text_color = 'rgba(255, 255, 255, 0.9)'  # White text color for better visibility in dark mode
+        grid_color = 'rgba(255, 255, 255, 0.3)'  # Light grey for grid lines
+
+    elif appearance == 'light':
+        pendulum_color = '#4410AD'  # Dark blue for better visibility against light background
+        trace_color_theta1 = '#F4762F'  # Dark orange for a vivid contrast for trace of P1
+        trace_color_theta2 = '#4EC5AE'  # Dark green for trace of P2
+        background_color = 'rgb(255, 255, 255)'  # White for the plot background
+        text_color = 'rgb(0, 0, 0)'  # Black text color for better visibility in light mode
+        grid_color = 'rgba(0, 0, 0, 0.1)'  # Light black (gray) for grid lines, with transparency for subtlety
+
+    else:
+        print("Invalid appearance setting. Please choose 'dark' or 'light'.")
+        return None  # Exit the function if invalid appearance
+
+    # Create figure with initial trace
+    fig = go.Figure(
+        data=[go.Scatter(
+            x=[0, x_1[0], x_2[0]],
+            y=[0, y_1[0], y_2[0]],
+            mode='lines+markers',
+            name='Pendulum',
+            line=dict(width=2, color=pendulum_color),
+            marker=dict(size=10, color=pendulum_color)
+        )]
+    )
+
+    # If trace is True, add path traces
+    if trace:
+        # Client-side animations fill the paths in the browser from the packed positions
+        path_1 = go.Scatter(
+            x=[] if client_side else x_1, y=[] if client_side else y_1,
+            mode='lines',
+            name='Path of P1',
+            line=dict(width=1, color=trace_color_theta1),
+        )
+        path_2 = go.Scatter(
+            x=[] if client_side else x_2, y=[] if client_side else y_2,
+            mode='lines',
+            name='Path of P2',
+            line=dict(width=1, color=trace_color_theta2),
+        )
+        fig.add_trace(path_1)
+        fig.add_trace(path_2)
+
+    # Calculate the max extent based on the precomputed positions
+    max_extent = extent if extent is not None else max(
+        np.max(np.abs(x_1)),
+        np.max(np.abs(y_1)),
+        np.max(np.abs(x_2)),
+        np.max(np.abs(y_2))
+    )
+
+    # Add padding to the max extent
+    padding = 0.1 * max_extent  # 10% padding
+    axis_range_with_padding = [-max_extent - padding, max_extent + padding]
+
+    if client_side:
+        # The browser animates the packed positions; Plotly only reports the click
+        play_button = dict(label="Play", method="skip", args=[None])
+    else:
+        # Add frames to the animation
+        step = frame_step
+        frames = [go.Frame(data=[go.Scatter(x=[0, x_1[k], x_2[k]], y=[0, y_1[k], y_2[k]],
+                                            mode='lines+markers',
+                                            line=dict(width=2))])
+                  for k in range(0, len(x_1), step)]  # Use a step to reduce the number of frames
+        fig.frames = frames
+        play_button = dict(
+            label="Play",
+            method="animate",
+            args=[None, {"frame": {"duration": 33, "redraw": True}, "fromcurrent": True,
+                        "mode": "immediate",
+                        'label': 'Play',
+                        'font': {'size': 14, 'color': 'black'},
+                        'bgcolor': 'lightblue'
+            }],
+        )
+
+    # Define the base layout configuration
+    base_layout = dict(
+        plot_bgcolor=background_color,
+        paper_bgcolor=background_color,
+        xaxis=dict(
+            showgrid=True, gridwidth=1, gridcolor=grid_color,
+            range=axis_range_with_padding,
+            autorange=False, zeroline=False, tickcolor=text_color,
+            tickfont=dict(size=12, color=text_color),
+        ),
+        yaxis=dict(
+            showgrid=True, gridwidth=1, gridcolor=grid_color,
+            range=axis_range_with_padding,
+            autorange=False, zeroline=False,
+            scaleanchor='x', scaleratio=1,
+            tickcolor=text_color,
+            tickfont=dict(size=12, color=text_color),
+        ),
+        autosize=False,
+        width=fig_width,
+        height=fig_height,
+        updatemenus=[{
+            'type': 'buttons',
+            'buttons': [play_button],
+            'direction': "left",
+            'pad': {"r": 10, "t": 10},  # Adjust padding if needed
+            'showactive': False,
+            'type': 'buttons',
+            'x': 0.05,  # Position for x
+            'y': 0.95,  # Position for y,(the top of the figure)
+            'xanchor': "left",
+            'yanchor': "top"
+        }],
+        margin=dict(l=20, r=20, t=20, b=20),
+    )
+    # Update the layout based on the 'static' argument
+    if static:
+        static_updates = dict(
+            xaxis_fixedrange=True,  # Disables horizontal zoom/pan
+            yaxis_fixedrange=True,  # Disables vertical zoom/pan
+            dragmode=False,         # Disables dragging
+            showlegend=False        # Hides legend
+        )
+        fig.update_layout(**base_layout, **static_updates)
+    else:
+        fig.update_layout(**base_layout)
+
+    return fig
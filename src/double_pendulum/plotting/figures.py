@@ -0,0 +1,159 @@
+import numpy as np
+import plotly.graph_objs as go
+
+
+# Traces longer than this are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_THRESHOLD = 2000
+
+THETA1_COLOR = '#F4762F'
+THETA2_COLOR = '#4EC5AE'
+PHASE_PATH_COLOR = '#4410AD'
+
+AXIS_STYLE = dict(
+    title=dict(font=dict(family="Red Hat Display, sans-serif", size=14, color="black")),
+    showgrid=True,
+    gridcolor="lightgrey",
+    showline=True,
+    mirror='ticks',
+    ticks='inside',
+    tickfont=dict(size=10),
+    zeroline=False,
+    fixedrange=True,
+)
+
+# ``template='none'`` keeps the default Plotly template (~10 kB) out of every payload
+FIGURE_LAYOUT = dict(
+    template='none',
+    paper_bgcolor="white",
+    plot_bgcolor="white",
+    autosize=True,
+    hovermode='closest',
+    margin=dict(l=20, r=20, t=20, b=20),
+    dragmode=False,
+    showlegend=False,
+)
+
+
+def _line(x, y, name, color, webgl):
+    # Screen resolution does not need float64; float32 halves the typed-array payload
+    x = np.asarray(x, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float32)
+    if webgl is None:
+        webgl = len(x) > WEBGL_THRESHOLD
+    scatter = go.Scattergl if webgl else go.Scatter
+    return scatter(x=x, y=y, mode='lines', name=name, line=dict(width=2, color=color))
+
+
+def _axis(title):
+    axis = dict(AXIS_STYLE)
+    axis['title'] = dict(AXIS_STYLE['title'], text=title)
+    return axis
+
+
+def time_graph_figure(times, states, width=None, height=480, webgl=None):
+    """
+    Build the angular displacement versus time figure directly from solution arrays.
+
+    Parameters:
+        times (array_like): (T,) sample times in seconds.
+        states (array_like): (T, 4) states in radians; only the angles are plotted.
+        width, height (int): Figure size in pixels; ``width=None`` follows the container.
+        webgl (bool, optional): Force ``Scattergl`` on or off (default: on above ``WEBGL_THRESHOLD`` points).
+    """
+    angles = np.rad2deg(np.asarray(states)[:, :2])
+    fig = go.Figure(data=[
+        _line(times, angles[:, 0], "θ1", THETA1_COLOR, webgl),
+        _line(times, angles[:, 1], "θ2", THETA2_COLOR, webgl),
+    ])
+    fig.update_layout(
+        **FIGURE_LAYOUT,
+        width=width,
+        height=height,
+        xaxis=_axis('Time / seconds'),
+        yaxis=_axis('Angular displacement / degrees'),
+    )
+    return fig
+
+
+def phase_path_figure(states, width=600, height=600, webgl=None):
+    """
+    Build the phase path (θ1 against θ2) figure directly from solution arrays.
+
+    Arguments are as for ``time_graph_figure``.
+    """
+    angles = np.rad2deg(np.asarray(states)[:, :2])
+    fig = go.Figure(data=[_line(angles[:, 0], angles[:, 1], "Phase Path", PHASE_PATH_COLOR, webgl)])
+    fig.update_layout(
+        **FIGURE_LAYOUT,
+        width=width,
+        height=height,
+        xaxis=_axis('θ1 / degrees'),
+        yaxis=_axis('θ2 / degrees'),
+    )
+    return fig
+
+
+def flip_map_figure(theta1, theta2, times, max_time, step=0.01, width=None, height=600):
+    """
+    Build the time-to-first-flip heatmap over a grid of initial angles.
+
+    Parameters:
+        theta1, theta2 (array_like): Grid angles of the columns and rows, in degrees.
+        times (array_like): (rows, columns) flip times in seconds; ``inf`` (no flip) and
+            NaN (not computed yet) cells are left blank.
+        max_time (float): Integration limit of the map; with ``step`` it bounds the
+            logarithmic colour scale.
+    """
+    times = np.asarray(times, dtype=np.float32)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(np.isfinite(times), np.log10(times), np.nan).astype(np.float32)
+    ticks = [value for value in (0.01, 0.1, 1, 10, 100, 1000) if step <= value <= max_time]
+    fig = go.Figure(data=[go.Heatmap(
+        x=np.asarray(theta1, dtype=np.float32),
+        y=np.asarray(theta2, dtype=np.float32),
+        z=z,
+        zmin=np.log10(step),
+        zmax=np.log10(max_time),
+        colorscale='Viridis',
+        colorbar=dict(title=dict(text='Time to flip / s'), tickvals=np.log10(ticks).tolist(),
+                      ticktext=[f'{value:g}' for value in ticks]),
+        hovertemplate='θ1 %{x:.1f}°<br>θ2 %{y:.1f}°<br>log10 t %{z:.2f}<extra></extra>',
+    )])
+    fig.update_layout(
+        **FIGURE_LAYOUT,
+        width=width,
+        height=height,
+        xaxis=_axis('Initial θ1 / degrees'),
+        yaxis=dict(_axis('Initial θ2 / degrees'), scaleanchor='x'),
+    )
+    return fig
+
+
+def ftle_figure(theta1, theta2, field, zmin=None, zmax=None, colorscale='Magma', width=None, height=600):
+    """
+    Build the finite-time Lyapunov exponent heatmap over a grid of initial angles.
+
+    Parameters:
+        theta1, theta2 (array_like): Grid angles of the columns and rows, in degrees.
+        field (array_like): (rows, columns) exponents in 1/s; NaN cells (not computed yet) are blank.
+        zmin, zmax (float, optional): Colour scale limits (default: the field's range).
+        colorscale (str): Any Plotly named colour scale.
+    """
+    fig = go.Figure(data=[go.Heatmap(
+        x=np.asarray(theta1, dtype=np.float32),
+        y=np.asarray(theta2, dtype=np.float32),
+        z=np.asarray(field, dtype=np.float32),
+        zmin=zmin,
+        zmax=zmax,
+        colorscale=colorscale,
+        colorbar=dict(title=dict(text='FTLE / s⁻¹')),
+        hovertemplate='θ1 %{x:.1f}°<br>θ2 %{y:.1f}°<br>FTLE %{z:.3f} s⁻¹<extra></extra>',
+    )])
+    fig.update_layout(
+        **FIGURE_LAYOUT,
+        width=width,
+        height=height,
+        xaxis=_axis('Initial θ1 / degrees'),
+        yaxis=dict(_axis('Initial θ2 / degrees'), scaleanchor='x'),
+    )
+    return fig
@@ -1,19 +1,10 @@
-import matplotlib.pyplot as plt
-import plotly.tools as tls
+from .figures import phase_path_figure
 
 
 def generate_pendulum_figures(pendulum, fig_width, fig_height):
     pendulum.precompute_positions()
     animation = pendulum.animate_pendulum(trace=True, fig_width=fig_width, fig_height=fig_height, static=True)
-    matplotlib_phase_fig = pendulum.phase_path()
-    phase_fig = tls.mpl_to_plotly(matplotlib_phase_fig)
-    phase_fig.update_layout(
-        autosize=True,
-        margin=dict(l=20, r=20, t=20, b=20),
-        width=fig_width,
-        height=fig_height,
-    )
-    plt.close(matplotlib_phase_fig)
+    phase_fig = phase_path_figure(pendulum.sol, width=fig_width, height=fig_height)
     return animation, phase_fig
 
 
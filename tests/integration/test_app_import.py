@@ -1,8 +1,16 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
 from flask import Flask
 from app.content.routes import APP_TITLE
 from app.pages.registry import get_layout_for_path
 
 
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
 def test_app_import_exposes_dash_app_without_starting_server():
     import pendulum_app
 
@@ -23,3 +31,30 @@ def test_public_routes_return_layout_components():
         layout = get_layout_for_path(pathname)
         assert layout is not None
         assert hasattr(layout, "children")
+
+
+# Seconds the app may take to import on top of Dash, Flask and the Bootstrap components
+IMPORT_BUDGET_SECONDS = 1.0
+DEFERRED_MODULES = ["matplotlib", "scipy", "sympy", "src.double_pendulum.models"]
+
+IMPORT_PROBE = f"""
+import json, sys, time
+import dash, dash_bootstrap_components, flask
+start = time.perf_counter()
+import pendulum_app
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "loaded": [name for name in {DEFERRED_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def test_app_import_defers_numerical_and_plotting_modules_and_stays_within_budget():
+    # A fresh interpreter: the test session has long since imported everything
+    result = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=REPO_ROOT, capture_output=True, text=True,
+                            check=True)
+    probe = json.loads(result.stdout.splitlines()[-1])
+
+    assert probe["loaded"] == []
+    assert probe["seconds"] < IMPORT_BUDGET_SECONDS
+
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+import sympy as sp
+
+from src.double_pendulum.math.functions import M1, M2, g, l1, l2, m1, m2, t
+from src.double_pendulum.models import compiled
+
+
+SIMPLE_PARAMETERS = {l1: 1.3, l2: 0.7, m1: 2.0, m2: 0.5, g: 9.81}
+COMPOUND_PARAMETERS = {l1: 1.3, l2: 0.7, M1: 2.0, M2: 0.5, g: 9.81}
+STATE = (0.4, -1.1, 0.8, -0.3)
+
+
+@pytest.mark.parametrize("formulation", ["lagrangian", "hamiltonian"])
+@pytest.mark.parametrize(
+    ("model", "parameters"),
+    [("simple", SIMPLE_PARAMETERS), ("compound", COMPOUND_PARAMETERS)],
+)
+def test_state_kernel_matches_substituted_symbolic_equations(formulation, model, parameters):
+    _, *rhs = compiled.system_equations(formulation, model)
+    state_functions = compiled.STATE_FUNCTIONS[formulation]
+    substitutions = dict(zip(state_functions, STATE))
+    expected = [float(sp.sympify(expr).subs(parameters).subs(substitutions)) for expr in rhs]
+
+    kernel = compiled.state_kernel(formulation, model)
+    values = compiled.parameter_values(parameters, formulation, model)
+    out = np.empty(4)
+
+    assert kernel(0.0, np.array(STATE), out, values) is out
+    np.testing.assert_allclose(out, expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize("formulation", ["lagrangian", "hamiltonian"])
+def test_vectorized_kernel_matches_scalar_kernel_row_by_row(formulation):
+    rng = np.random.default_rng(0)
+    states = rng.uniform(-2.0, 2.0, size=(5, 4))
+    values = compiled.parameter_values(SIMPLE_PARAMETERS, formulation, "simple")
+    scalar = compiled.state_kernel(formulation, "simple")
+    vectorized = compiled.state_kernel(formulation, "simple", vectorized=True)
+
+    batch = vectorized(0.0, states, np.empty_like(states), values)
+
+    for row, state in zip(batch, states):
+        np.testing.assert_allclose(row, scalar(0.0, state, np.empty(4), values), rtol=1e-12)
+
+
+def test_kernel_is_generated_once_with_shared_subexpressions():
+    kernel = compiled.state_kernel("lagrangian", "simple")
+
+    assert kernel is compiled.state_kernel("lagrangian", "simple")
+    assert kernel is not compiled.state_kernel("hamiltonian", "simple")
+    assert kernel.source.count("math.cos(") == 1
+
+
+def test_parameter_values_accept_names_and_fill_unused_parameters():
+    by_name = {str(symbol): value for symbol, value in SIMPLE_PARAMETERS.items()}
+
+    values = compiled.parameter_values(by_name, "lagrangian", "simple")
+
+    assert values == (1.3, 0.7, 2.0, 0.5, 0.0, 0.0, 9.81)
+
+
+def test_missing_required_parameter_raises_value_error():
+    parameters = dict(SIMPLE_PARAMETERS)
+    del parameters[m2]
+
+    with pytest.raises(ValueError, match="m2"):
+        compiled.parameter_values(parameters, "lagrangian", "simple")
+
+
+@pytest.mark.parametrize("formulation", ["lagrangian", "hamiltonian"])
+@pytest.mark.parametrize(
+    ("model", "parameters"),
+    [("simple", SIMPLE_PARAMETERS), ("compound", COMPOUND_PARAMETERS)],
+)
+def test_jacobian_kernel_matches_central_differences_of_state_kernel(formulation, model, parameters):
+    values = compiled.parameter_values(parameters, formulation, model)
+    kernel = compiled.state_kernel(formulation, model)
+    jacobian = compiled.jacobian_kernel(formulation, model)(0.0, np.array(STATE), np.empty((4, 4)), values)
+
+    step = 1e-6
+    expected = np.empty((4, 4))
+    for j in range(4):
+        offset = np.zeros(4)
+        offset[j] = step
+        forward = kernel(0.0, np.array(STATE) + offset, np.empty(4), values)
+        backward = kernel(0.0, np.array(STATE) - offset, np.empty(4), values)
+        expected[:, j] = (forward - backward) / (2 * step)
+
+    np.testing.assert_allclose(jacobian, expected, rtol=1e-6, atol=1e-6)
+
+
+def test_implicit_methods_are_detected_by_name_and_class():
+    from scipy.integrate import RK45, Radau
+
+    assert compiled.uses_jacobian("Radau")
+    assert compiled.uses_jacobian("LSODA")
+    assert compiled.uses_jacobian(Radau)
+    assert not compiled.uses_jacobian("RK45")
+    assert not compiled.uses_jacobian(RK45)
+
+
+def test_warm_up_builds_every_model_kernel_ahead_of_the_first_simulation():
+    factories = (compiled.state_kernel, compiled.jacobian_kernel, compiled.energy_kernel)
+    for factory in factories:
+        factory.cache_clear()
+    compiled.warm_up(formulations=("lagrangian",), models=("simple",))
+
+    assert [factory.cache_info().currsize for factory in factories] == [2, 2, 2]
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from src.double_pendulum.math.functions import M1, M2, g, l1, l2, m1, m2
+from src.double_pendulum.models import DoublePendulumHamiltonian, DoublePendulumLagrangian
+from src.double_pendulum.models.energy import MAX_TIGHTENINGS
+from src.double_pendulum.numerics import rk4
+
+
+SIMPLE_PARAMETERS = {l1: 1.0, l2: 1.0, m1: 1.0, m2: 1.0, g: 9.81}
+COMPOUND_PARAMETERS = {l1: 1.0, l2: 1.0, M1: 1.0, M2: 1.0, g: 9.81}
+CHAOTIC = [120.0, -30.0, 0.0, 0.0]
+
+
+@pytest.mark.parametrize("model_class", [DoublePendulumLagrangian, DoublePendulumHamiltonian])
+@pytest.mark.parametrize("model, parameters", [("simple", SIMPLE_PARAMETERS), ("compound", COMPOUND_PARAMETERS)])
+def test_tight_solve_ivp_runs_conserve_energy(model_class, model, parameters):
+    pendulum = model_class(parameters, CHAOTIC, [0, 20, 2001], model=model, rtol=1e-10, atol=1e-12)
+
+    assert pendulum.energy().shape == (2001,)
+    assert pendulum.max_energy_drift < 1e-6
+
+
+def test_both_formulations_report_the_same_energy():
+    # Released from rest the momenta vanish too, so both runs start from the same state and energy
+    lagrangian = DoublePendulumLagrangian(SIMPLE_PARAMETERS, CHAOTIC, [0, 5, 501], rtol=1e-10, atol=1e-12)
+    hamiltonian = DoublePendulumHamiltonian(SIMPLE_PARAMETERS, CHAOTIC, [0, 5, 501], rtol=1e-10, atol=1e-12)
+
+    assert lagrangian.energy_monitor.initial == pytest.approx(hamiltonian.energy_monitor.initial, rel=1e-12)
+    np.testing.assert_allclose(hamiltonian.energy(), lagrangian.energy(), rtol=1e-7)
+
+
+def test_loose_runs_report_their_drift():
+    pendulum = DoublePendulumLagrangian(SIMPLE_PARAMETERS, CHAOTIC, [0, 20, 2001], rtol=1e-3, atol=1e-5)
+    drift = pendulum.energy_drift()
+
+    assert drift[0] == 0.0
+    assert pendulum.max_energy_drift == pytest.approx(drift.max())
+    assert pendulum.max_energy_drift > 1e-3
+    assert not pendulum.stopped_by_energy_drift
+
+
+@pytest.mark.parametrize("model_class", [DoublePendulumLagrangian, DoublePendulumHamiltonian])
+def test_energy_tolerance_stops_the_run_where_the_drift_passes_it(model_class):
+    pendulum = model_class(SIMPLE_PARAMETERS, CHAOTIC, [0, 20, 2001], energy_tolerance=1e-4)
+
+    assert pendulum.stopped_by_energy_drift
+    assert pendulum.trajectory.t_end < 20
+    assert len(pendulum.sol) < 2001
+    # The last accepted step ends on the threshold
+    assert pendulum.energy_drift([pendulum.trajectory.t_end])[0] == pytest.approx(1e-4, rel=1e-3)
+
+
+@pytest.mark.parametrize("chunk_duration", [None, 5.0])
+def test_energy_tolerance_can_tighten_the_solver_tolerances_instead(chunk_duration):
+    pendulum = DoublePendulumLagrangian(SIMPLE_PARAMETERS, CHAOTIC, [0, 20, 2001], energy_tolerance=1e-4,
+                                        on_energy_drift='tighten', chunk_duration=chunk_duration)
+
+    assert not pendulum.stopped_by_energy_drift
+    assert 0 < pendulum.energy_monitor.tightenings <= MAX_TIGHTENINGS
+    assert pendulum.energy_monitor.max_drift <= 1e-4
+
+
+def test_user_events_are_kept_alongside_the_energy_event():
+    def theta1_zero(t, y):
+        return y[0]
+
+    pendulum = DoublePendulumLagrangian(SIMPLE_PARAMETERS, CHAOTIC, [0, 5, 501], energy_tolerance=1e-2,
+                                        events=theta1_zero, rtol=1e-8, atol=1e-10)
+
+    assert not pendulum.stopped_by_energy_drift
+    assert pendulum.trajectory(np.array([5.0])).shape == (1, 4)
+
+
+def test_early_stops_for_other_reasons_are_not_blamed_on_energy_drift():
+    def theta1_zero(t, y):
+        return y[0]
+    theta1_zero.terminal = True
+
+    pendulum = DoublePendulumHamiltonian(SIMPLE_PARAMETERS, CHAOTIC, [0, 5, 501], energy_tolerance=1e-2,
+                                         events=theta1_zero, rtol=1e-8, atol=1e-10)
+
+    assert pendulum.trajectory.t_end < 5
+    assert not pendulum.stopped_by_energy_drift
+
+
+def test_energy_drift_from_a_zero_energy_start_is_absolute():
+    # Both arms horizontal and at rest: E0 is zero up to rounding
+    pendulum = DoublePendulumLagrangian(SIMPLE_PARAMETERS, [90.0, 90.0, 0.0, 0.0], [0, 2, 201],
+                                        rtol=1e-10, atol=1e-12)
+
+    assert abs(pendulum.energy_monitor.initial) < 1e-12
+    assert pendulum.max_energy_drift < 1e-6
+
+
+def test_energy_tolerance_is_rejected_for_invalid_settings():
+    with pytest.raises(ValueError, match="solve_ivp"):
+        DoublePendulumLagrangian(SIMPLE_PARAMETERS, CHAOTIC, [0, 1, 11], integrator=rk4, energy_tolerance=1e-4)
+    with pytest.raises(ValueError, match="energy drift action"):
+        DoublePendulumHamiltonian(SIMPLE_PARAMETERS, CHAOTIC, [0, 1, 11], on_energy_drift='ignore')
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from src.double_pendulum.math.functions import g, l1, l2, m1, m2
+from src.double_pendulum.models import DoublePendulumEnsemble, DoublePendulumHamiltonian, DoublePendulumLagrangian
+
+
+SIMPLE_PARAMETERS = {l1: 1.0, l2: 1.0, m1: 1.0, m2: 1.0, g: 9.81}
+TIME_VECTOR = [0.0, 2.0, 21]
+INITIAL_CONDITIONS = np.array([
+    [10.0, 20.0, 0.0, 0.0],
+    [90.0, -45.0, 10.0, 0.0],
+    [120.0, 150.0, 0.0, -30.0],
+])
+
+
+@pytest.mark.parametrize(
+    ("formulation", "model_class"),
+    [("lagrangian", DoublePendulumLagrangian), ("hamiltonian", DoublePendulumHamiltonian)],
+)
+def test_ensemble_matches_individual_model_runs(formulation, model_class):
+    tolerances = dict(rtol=1e-10, atol=1e-10)
+    ensemble = DoublePendulumEnsemble(SIMPLE_PARAMETERS, INITIAL_CONDITIONS, TIME_VECTOR,
+                                      formulation=formulation, **tolerances)
+
+    assert ensemble.sol.shape == (len(INITIAL_CONDITIONS), TIME_VECTOR[2], 4)
+    for conditions, trajectory in zip(INITIAL_CONDITIONS, ensemble.sol):
+        single = model_class(SIMPLE_PARAMETERS, conditions, TIME_VECTOR, **tolerances)
+        np.testing.assert_allclose(trajectory, single.sol, atol=1e-7)
+
+
+def test_ensemble_accepts_per_trajectory_parameters_and_positions():
+    lengths = np.array([0.5, 1.0, 2.0])
+    parameters = {**SIMPLE_PARAMETERS, l1: lengths}
+    ensemble = DoublePendulumEnsemble(parameters, np.zeros((3, 4)), TIME_VECTOR)
+    ensemble.precompute_positions()
+
+    assert ensemble.precomputed_positions.shape == (4, 3, TIME_VECTOR[2])
+    np.testing.assert_allclose(ensemble.precomputed_positions[1][:, 0], -lengths)
+    np.testing.assert_allclose(ensemble.separation(), 0.0, atol=1e-12)
+
+
+def test_ensemble_rejects_badly_shaped_initial_conditions():
+    with pytest.raises(ValueError, match="shape"):
+        DoublePendulumEnsemble(SIMPLE_PARAMETERS, np.zeros((3, 3)), TIME_VECTOR)
+
+
+def test_shared_step_keeps_a_diverging_trajectory_as_accurate_as_a_single_run():
+    # One chaotic pendulum among many at rest: the resting ones must not loosen its error control
+    conditions = np.zeros((400, 4))
+    conditions[0] = [120.0, -30.0, 0.0, 0.0]
+    time_vector = [0.0, 5.0, 51]
+    reference = DoublePendulumLagrangian(SIMPLE_PARAMETERS, conditions[0], time_vector, rtol=1e-12, atol=1e-12)
+    single = DoublePendulumLagrangian(SIMPLE_PARAMETERS, conditions[0], time_vector, rtol=1e-6, atol=1e-8)
+    ensemble = DoublePendulumEnsemble(SIMPLE_PARAMETERS, conditions, time_vector, rtol=1e-6, atol=1e-8)
+
+    single_error = np.abs(single.sol - reference.sol).max()
+    ensemble_error = np.abs(ensemble.sol[0] - reference.sol).max()
+    assert ensemble_error <= 2 * single_error
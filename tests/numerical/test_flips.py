@@ -0,0 +1,41 @@
+import numpy as np
+
+from src.double_pendulum.chaos import FlipMap, flip_times
+from src.double_pendulum.math.functions import g, l1, l2, m1, m2
+
+
+SIMPLE_PARAMETERS = {l1: 1.0, l2: 1.0, m1: 1.0, m2: 1.0, g: 9.81}
+
+
+def test_low_energy_starts_never_flip_and_high_energy_starts_do():
+    times = flip_times(SIMPLE_PARAMETERS, [[10.0, 10.0, 0.0, 0.0], [170.0, 170.0, 0.0, 0.0],
+                                           [-120.0, 160.0, 0.0, 0.0]], max_time=20.0)
+
+    assert times[0] == np.inf
+    assert np.all(np.isfinite(times[1:])) and np.all(times[1:] > 0)
+
+
+def test_batched_flip_times_match_individual_runs():
+    states = [[angle, 150.0, 0.0, 0.0] for angle in (-150.0, -60.0, 30.0, 120.0)]
+    batch = flip_times(SIMPLE_PARAMETERS, states, max_time=5.0)
+
+    np.testing.assert_array_equal(batch, [flip_times(SIMPLE_PARAMETERS, [state], max_time=5.0)[0]
+                                          for state in states])
+
+
+def test_flip_map_resumes_from_the_tiles_already_written(tmp_path):
+    settings = dict(shape=(8, 10), max_time=3.0, tile_size=4, directory=tmp_path)
+    partial = FlipMap(SIMPLE_PARAMETERS, **settings)
+    for tile in partial.tiles()[:2]:
+        partial.compute_tile(tile)
+
+    resumed = FlipMap(SIMPLE_PARAMETERS, **settings)
+    assert resumed.path == partial.path
+    assert resumed.pending_tiles() == partial.tiles()[2:]
+    values = np.array(resumed.compute())
+
+    assert resumed.complete() and not np.isnan(values).any()
+    reference = FlipMap(SIMPLE_PARAMETERS, **dict(settings, directory=tmp_path / "reference")).compute()
+    np.testing.assert_array_equal(values, reference)
+    expected = flip_times(SIMPLE_PARAMETERS, [[resumed.theta1[9], resumed.theta2[7], 0.0, 0.0]], max_time=3.0)
+    np.testing.assert_allclose(values[7, 9], expected[0], rtol=1e-6)
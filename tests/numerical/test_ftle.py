@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from src.double_pendulum.chaos import FTLEField, TangentSystem
+from src.double_pendulum.math.functions import g, l1, l2, m1, m2
+from src.double_pendulum.models.compiled import parameter_values, state_kernel
+from src.double_pendulum.numerics import BoundSystem, rk4
+
+
+SIMPLE_PARAMETERS = {l1: 1.0, l2: 1.0, m1: 1.0, m2: 1.0, g: 9.81}
+
+
+def test_tangent_field_matches_a_finite_difference_flow_map_gradient(tmp_path):
+    field = FTLEField(SIMPLE_PARAMETERS, shape=(2, 3), theta1_range=(-60.0, 60.0), theta2_range=(20.0, 140.0),
+                      duration=2.0, method='tangent', directory=tmp_path)
+    values = field.compute()
+
+    flow = BoundSystem(state_kernel("lagrangian", "simple", vectorized=True),
+                       parameter_values(SIMPLE_PARAMETERS, "lagrangian", "simple"))
+    times = np.linspace(0.0, 2.0, 201)
+    state = np.deg2rad([[field.theta1[2], field.theta2[1], 0.0, 0.0]])
+    epsilon = 1e-6
+    gradient = np.column_stack([
+        (rk4(flow, times, state + epsilon * unit)[-1, 0] - rk4(flow, times, state - epsilon * unit)[-1, 0])
+        / (2 * epsilon) for unit in np.eye(4)])
+    expected = np.log(np.linalg.svd(gradient, compute_uv=False)[0]) / 2.0
+    np.testing.assert_allclose(values[1, 2], expected, rtol=1e-4)
+
+
+def test_stencil_field_approaches_the_angle_restricted_gradient_on_a_fine_grid(tmp_path):
+    field = FTLEField(SIMPLE_PARAMETERS, shape=(3, 3), theta1_range=(40.0, 40.02), theta2_range=(-30.0, -29.98),
+                      duration=2.0, method='stencil', directory=tmp_path)
+    values = field.compute()
+
+    system = TangentSystem.for_model(SIMPLE_PARAMETERS, n_vectors=2)
+    times = np.linspace(0.0, 2.0, 201)
+    z = rk4(system, times, system.initial(np.deg2rad([[40.01, -29.99, 0.0, 0.0]])))[-1]
+    expected = np.log(np.linalg.svd(system.vectors(z)[0].T, compute_uv=False)[0]) / 2.0
+    np.testing.assert_allclose(values[1, 1], expected, rtol=1e-4)
+
+
+def test_fields_are_cached_and_reopened_without_recomputation(tmp_path):
+    settings = dict(shape=(4, 4), duration=0.5, tile_size=2, directory=tmp_path)
+    first = FTLEField(SIMPLE_PARAMETERS, **settings)
+    values = np.array(first.compute())
+
+    again = FTLEField(SIMPLE_PARAMETERS, **settings)
+    assert again.complete() and again.pending_tiles() == []
+    np.testing.assert_array_equal(again.open(), values)
+    assert FTLEField(SIMPLE_PARAMETERS, **dict(settings, method='tangent')).path != first.path
+
+
+def test_unknown_methods_are_rejected():
+    with pytest.raises(ValueError, match="Invalid FTLE method"):
+        FTLEField(SIMPLE_PARAMETERS, method='spline')
@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from src.double_pendulum.math.functions import g, l1, l2, m1, m2
+from src.double_pendulum.models import DoublePendulumEnsemble, DoublePendulumHamiltonian, DoublePendulumLagrangian
+from src.double_pendulum.numerics import (BoundSystem, MaskedRK4, dormand_prince, gauss_legendre, implicit_midpoint,
+                                          rk4, tao)
+
+
+SIMPLE_PARAMETERS = {l1: 1.0, l2: 1.0, m1: 1.0, m2: 1.0, g: 9.81}
+INITIAL_CONDITIONS = np.array([
+    [10.0, 20.0, 0.0, 0.0],
+    [120.0, 150.0, 0.0, -30.0],
+])
+
+
+def oscillator(t, y, out):
+    # y = (x, v) rows of independent unit-frequency harmonic oscillators
+    out[..., 0] = y[..., 1]
+    out[..., 1] = -y[..., 0]
+    return out
+
+
+def test_rk4_is_fourth_order_on_harmonic_oscillator():
+    t_eval = np.linspace(0.0, 2 * np.pi, 5)
+    errors = []
+    for max_step in (0.1, 0.05):
+        sol = rk4(oscillator, t_eval, np.array([1.0, 0.0]), max_step=max_step)
+        errors.append(np.hypot(sol[-1, 0] - 1.0, sol[-1, 1]))
+
+    assert sol.shape == (5, 2)
+    assert errors[1] < 1e-5
+    assert errors[0] / errors[1] == pytest.approx(16, rel=0.15)
+
+
+def test_dormand_prince_controls_steps_per_trajectory():
+    calls = []
+
+    def counting_oscillator(t, y, out):
+        calls.append(len(y))
+        return oscillator(t, y, out)
+
+    t_eval = np.linspace(0.0, 10.0, 11)
+    y0 = np.array([[1.0, 0.0], [1e-3, 0.0]])
+    sol = dormand_prince(counting_oscillator, t_eval, y0, rtol=1e-9, atol=1e-12)
+
+    np.testing.assert_allclose(sol[:, 0, 0], np.cos(t_eval), atol=1e-7)
+    np.testing.assert_allclose(sol[:, 1, 0], 1e-3 * np.cos(t_eval), atol=1e-10)
+    # Rows finish independently, so some evaluations cover a single row only
+    assert min(calls) == 1
+
+
+def test_masked_rk4_retires_rows_and_only_steps_active_ones():
+    stepper = MaskedRK4(oscillator, np.array([[1.0, 0.0], [2.0, 0.0], [3.0, 0.0]]), h=0.01)
+    stepper.step()
+    stepper.retire(np.array([False, True, False]))
+    for _ in range(99):
+        stepper.step()
+    states = stepper.finalize()
+
+    assert stepper.n_active == 2
+    np.testing.assert_array_equal(stepper.rows, [0, 2])
+    assert np.isnan(stepper.retired_at[0]) and stepper.retired_at[1] == pytest.approx(0.01)
+    np.testing.assert_allclose(states[[0, 2], 0], [np.cos(1.0), 3 * np.cos(1.0)], atol=1e-9)
+    np.testing.assert_allclose(states[1, 0], 2 * np.cos(0.01), atol=1e-9)
+
+
+def test_bound_system_take_restricts_per_row_parameters():
+    def kernel(t, y, out, params):
+        out[...] = params[0][..., None] * y
+        return out
+
+    system = BoundSystem(kernel, (np.array([1.0, 2.0, 3.0]), 9.81))
+    subset = system.take(np.array([0, 2]))
+
+    np.testing.assert_array_equal(subset.params[0], [1.0, 3.0])
+    assert subset.params[1] == 9.81
+
+
+@pytest.mark.parametrize("integrator", [implicit_midpoint, gauss_legendre])
+def test_gauss_methods_conserve_oscillator_energy(integrator):
+    # Gauss collocation conserves quadratic invariants exactly, even at a coarse step
+    t_eval = np.linspace(0.0, 100.0, 11)
+    sol = integrator(oscillator, t_eval, np.array([[1.0, 0.0], [0.5, 0.5]]), max_step=0.5)
+
+    energy = np.sum(sol ** 2, axis=-1)
+    np.testing.assert_allclose(energy, np.broadcast_to(energy[0], energy.shape), rtol=1e-10)
+
+
+def test_tao_is_second_order_on_non_separable_hamiltonian():
+    # H = (q^2 + 1)(p^2 + 1) / 2 cannot be split into T(p) + V(q)
+    def system(t, y, out):
+        q, p = y[..., 0], y[..., 1]
+        out[..., 0] = (q ** 2 + 1) * p
+        out[..., 1] = -(p ** 2 + 1) * q
+        return out
+
+    t_eval = np.array([0.0, 5.0])
+    y0 = np.array([1.0, 0.5])
+    reference = gauss_legendre(system, t_eval, y0, max_step=1e-3)[-1]
+    errors = [np.linalg.norm(tao(system, t_eval, y0, max_step=h)[-1] - reference) for h in (0.01, 0.005)]
+
+    assert errors[0] / errors[1] == pytest.approx(4, rel=0.25)
+
+
+def test_tao_is_limited_to_the_hamiltonian_formulation():
+    time_vector = [0.0, 1.0, 11]
+    pendulum = DoublePendulumHamiltonian(SIMPLE_PARAMETERS, INITIAL_CONDITIONS[0], time_vector,
+                                         integrator=tao, max_step=1e-3)
+    assert pendulum.sol.shape == (11, 4)
+    with pytest.raises(ValueError):
+        DoublePendulumLagrangian(SIMPLE_PARAMETERS, INITIAL_CONDITIONS[0], time_vector, integrator=tao)
+
+
+@pytest.mark.parametrize("model_class", [DoublePendulumLagrangian, DoublePendulumHamiltonian])
+@pytest.mark.parametrize(
+    ("integrator", "options"),
+    [(rk4, {"max_step": 1e-3}), (dormand_prince, {"rtol": 1e-10, "atol": 1e-10}),
+     (gauss_legendre, {"max_step": 1e-3})],
+)
+def test_model_classes_accept_numerics_integrators(model_class, integrator, options):
+    time_vector = [0.0, 1.0, 11]
+    reference = model_class(SIMPLE_PARAMETERS, INITIAL_CONDITIONS[1], time_vector, rtol=1e-11, atol=1e-11)
+    pendulum = model_class(SIMPLE_PARAMETERS, INITIAL_CONDITIONS[1], time_vector,
+                           integrator=integrator, **options)
+
+    assert pendulum.sol.shape == (11, 4)
+    np.testing.assert_allclose(pendulum.sol, reference.sol, atol=1e-6)
+
+
+@pytest.mark.parametrize(
+    ("integrator", "options"),
+    [(rk4, {"max_step": 1e-3}), (dormand_prince, {"rtol": 1e-10, "atol": 1e-10})],
+)
+def test_ensemble_accepts_numerics_integrators(integrator, options):
+    time_vector = [0.0, 1.0, 11]
+    reference = DoublePendulumEnsemble(SIMPLE_PARAMETERS, INITIAL_CONDITIONS, time_vector, rtol=1e-11, atol=1e-11)
+    ensemble = DoublePendulumEnsemble(SIMPLE_PARAMETERS, INITIAL_CONDITIONS, time_vector,
+                                      integrator=integrator, **options)
+
+    np.testing.assert_allclose(ensemble.sol, reference.sol, atol=1e-6)
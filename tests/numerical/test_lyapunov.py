@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from src.double_pendulum.chaos import TangentSystem, largest_lyapunov_exponents, lyapunov_spectrum
+from src.double_pendulum.math.functions import g, l1, l2, m1, m2
+from src.double_pendulum.models.compiled import parameter_values, state_kernel
+from src.double_pendulum.numerics import BoundSystem, rk4
+
+
+SIMPLE_PARAMETERS = {l1: 1.0, l2: 1.0, m1: 1.0, m2: 1.0, g: 9.81}
+CHAOTIC = [120.0, 150.0, 0.0, 0.0]
+REGULAR = [10.0, 10.0, 0.0, 0.0]
+
+
+@pytest.mark.parametrize("formulation", ["lagrangian", "hamiltonian"])
+def test_tangent_vectors_follow_nearby_trajectories(formulation):
+    system = TangentSystem.for_model(SIMPLE_PARAMETERS, formulation, n_vectors=2)
+    states = np.deg2rad([CHAOTIC, [60.0, -30.0, 20.0, 0.0]])
+    times = np.linspace(0.0, 1.0, 201)
+    tangent = rk4(system, times, system.initial(states))[-1]
+
+    flow = BoundSystem(state_kernel(formulation, "simple", vectorized=True),
+                       parameter_values(SIMPLE_PARAMETERS, formulation, "simple"))
+    epsilon = 1e-7
+    for k in range(2):
+        shifted = states.copy()
+        shifted[:, k] += epsilon
+        difference = (rk4(flow, times, shifted)[-1] - rk4(flow, times, states)[-1]) / epsilon
+        np.testing.assert_allclose(system.vectors(tangent)[:, k], difference, rtol=1e-4, atol=1e-4)
+    np.testing.assert_allclose(tangent[:, :4], rk4(flow, times, states)[-1])
+
+
+def test_hamiltonian_spectrum_comes_in_opposite_pairs():
+    spectrum = lyapunov_spectrum(SIMPLE_PARAMETERS, CHAOTIC, 30.0, formulation="hamiltonian")
+
+    assert spectrum.exponents.shape == (4,) and np.all(np.diff(spectrum.exponents) < 0)
+    assert spectrum.largest > 0.5
+    # Phase-space volume is conserved: the exponents sum to zero, pair by pair
+    assert abs(spectrum.exponents.sum()) < 1e-4
+    assert abs(spectrum.exponents[0] + spectrum.exponents[3]) < 1e-2
+    assert spectrum.history.shape == (len(spectrum.times), 4)
+    # Early estimates are sorted too, whatever order the tangent vectors stretched in
+    assert np.all(np.diff(spectrum.history, axis=-1) <= 0)
+    np.testing.assert_allclose(spectrum.history[-1], spectrum.exponents)
+
+
+def test_batch_largest_exponents_separate_regular_and_chaotic_motion():
+    exponents = largest_lyapunov_exponents(SIMPLE_PARAMETERS, [CHAOTIC, REGULAR], 20.0)
+    spectrum = lyapunov_spectrum(SIMPLE_PARAMETERS, CHAOTIC, 20.0)
+
+    assert exponents.shape == (2,)
+    assert exponents[1] < exponents[0] / 5
+    np.testing.assert_allclose(exponents[0], spectrum.largest, rtol=1e-6)
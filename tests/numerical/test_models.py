@@ -1,8 +1,10 @@
 import numpy as np
 import pytest
+from scipy.integrate import solve_ivp
 
 from src.double_pendulum.math.functions import M1, M2, g, l1, l2, m1, m2
 from src.double_pendulum.models import DoublePendulumHamiltonian, DoublePendulumLagrangian
+from src.double_pendulum.numerics import rk4
 
 
 SIMPLE_PARAMETERS = {l1: 1.0, l2: 1.0, m1: 1.0, m2: 1.0, g: 9.81}
@@ -92,3 +94,90 @@ def test_static_vertical_initial_condition_positions_are_consistent():
     np.testing.assert_allclose(y_1[0], -SIMPLE_PARAMETERS[l1], atol=1e-12)
     np.testing.assert_allclose(x_2[0], 0.0, atol=1e-12)
     np.testing.assert_allclose(y_2[0], -(SIMPLE_PARAMETERS[l1] + SIMPLE_PARAMETERS[l2]), atol=1e-12)
+
+
+@pytest.mark.parametrize("model_class", [DoublePendulumLagrangian, DoublePendulumHamiltonian])
+@pytest.mark.parametrize("method", ["Radau", "BDF", "LSODA"])
+def test_implicit_methods_use_analytic_jacobian_and_agree_with_default(model_class, method):
+    time_vector = [0.0, 1.0, 11]
+    reference = model_class(SIMPLE_PARAMETERS, INITIAL_CONDITIONS_DEGREES, time_vector,
+                            rtol=1e-10, atol=1e-10)
+    implicit = model_class(SIMPLE_PARAMETERS, INITIAL_CONDITIONS_DEGREES, time_vector,
+                           method=method, rtol=1e-10, atol=1e-10)
+
+    np.testing.assert_allclose(implicit.sol, reference.sol, atol=1e-6)
+
+
+@pytest.mark.parametrize("model_class", [DoublePendulumLagrangian, DoublePendulumHamiltonian])
+def test_dense_trajectory_is_evaluated_on_demand_at_any_resolution(model_class):
+    time_vector = [0.0, 2.0, 5]
+    pendulum = model_class(SIMPLE_PARAMETERS, INITIAL_CONDITIONS_DEGREES, time_vector, rtol=1e-10, atol=1e-10)
+    fine = model_class(SIMPLE_PARAMETERS, INITIAL_CONDITIONS_DEGREES, [0.0, 2.0, 401], rtol=1e-10, atol=1e-10)
+
+    times, states = pendulum.trajectory.sample(rate=200)
+    np.testing.assert_allclose(times, fine.time)
+    np.testing.assert_allclose(states, fine.sol, atol=1e-8)
+    assert pendulum.trajectory(0.5).shape == (4,)
+    with pytest.raises(ValueError):
+        pendulum.trajectory([2.5])
+
+    pendulum.precompute_positions(times[::10])
+    assert pendulum.precomputed_positions.shape == (4, 41)
+
+
+def test_grid_integrators_are_interpolated_between_outputs():
+    coarse = DoublePendulumLagrangian(SIMPLE_PARAMETERS, INITIAL_CONDITIONS_DEGREES, [0.0, 1.0, 21],
+                                      integrator=rk4, max_step=1e-3)
+    reference = DoublePendulumLagrangian(SIMPLE_PARAMETERS, INITIAL_CONDITIONS_DEGREES, [0.0, 1.0, 41],
+                                         rtol=1e-11, atol=1e-11)
+
+    # Odd samples of the reference fall midway between the coarse outputs
+    np.testing.assert_allclose(coarse.trajectory(reference.time), reference.sol, atol=1e-5)
+
+
+def test_client_side_animation_ships_no_frames_or_path_data():
+    pendulum = DoublePendulumLagrangian(SIMPLE_PARAMETERS, INITIAL_CONDITIONS_DEGREES, [0.0, 1.0, 101])
+    pendulum.precompute_positions()
+
+    server = pendulum.animate_pendulum(trace=True, static=True)
+    client = pendulum.animate_pendulum(trace=True, static=True, client_side=True)
+
+    assert len(server.frames) == 11
+    assert len(client.frames) == 0
+    assert client.layout.updatemenus[0].buttons[0].method == "skip"
+    assert len(client.data[1].x) == 0 and len(client.data[2].x) == 0
+
+
+@pytest.mark.parametrize("model_class", [DoublePendulumLagrangian, DoublePendulumHamiltonian])
+def test_progress_follows_the_integrated_fraction_of_the_time_span(model_class):
+    reports = []
+    model_class(SIMPLE_PARAMETERS, INITIAL_CONDITIONS_DEGREES, [0.0, 2.0, 21], progress=reports.append)
+
+    assert reports and reports == sorted(reports)
+    assert reports[-1] == pytest.approx(1.0, abs=0.1)
+
+
+def test_raising_from_progress_aborts_the_integration():
+    def abort(fraction):
+        if fraction > 0.5:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        DoublePendulumLagrangian(SIMPLE_PARAMETERS, INITIAL_CONDITIONS_DEGREES, [0.0, 2.0, 21],
+                                 integrator=rk4, progress=abort)
+
+
+@pytest.mark.parametrize("integrator", [solve_ivp, rk4])
+def test_chunked_solve_publishes_consecutive_windows_and_matches_a_single_solve(integrator):
+    pieces = []
+    options = dict(rtol=1e-10, atol=1e-10) if integrator is solve_ivp else {}
+    chunked = DoublePendulumLagrangian(SIMPLE_PARAMETERS, INITIAL_CONDITIONS_DEGREES, [0.0, 2.5, 51],
+                                       integrator=integrator, chunk_duration=1.0, on_chunk=pieces.append, **options)
+    single = DoublePendulumLagrangian(SIMPLE_PARAMETERS, INITIAL_CONDITIONS_DEGREES, [0.0, 2.5, 51],
+                                      integrator=integrator, **options)
+
+    assert [(piece.t_start, piece.t_end) for piece in pieces] == pytest.approx([(0, 1), (1, 2), (2, 2.5)])
+    np.testing.assert_allclose(chunked.sol, single.sol, atol=1e-7)
+    # The joined trajectory hands each time to the window that solved it
+    np.testing.assert_array_equal(chunked.trajectory(np.array([1.0, 1.5])),
+                                  [pieces[0](1.0), pieces[1](1.5)])
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from src.double_pendulum.chaos import (CrossingBuffer, PoincareSection, batch_section_crossings,
+                                       energy_surface_states, section_crossings)
+from src.double_pendulum.math.functions import g, l1, l2, m1, m2
+from src.double_pendulum.models.compiled import energy_kernel, parameter_values, state_kernel
+
+
+SIMPLE_PARAMETERS = {l1: 1.0, l2: 1.0, m1: 1.0, m2: 1.0, g: 9.81}
+
+
+def energies(states, formulation="lagrangian"):
+    kernel = energy_kernel(formulation, "simple", vectorized=True)
+    params = parameter_values(SIMPLE_PARAMETERS, formulation, "simple")
+    return kernel(0.0, states, np.empty((len(states), 1)), params)[:, 0]
+
+
+def test_crossing_buffer_grows_and_keeps_rows():
+    buffer = CrossingBuffer(2, capacity=2)
+    for i in range(5):
+        buffer.extend([i, -i])
+    buffer.extend(np.ones((3, 2)))
+
+    assert len(buffer) == 8
+    np.testing.assert_array_equal(buffer.array[:5, 0], np.arange(5))
+    np.testing.assert_array_equal(buffer.array[5:], 1.0)
+
+
+@pytest.mark.parametrize("formulation", ["lagrangian", "hamiltonian"])
+def test_single_trajectory_crossings_lie_on_the_section(formulation):
+    section = PoincareSection.angle(formulation=formulation)
+    crossings = section_crossings(SIMPLE_PARAMETERS, [0.0, 30.0, 60.0, 0.0], section, crossings=20).array
+
+    assert crossings.shape == (20, 5)
+    assert np.all(np.diff(crossings[:, 0]) > 0)
+    np.testing.assert_allclose(np.sin(crossings[:, 1]), 0.0, atol=1e-10)
+    # Upward crossings of theta1 = 0, never of the opposite angle
+    assert np.all(np.cos(crossings[:, 1]) > 0)
+    rates = state_kernel(formulation, "simple", vectorized=True)(
+        0.0, crossings[:, 1:], np.empty((20, 4)), parameter_values(SIMPLE_PARAMETERS, formulation, "simple"))
+    assert np.all(rates[:, 0] > 0)
+    initial = energies(np.deg2rad([[0.0, 30.0, 60.0, 0.0]]), formulation)
+    np.testing.assert_allclose(energies(crossings[:, 1:], formulation), initial[0], rtol=1e-7)
+
+
+def test_energy_surface_states_have_the_requested_energy():
+    states = energy_surface_states(SIMPLE_PARAMETERS, -15.0, [[0.0, angle, 0.0, 20.0] for angle in (-40, 0, 40)])
+
+    np.testing.assert_allclose(energies(np.deg2rad(states)), -15.0)
+    assert np.all(states[:, 2] > 0)
+    assert np.all(np.isnan(energy_surface_states(SIMPLE_PARAMETERS, -40.0, [[0.0, 0.0, 0.0, 0.0]])[:, 2]))
+
+
+def test_batch_crossings_match_single_trajectories_and_stop_at_the_target():
+    section = PoincareSection.angle()
+    initial = energy_surface_states(SIMPLE_PARAMETERS, -15.0, [[0.0, angle, 0.0, 0.0] for angle in (-30, 10, 50)])
+    crossings = batch_section_crossings(SIMPLE_PARAMETERS, initial, section, crossings=8).array
+
+    np.testing.assert_array_equal(np.bincount(crossings[:, 0].astype(int)), [8, 8, 8])
+    np.testing.assert_allclose(energies(crossings[:, 2:]), -15.0, rtol=1e-5)
+    for row in range(3):
+        single = section_crossings(SIMPLE_PARAMETERS, initial[row], section, crossings=8).array
+        np.testing.assert_allclose(crossings[crossings[:, 0] == row, 1:], single, atol=1e-4)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from src.double_pendulum.chaos import largest_lyapunov_exponents, parameter_sweep
+from src.double_pendulum.math.functions import g, l1, l2, m1, m2
+
+
+SIMPLE_PARAMETERS = {l1: 1.0, l2: 1.0, m1: 1.0, m2: 1.0, g: 9.81}
+CHAOTIC = [120.0, 150.0, 0.0, 0.0]
+
+
+def test_sweep_matches_batched_lyapunov_estimates():
+    sweep = parameter_sweep(SIMPLE_PARAMETERS, {m2: [0.5, 2.0], "l2": [0.5, 1.0, 1.5]}, CHAOTIC, 5.0, chunk_size=4)
+
+    assert sweep.shape == (2, 3) and list(sweep.axes) == ["m2", "l2"]
+    parameters = {**SIMPLE_PARAMETERS, m2: sweep.grid("m2").ravel(), l2: sweep.grid("l2").ravel()}
+    expected = largest_lyapunov_exponents(parameters, np.tile(CHAOTIC, (6, 1)), 5.0)
+    np.testing.assert_allclose(sweep.lyapunov.ravel(), expected)
+    assert np.all(sweep.flips > 0)
+    assert np.all(sweep.max_theta2 >= 150.0) and np.all(sweep.max_theta2 <= 180.0)
+
+
+def test_small_oscillations_never_flip_and_conserve_energy():
+    sweep = parameter_sweep(SIMPLE_PARAMETERS, {"g": [1.0, 9.81, 25.0]}, [10.0, -10.0, 0.0, 0.0], 5.0)
+
+    np.testing.assert_array_equal(sweep.flips, 0)
+    assert np.all(sweep.max_theta2 < 30.0) and np.all(sweep.max_theta2 >= 10.0)
+    assert np.all(sweep.energy_drift < 1e-8)
+
+
+def test_energy_drift_from_a_zero_energy_start_is_absolute():
+    # Released from rest with both arms horizontal, E0 is zero up to rounding
+    sweep = parameter_sweep(SIMPLE_PARAMETERS, {"l1": [1.0, 1.5]}, [90.0, 90.0, 0.0, 0.0], 1.0)
+
+    assert np.all(np.isfinite(sweep.energy_drift))
+    assert np.all(sweep.energy_drift < 1e-6)
+
+
+def test_unknown_parameters_are_rejected():
+    with pytest.raises(ValueError, match="Unknown parameter 'length'"):
+        parameter_sweep(SIMPLE_PARAMETERS, {"length": [1.0]}, CHAOTIC, 1.0)
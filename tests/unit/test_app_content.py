@@ -8,6 +8,8 @@ from app.content.math import MATH_PAGES
 from app.content.not_found import NOT_FOUND_HAIKU_LINES
 from app.content.routes import APP_TITLE, NAVIGATION_ITEMS, PAGES_BY_PATH, PUBLIC_ROUTE_ITEMS
 from app.content.simulation import INFORMATION_TEXT
+from app.callbacks import chaos as chaos_callbacks
+from app.callbacks.chaos import _ensure_computed, register_chaos_callbacks
 from app.callbacks.equations import register_equations_callbacks
 from app.callbacks.routing import register_routing_callbacks
 from app.callbacks.simulation import register_simulation_callbacks
@@ -351,6 +353,56 @@ def test_equations_callback_registration_is_importable():
     assert callable(register_equations_callbacks)
 
 
+def test_chaos_callback_registration_is_importable():
+    assert callable(register_chaos_callbacks)
+
+
+class UnfinishedGrid:
+    key = "0123"
+
+    def complete(self):
+        return False
+
+    def compute(self):
+        raise AssertionError("the grid was computed inside the request")
+
+
+class RecordingGridJobs:
+    def __init__(self, status):
+        self.state = {'status': status, 'progress': 0.0, 'error': 'boom'}
+        self.submitted = []
+
+    def status(self, job_id):
+        return self.state
+
+    def forget(self, job_id):
+        self.state = None
+
+    def submit(self, job_id, function, **settings):
+        self.submitted.append(job_id)
+        return {'status': 'queued', 'progress': 0.0}
+
+
+def test_chaos_grids_are_not_computed_in_the_request_without_background_jobs(monkeypatch):
+    monkeypatch.setattr(chaos_callbacks, "grid_jobs", lambda: None)
+
+    status, finished = _ensure_computed(UnfinishedGrid(), "flip map", None, {})
+
+    assert finished
+    assert "background jobs are turned off" in status
+
+
+def test_failed_chaos_grid_jobs_are_reported_then_resubmitted_on_the_next_visit(monkeypatch):
+    jobs = RecordingGridJobs("failed")
+    monkeypatch.setattr(chaos_callbacks, "grid_jobs", lambda: jobs)
+
+    status, finished = _ensure_computed(UnfinishedGrid(), "flip map", None, {})
+    assert finished and "boom" in status and not jobs.submitted
+
+    status, finished = _ensure_computed(UnfinishedGrid(), "flip map", None, {}, retry=True)
+    assert not finished and jobs.submitted == ["flip-map-0123"]
+
+
 def test_page_modules_return_dash_components():
     page_layouts = [
         home.layout(),
@@ -0,0 +1,77 @@
+import pickle
+
+import pytest
+
+from src.double_pendulum.cache import equations as equation_cache
+from src.double_pendulum.cache.files import atomic_write_bytes, cache_directory
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOUBLE_PENDULUM_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("DOUBLE_PENDULUM_EQUATION_CACHE", raising=False)
+    return tmp_path
+
+
+def fake_derive(model):
+    fake_derive.calls.append(model)
+    return ("derived", model)
+
+
+def test_cache_directory_honours_environment_override(cache_dir):
+    directory = cache_directory("equations")
+
+    assert directory == cache_dir / "equations"
+    assert directory.is_dir()
+
+
+def test_atomic_write_leaves_no_temporary_files(tmp_path):
+    target = atomic_write_bytes(tmp_path / "artifact.bin", b"payload")
+
+    assert target.read_bytes() == b"payload"
+    assert [path.name for path in tmp_path.iterdir()] == ["artifact.bin"]
+
+
+def test_equations_are_derived_once_then_loaded_from_disk(cache_dir):
+    fake_derive.calls = []
+
+    first = equation_cache.load_or_derive_equations("lagrangian", "simple", fake_derive)
+    second = equation_cache.load_or_derive_equations("lagrangian", "simple", fake_derive)
+
+    assert first == second == ("derived", "simple")
+    assert fake_derive.calls == ["simple"]
+    artifact = equation_cache.equation_artifact_path("lagrangian", "simple", fake_derive)
+    assert artifact.exists()
+    assert equation_cache.equation_fingerprint(fake_derive) in artifact.name
+
+
+def test_artifacts_are_keyed_by_formulation_and_model(cache_dir):
+    fake_derive.calls = []
+
+    equation_cache.load_or_derive_equations("lagrangian", "simple", fake_derive)
+    equation_cache.load_or_derive_equations("hamiltonian", "simple", fake_derive)
+    equation_cache.load_or_derive_equations("lagrangian", "compound", fake_derive)
+
+    assert fake_derive.calls == ["simple", "simple", "compound"]
+
+
+def test_corrupted_or_mismatched_artifacts_are_rederived(cache_dir):
+    fake_derive.calls = []
+    artifact = equation_cache.equation_artifact_path("lagrangian", "simple", fake_derive)
+
+    artifact.write_bytes(b"not a pickle")
+    assert equation_cache.load_or_derive_equations("lagrangian", "simple", fake_derive) == ("derived", "simple")
+
+    artifact.write_bytes(pickle.dumps({"version": -1, "equations": "stale"}))
+    assert equation_cache.load_equations("lagrangian", "simple", fake_derive) is None
+
+
+def test_disk_cache_can_be_disabled(cache_dir, monkeypatch):
+    monkeypatch.setenv("DOUBLE_PENDULUM_EQUATION_CACHE", "0")
+    fake_derive.calls = []
+
+    equation_cache.load_or_derive_equations("lagrangian", "simple", fake_derive)
+    equation_cache.load_or_derive_equations("lagrangian", "simple", fake_derive)
+
+    assert fake_derive.calls == ["simple", "simple"]
+    assert not (cache_dir / "equations").exists()
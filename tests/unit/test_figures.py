@@ -0,0 +1,86 @@
+import base64
+
+import numpy as np
+
+from src.double_pendulum.math.functions import g, l1, l2, m1, m2
+from src.double_pendulum.plotting.animation import pack_positions, unpack_positions
+from src.double_pendulum.plotting.figures import WEBGL_THRESHOLD, phase_path_figure, time_graph_figure
+
+
+def make_states(samples):
+    times = np.linspace(0.0, 1.0, samples)
+    states = np.zeros((samples, 4))
+    states[:, 0] = np.pi * times
+    states[:, 1] = -np.pi / 2
+    return times, states
+
+
+def test_time_graph_plots_both_angles_in_degrees():
+    times, states = make_states(11)
+    fig = time_graph_figure(times, states)
+
+    assert [trace.name for trace in fig.data] == ["θ1", "θ2"]
+    assert all(trace.type == "scatter" for trace in fig.data)
+    np.testing.assert_allclose(fig.data[0].y, np.rad2deg(states[:, 0]), rtol=1e-6)
+    np.testing.assert_allclose(fig.data[1].y, -90.0)
+    assert fig.layout.xaxis.title.text == "Time / seconds"
+    assert fig.layout.dragmode is False
+
+
+def test_long_runs_switch_to_webgl():
+    _, states = make_states(WEBGL_THRESHOLD + 1)
+
+    assert phase_path_figure(states).data[0].type == "scattergl"
+    assert phase_path_figure(states, webgl=False).data[0].type == "scatter"
+
+
+def test_figures_do_not_embed_the_default_template():
+    times, states = make_states(11)
+    payload = phase_path_figure(states).to_json()
+
+    assert "histogram2dcontour" not in payload
+    assert len(payload) < 4000
+
+
+def test_packed_positions_round_trip_as_float32():
+    positions = np.random.default_rng(0).normal(size=(4, 101))
+    payload = pack_positions(positions, frame_step=5)
+
+    assert payload["shape"] == [4, 101] and payload["frame_step"] == 5
+    np.testing.assert_allclose(unpack_positions(payload), positions, rtol=1e-6)
+    # 4 bytes per coordinate, base64-encoded in 4-character groups of 3 bytes
+    assert len(payload["data"]) == 4 * -(-4 * 4 * 101 // 3)
+
+
+def typed_array(trace_values):
+    # Figure dicts carry numpy data as plotly.js typed arrays
+    return np.frombuffer(base64.b64decode(trace_values["bdata"]), dtype=trace_values["dtype"])
+
+
+class Reporter:
+    def __init__(self):
+        self.chunks = []
+
+    def __call__(self, fraction):
+        pass
+
+    def publish(self, chunk):
+        self.chunks.append(chunk)
+
+
+def test_streamed_chunks_add_up_to_the_final_figures():
+    from app.callbacks.simulation import _extend_data, simulate_figures, stream_figures
+
+    parameters = {l1: 1.0, l2: 1.0, m1: 1.0, m2: 1.0, g: 9.81}
+    reporter = Reporter()
+    time_fig, phase_fig, animation_fig, animation_data = simulate_figures(
+        "lagrangian", "simple", parameters, [100, 150, 0, 0], 0, 2.5, progress=reporter, stream=True)
+    time_extend, phase_extend, animation_extend = _extend_data(reporter.chunks)
+
+    assert len(reporter.chunks) == 3
+    assert time_extend[1] == [0, 1] and animation_extend[1] == [1, 2]
+    np.testing.assert_allclose(time_extend[0]["y"][0], typed_array(time_fig["data"][0]["y"]), atol=1e-3)
+    np.testing.assert_allclose(phase_extend[0]["x"][0], typed_array(phase_fig["data"][0]["x"]), atol=1e-3)
+    np.testing.assert_allclose(animation_extend[0]["x"][1], unpack_positions(animation_data)[2], atol=1e-3)
+    # The figures shown while streaming start out empty
+    assert all(len(trace["x"]) == 0 for trace in stream_figures(parameters, [100, 150, 0, 0], 0, 2.5)[0]["data"])
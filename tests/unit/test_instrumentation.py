@@ -0,0 +1,79 @@
+import json
+import logging
+
+import numpy as np
+import pytest
+from scipy.integrate import solve_ivp
+
+from src.double_pendulum import instrumentation
+from src.double_pendulum.math.functions import g, l1, l2, m1, m2
+from src.double_pendulum.models import DoublePendulumLagrangian
+
+
+@pytest.fixture
+def timing():
+    instrumentation.configure(True)
+    instrumentation.reset()
+    yield
+    instrumentation.configure(False)
+    instrumentation.reset()
+
+
+def records(caplog):
+    return [json.loads(record.getMessage()) for record in caplog.records if record.name == "double_pendulum.stages"]
+
+
+def test_disabled_stages_are_a_shared_no_op():
+    instrumentation.configure(False)
+
+    with instrumentation.stage("validation") as timing:
+        timing.add(nfev=10)
+
+    assert instrumentation.stage("a") is instrumentation.stage("b") is instrumentation.current_stage()
+    assert "validation" not in instrumentation.histograms()
+
+
+def test_nested_stages_log_their_parent_and_fill_histograms(timing, caplog):
+    caplog.set_level(logging.INFO, logger="double_pendulum.stages")
+    with instrumentation.stage("simulation", model="simple"):
+        with instrumentation.stage("integration"):
+            instrumentation.current_stage().add(nfev=5)
+            instrumentation.current_stage().add(nfev=7)
+
+    integration, simulation = records(caplog)
+    assert integration["parent"] == "simulation" and integration["nfev"] == 12
+    assert simulation["parent"] is None and simulation["model"] == "simple"
+    assert simulation["wall_ms"] >= integration["wall_ms"]
+
+    histogram = instrumentation.histograms()["integration"]
+    assert histogram["count"] == 1
+    assert histogram["buckets"][-1] == (float("inf"), 1)
+
+
+def test_failed_stages_are_recorded_with_the_error(timing, caplog):
+    caplog.set_level(logging.INFO, logger="double_pendulum.stages")
+    with pytest.raises(ValueError):
+        with instrumentation.stage("validation"):
+            raise ValueError("bad input")
+
+    assert records(caplog)[0]["error"] == "ValueError"
+
+
+@pytest.mark.parametrize(("method", "stages"), [("RK45", 6), ("RK23", 3)])
+def test_rejected_steps_account_for_every_function_evaluation(method, stages):
+    result = solve_ivp(lambda t, y: [y[1], -30 * np.sin(y[0])], (0, 20), [2.9, 0], method=method,
+                       dense_output=True)
+    counts = instrumentation.solve_ivp_counts(result, method)
+
+    assert counts["rejected_steps"] > 0
+    assert 2 + stages * (counts["accepted_steps"] + counts["rejected_steps"]) == counts["nfev"]
+
+
+def test_model_records_equation_kernel_and_integration_stages(timing, caplog):
+    caplog.set_level(logging.INFO, logger="double_pendulum.stages")
+    DoublePendulumLagrangian({l1: 1.0, l2: 1.0, m1: 1.0, m2: 1.0, g: 9.81}, [10, 20, 0, 0], [0, 2, 21])
+
+    by_stage = {record["stage"]: record for record in records(caplog)}
+    assert {"equations", "kernel", "integration"} <= set(by_stage)
+    assert by_stage["integration"]["nfev"] > 0 and by_stage["integration"]["accepted_steps"] > 0
+    assert "method" not in by_stage["integration"]
@@ -0,0 +1,238 @@
+import os
+import time
+
+import pytest
+
+from src.double_pendulum.jobs import CANCELLED, DONE, FAILED, JobManager, JobStore, grid_jobs, simulation_jobs
+from src.double_pendulum.jobs.manager import JOB_RETENTION_SECONDS, SUBSCRIBER_STALE_SECONDS
+from src.double_pendulum.numerics import ProgressTracker
+
+
+# Job functions run in spawned pool processes, so they must be importable module-level functions
+
+def count_to(n, progress):
+    for i in range(n):
+        progress((i + 1) / n)
+    return n
+
+
+def spin_until_cancelled(progress):
+    while True:
+        progress(0.5)
+        time.sleep(0.01)
+
+
+def publish_squares(n, progress):
+    for i in range(n):
+        progress.publish(i * i)
+    return n
+
+
+def fail(progress):
+    raise ValueError("bad input")
+
+
+def mark_worker():
+    os.environ["JOB_TEST_WORKER"] = str(os.getpid())
+
+
+def worker_mark(progress):
+    return os.environ.get("JOB_TEST_WORKER") == str(os.getpid())
+
+
+def wait_for(manager, job_id, statuses, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        state = manager.status(job_id)
+        if state is not None and state['status'] in statuses:
+            return state
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not reach {statuses}: {manager.status(job_id)}")
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = JobManager(tmp_path, max_workers=1)
+    yield manager
+    manager.shutdown()
+
+
+def test_job_runs_to_completion_and_returns_its_result(manager):
+    manager.submit("count", count_to, 5)
+
+    state = wait_for(manager, "count", (DONE, FAILED))
+
+    assert state['status'] == DONE and state['progress'] == 1.0
+    assert manager.result("count") == 5
+
+
+def test_published_chunks_are_read_back_in_order_from_any_index(manager):
+    manager.submit("squares", publish_squares, 4)
+    wait_for(manager, "squares", (DONE, FAILED))
+
+    assert manager.chunks("squares") == [0, 1, 4, 9]
+    assert manager.chunks("squares", 3) == [9]
+    assert manager.chunks("squares", 4) == []
+
+
+def test_pool_processes_run_the_initializer_before_their_first_job(tmp_path):
+    manager = JobManager(tmp_path, max_workers=1, initializer=mark_worker)
+    try:
+        manager.submit("mark", worker_mark)
+
+        assert wait_for(manager, "mark", (DONE, FAILED))['status'] == DONE
+        assert manager.result("mark") is True
+    finally:
+        manager.shutdown()
+
+
+def test_failures_are_recorded_with_their_message(manager):
+    manager.submit("fail", fail)
+
+    state = wait_for(manager, "fail", (DONE, FAILED))
+
+    assert state['status'] == FAILED
+    assert state['error'] == "ValueError: bad input"
+
+
+def test_running_job_stops_at_its_next_progress_report_after_cancel(manager):
+    manager.submit("spin", spin_until_cancelled)
+    wait_for(manager, "spin", ("running",))
+
+    manager.cancel("spin")
+
+    assert wait_for(manager, "spin", (CANCELLED, DONE, FAILED))['status'] == CANCELLED
+    # The worker is free again
+    manager.submit("count", count_to, 1)
+    assert wait_for(manager, "count", (DONE, FAILED))['status'] == DONE
+
+
+def test_restarting_a_cancelled_job_does_not_revive_the_run_still_stopping(tmp_path):
+    manager = JobManager(tmp_path, max_workers=2)
+    try:
+        manager.submit("job", spin_until_cancelled)
+        wait_for(manager, "job", ("running",))
+        manager.cancel("job")
+        manager.submit("job", count_to, 3)
+
+        assert wait_for(manager, "job", (DONE, FAILED))['status'] == DONE
+        # The cancelled run has had time to stop; it must not have overwritten the new run's state
+        time.sleep(0.3)
+        assert manager.status("job")['status'] == DONE
+        assert manager.result("job") == 3
+    finally:
+        manager.shutdown()
+
+
+def test_polling_a_job_cancelled_while_queued(manager):
+    manager.submit("spin", spin_until_cancelled)
+    manager.submit("queued", count_to, 1)
+
+    manager.cancel("queued")
+
+    assert manager.status("queued")['status'] == CANCELLED
+    manager.cancel("spin")
+    wait_for(manager, "spin", (CANCELLED, DONE, FAILED))
+
+
+def test_identical_active_jobs_are_submitted_once(tmp_path):
+    store = JobStore(tmp_path)
+    store.update("busy", "running", progress=0.3)
+    manager = JobManager(tmp_path)
+
+    assert manager.submit("busy", count_to, 1)['progress'] == 0.3
+    assert manager._executor is None
+
+
+def test_cancel_from_one_subscriber_leaves_a_shared_job_running(manager):
+    first, second = manager.subscribe("spin"), manager.subscribe("spin")
+    manager.submit("spin", spin_until_cancelled)
+    wait_for(manager, "spin", ("running",))
+
+    manager.cancel("spin", first)
+    time.sleep(0.2)
+    assert manager.status("spin", second)['status'] == "running"
+
+    manager.cancel("spin", second)
+    assert wait_for(manager, "spin", (CANCELLED, DONE, FAILED))['status'] == CANCELLED
+
+
+def test_subscribers_that_stop_polling_do_not_keep_a_job_alive(tmp_path):
+    store = JobStore(tmp_path)
+    store.watch("job", "gone")
+    old = time.time() - SUBSCRIBER_STALE_SECONDS - 1
+    os.utime(tmp_path / "job.watch-gone", (old, old))
+    store.watch("job", "here")
+
+    assert store.watchers("job") == 1
+
+
+def test_restarting_a_job_keeps_the_chunks_other_sessions_are_polling(tmp_path):
+    store = JobStore(tmp_path)
+    store.write_chunk("rerun", 0, "first")
+    store.update("rerun", CANCELLED)
+    manager = JobManager(tmp_path, max_workers=1)
+    try:
+        manager.submit("rerun", publish_squares, 2)
+        # Before the restarted job has published anything the old chunk is still readable
+        assert len(manager.chunks("rerun")) >= 1
+        wait_for(manager, "rerun", (DONE, FAILED))
+        assert manager.chunks("rerun") == [0, 1]
+    finally:
+        manager.shutdown()
+
+
+def test_finished_jobs_are_reused_until_pruned(tmp_path):
+    store = JobStore(tmp_path)
+    store.write_result("done", 42)
+    store.update("done", DONE, progress=1.0)
+    manager = JobManager(tmp_path)
+
+    assert manager.submit("done", count_to, 1)['status'] == DONE
+    assert manager.result("done") == 42
+    assert manager._executor is None
+
+
+def test_prune_keeps_old_files_of_jobs_with_live_subscribers(tmp_path):
+    store = JobStore(tmp_path)
+    for job_id in ("watched", "abandoned"):
+        store.write_chunk(job_id, 0, "chunk")
+    old = time.time() - 2 * JOB_RETENTION_SECONDS
+    for path in tmp_path.iterdir():
+        os.utime(path, (old, old))
+    store.watch("watched", "session")
+
+    store.prune()
+
+    assert store.read_chunks("watched") == ["chunk"]
+    assert store.read_chunks("abandoned") == []
+
+
+def test_grid_jobs_run_on_their_own_single_process_pool(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOUBLE_PENDULUM_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("DOUBLE_PENDULUM_BACKGROUND_JOBS", raising=False)
+    grid_jobs.cache_clear()
+    simulation_jobs.cache_clear()
+    try:
+        assert grid_jobs().max_workers == 1
+        assert grid_jobs() is not simulation_jobs()
+        assert grid_jobs().store.directory != simulation_jobs().store.directory
+        # Both pools load the kernels as their processes start
+        assert grid_jobs().initializer is not None and simulation_jobs().initializer is not None
+
+        monkeypatch.setenv("DOUBLE_PENDULUM_BACKGROUND_JOBS", "0")
+        grid_jobs.cache_clear()
+        assert grid_jobs() is None
+    finally:
+        grid_jobs.cache_clear()
+        simulation_jobs.cache_clear()
+
+
+def test_progress_tracker_reports_each_resolution_step():
+    reports = []
+    tracker = ProgressTracker(reports.append, 10.0, 20.0, resolution=0.25)
+    for t in (10.0, 11.0, 12.6, 12.7, 15.0, 17.6, 20.0):
+        tracker.update(t)
+
+    # 12.7, 15.0 and 20.0 are less than a quarter of the span past the previous report
+    assert reports == pytest.approx([0.26, 0.76])
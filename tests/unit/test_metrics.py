@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from src.double_pendulum.instrumentation import metrics
+from src.double_pendulum.math.functions import g, l1, l2, m1, m2
+from src.double_pendulum.models import DoublePendulumLagrangian
+from src.double_pendulum.numerics import rk4
+
+
+@pytest.fixture
+def recording(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOUBLE_PENDULUM_CACHE_DIR", str(tmp_path))
+    metrics.configure(True)
+    metrics.reset()
+    yield tmp_path / "metrics"
+    metrics.configure(False)
+    metrics.reset()
+
+
+def test_nothing_is_recorded_while_disabled(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOUBLE_PENDULUM_CACHE_DIR", str(tmp_path))
+    metrics.configure(False)
+    metrics.increment("double_pendulum_simulation_requests_total", model="simple")
+    metrics.flush()
+
+    assert not (tmp_path / "metrics").exists()
+
+
+def test_exposition_sums_every_process(recording):
+    metrics.increment("double_pendulum_cache_requests_total", cache="results", result="hit")
+    metrics.observe("double_pendulum_integration_seconds", 0.02, formulation="lagrangian", model="simple")
+    metrics.increment("double_pendulum_rhs_evaluations_total", 500, formulation="lagrangian", model="simple")
+    metrics.flush()
+    # Another worker's flushed snapshot
+    (recording / "other.json").write_text(json.dumps({
+        "counters": [["double_pendulum_cache_requests_total", {"cache": "results", "result": "miss"}, 3]],
+        "histograms": [["double_pendulum_integration_seconds", {"formulation": "lagrangian", "model": "simple"},
+                        [0] * 5 + [1] + [0] * 10, 0.03]],
+    }))
+
+    lines = metrics.exposition().splitlines()
+
+    assert "# TYPE double_pendulum_integration_seconds histogram" in lines
+    assert 'double_pendulum_integration_seconds_bucket{formulation="lagrangian",model="simple",le="0.025"} 1' in lines
+    assert 'double_pendulum_integration_seconds_bucket{formulation="lagrangian",model="simple",le="+Inf"} 2' in lines
+    assert 'double_pendulum_integration_seconds_count{formulation="lagrangian",model="simple"} 2' in lines
+    assert 'double_pendulum_rhs_evaluations_per_second{formulation="lagrangian",model="simple"} 10000.0' in lines
+    assert 'double_pendulum_cache_hit_ratio{cache="results"} 0.25' in lines
+
+
+@pytest.mark.parametrize("integrator", [rk4, None])
+def test_models_record_integration_latency_and_evaluations(recording, integrator):
+    options = {} if integrator is None else {"integrator": integrator}
+    pendulum = DoublePendulumLagrangian({l1: 1.0, l2: 1.0, m1: 1.0, m2: 1.0, g: 9.81}, [10, 20, 0, 0],
+                                        [0, 2, 201], **options)
+    counters, histograms = metrics.collect()
+
+    labels = (("formulation", "lagrangian"), ("model", "simple"))
+    assert pendulum.evaluations > 0
+    assert counters[("double_pendulum_rhs_evaluations_total", labels)] == pendulum.evaluations
+    assert sum(histograms[("double_pendulum_integration_seconds", labels)]["counts"]) == 1
+    if integrator is rk4:
+        assert pendulum.evaluations == 4 * 200
+
+
+def test_metrics_route_is_only_served_when_enabled(recording):
+    import pendulum_app
+
+    client = pendulum_app.server.test_client()
+    client.get("/_dash-layout")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert 'double_pendulum_response_bytes_count{route="/_dash-layout"} 1' in response.get_data(as_text=True)
+    assert "# TYPE double_pendulum_jobs_in_flight gauge" in response.get_data(as_text=True)
+    # Chaos-page grids run on their own pool and are counted under their own label
+    assert 'double_pendulum_jobs_in_flight{pool="grid",status="running"}' in response.get_data(as_text=True)
+
+    metrics.configure(False)
+    assert client.get("/metrics").status_code == 404
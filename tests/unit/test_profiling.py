@@ -0,0 +1,67 @@
+import pstats
+import re
+
+import pytest
+from flask import Flask
+
+from app.profiling import PROFILE_HEADER, profile_requested
+from src.double_pendulum.instrumentation.profiling import Profiler, profiling_active
+
+
+def spin(seconds):
+    import time
+
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_profiler_writes_a_profile_and_collapsed_stacks(tmp_path):
+    with Profiler("spin", directory=tmp_path) as profiler:
+        assert profiling_active()
+        spin(0.2)
+
+    assert not profiling_active()
+    profile_path, collapsed_path = profiler.paths
+    assert profile_path.parent == tmp_path and re.fullmatch(r"\d{8}T\d{9}-spin-\d+\.prof", profile_path.name)
+    assert any(name == "spin" for _, _, name in pstats.Stats(str(profile_path)).stats)
+
+    lines = collapsed_path.read_text().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    # Stacks start at the frame that entered the profiler
+    assert stack.startswith("test_profiler_writes_a_profile_and_collapsed_stacks (test_profiling.py:")
+    assert "spin (test_profiling.py:" in stack and int(count) > 0
+
+
+@pytest.mark.parametrize(("enabled", "request_options", "expected"), [
+    ("1", {"headers": {PROFILE_HEADER: "1"}}, True),
+    ("1", {"query_string": "profile=1"}, True),
+    ("1", {"headers": {"Referer": "http://localhost/simulation?profile=true"}}, True),
+    ("1", {}, False),
+    ("0", {"headers": {PROFILE_HEADER: "1"}}, False),
+])
+def test_requests_opt_in_only_when_profiling_is_enabled(monkeypatch, enabled, request_options, expected):
+    monkeypatch.setenv("DOUBLE_PENDULUM_PROFILING", enabled)
+
+    with Flask(__name__).test_request_context("/_dash-update-component", method="POST", **request_options):
+        assert profile_requested() is expected
+    assert profile_requested() is False
+
+
+def test_profiled_update_graphs_covers_model_construction(tmp_path, monkeypatch):
+    import pendulum_app
+
+    monkeypatch.setenv("DOUBLE_PENDULUM_PROFILING", "1")
+    monkeypatch.setenv("DOUBLE_PENDULUM_PROFILE_DIR", str(tmp_path))
+    update_graphs = next(spec["callback"].__wrapped__ for spec in pendulum_app.app.callback_map.values()
+                         if any(item["id"] == "submit-val" for item in spec["inputs"]))
+
+    with pendulum_app.server.test_request_context(headers={PROFILE_HEADER: "1"}):
+        outputs = update_graphs(1, 90, 90, 0, 0, 0, 1, 1, 1, 1, 1, 1, 1, 9.81, "simple", "lagrangian")
+
+    # Simulated in the request rather than handed to a background job
+    assert outputs[0]["data"] and outputs[8] is None
+    profile_path, = tmp_path.glob("*-update_graphs-*.prof")
+    assert (profile_path.with_suffix(".collapsed")).exists()
+    functions = {(file.rsplit("/", 1)[-1], name) for file, _, name in pstats.Stats(str(profile_path)).stats}
+    assert ("lagrangian.py", "__init__") in functions
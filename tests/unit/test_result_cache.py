@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.double_pendulum.cache import results as result_cache
+from src.double_pendulum.cache.results import ResultCache, simulation_key
+from src.double_pendulum.math.functions import g, l1, l2, m1, m2
+
+
+PARAMETERS = {l1: 1.0, l2: 1.0, m1: 1.0, m2: 1.0, g: 9.81}
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOUBLE_PENDULUM_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("DOUBLE_PENDULUM_RESULT_CACHE", raising=False)
+    result_cache.simulation_results.cache_clear()
+    yield tmp_path
+    result_cache.simulation_results.cache_clear()
+
+
+def test_simulation_key_normalizes_equivalent_requests():
+    key = simulation_key("lagrangian", "simple", PARAMETERS, [10, 20, 0, 0], (0, 20))
+    by_name = {"l1": 1, "l2": 1, "m1": 1, "m2": 1, "g": 9.81}
+
+    assert simulation_key("lagrangian", "simple", by_name, np.array([10.0, 20.0, 0.0, 0.0]), [0.0, 20.0]) == key
+    assert simulation_key("hamiltonian", "simple", PARAMETERS, [10, 20, 0, 0], (0, 20)) != key
+    assert simulation_key("lagrangian", "simple", PARAMETERS, [10, 20, 0, 0], (0, 20), {"rtol": 1e-9}) != key
+
+
+def test_lru_eviction_is_bounded_by_bytes():
+    cache = ResultCache(max_bytes=2500)
+    cache.put("a", b"x" * 1000)
+    cache.put("b", b"x" * 1000)
+    cache.get("a")  # "b" is now least recently used
+    cache.put("c", b"x" * 1000)
+
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.get("b") is None
+    assert cache.size <= 2500
+    cache.put("huge", b"x" * 5000)
+    assert cache.get("huge") is None
+
+
+def test_file_backend_is_shared_between_cache_instances(tmp_path):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"figure": [1.0, 2.0]}
+
+    first = ResultCache(directory=tmp_path)
+    second = ResultCache(directory=tmp_path)
+
+    assert first.get_or_compute("key", compute) == {"figure": [1.0, 2.0]}
+    assert second.get_or_compute("key", compute) == {"figure": [1.0, 2.0]}
+    assert len(calls) == 1
+
+
+def test_file_backend_evicts_least_recently_used_entries(tmp_path):
+    cache = ResultCache(max_bytes=2500, directory=tmp_path)
+    cache.put("old", b"x" * 1000)
+    os.utime(tmp_path / "old.pickle", (0, 0))
+    cache.put("new", b"x" * 1000)
+    cache.put("newest", b"x" * 1000)
+
+    assert sorted(path.stem for path in tmp_path.iterdir()) == ["new", "newest"]
+
+
+def test_corrupted_entries_are_misses(tmp_path):
+    (tmp_path / "key.pickle").write_bytes(b"not a pickle")
+
+    assert ResultCache(directory=tmp_path).get("key") is None
+
+
+def test_environment_selects_the_backend(cache_dir, monkeypatch):
+    assert result_cache.simulation_results().directory == cache_dir / "results"
+
+    result_cache.simulation_results.cache_clear()
+    monkeypatch.setenv("DOUBLE_PENDULUM_RESULT_CACHE", "memory")
+    assert result_cache.simulation_results().directory is None
+
+    result_cache.simulation_results.cache_clear()
+    monkeypatch.setenv("DOUBLE_PENDULUM_RESULT_CACHE", "0")
+    assert result_cache.simulation_results() is None
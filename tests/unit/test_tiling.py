@@ -0,0 +1,92 @@
+import os
+from functools import partial
+
+import numpy as np
+import pytest
+
+from src.double_pendulum.chaos import tiling
+from src.double_pendulum.chaos.tiling import TiledArray, TileScheduler, balance_tiles, grid_tiles, tile_cells
+
+
+# Tasks run in spawned pool processes, so they must be importable module-level functions
+def fill_with_row_index(path, shape, tile):
+    rows = np.arange(tile[0], tile[1], dtype=np.float32)[:, None]
+    TiledArray(path, shape).write(tile, np.broadcast_to(rows, (tile[1] - tile[0], tile[3] - tile[2])))
+
+
+def fail_on_second_row(tile):
+    if tile[0] == 1:
+        raise RuntimeError("tile failed")
+
+
+def covered(tiles, shape):
+    counts = np.zeros(shape, dtype=int)
+    for r0, r1, c0, c1 in tiles:
+        counts[r0:r1, c0:c1] += 1
+    return counts
+
+
+def test_balanced_tiles_split_expensive_regions_and_cover_the_grid_once():
+    shape = (16, 16)
+    expensive = np.zeros(shape)
+    expensive[:4, :4] = 100.0
+
+    def cost(tile):
+        return 1.0 + expensive[tile[0]:tile[1], tile[2]:tile[3]].sum()
+
+    tiles = balance_tiles(grid_tiles(shape, 8), cost, workers=2)
+
+    np.testing.assert_array_equal(covered(tiles, shape), 1)
+    # The costly corner is cut down until no tile exceeds an eighth of the total; the cheap rest stays whole
+    total = sum(cost(tile) for tile in grid_tiles(shape, 8))
+    assert max(cost(tile) for tile in tiles if tile_cells(tile) > 1) <= total / 8
+    assert (0, 8, 8, 16) in tiles and (8, 16, 0, 8) in tiles
+    assert [cost(tile) for tile in tiles] == sorted((cost(tile) for tile in tiles), reverse=True)
+
+
+def test_tiled_array_starts_pending_and_keeps_written_tiles(tmp_path):
+    array = TiledArray(tmp_path / "grid.npy", (4, 6))
+    tiles = grid_tiles(array.shape, 2)
+    assert array.pending(tiles) == tiles
+
+    array.write(tiles[0], np.ones((2, 2)))
+
+    assert array.pending(tiles) == tiles[1:]
+    np.testing.assert_array_equal(TiledArray(tmp_path / "grid.npy", (4, 6)).open()[:2, :2], 1.0)
+
+
+def test_tiled_array_created_concurrently_keeps_the_first_file_and_its_tiles(tmp_path, monkeypatch):
+    path, shape = tmp_path / "grid.npy", (4, 4)
+    link = os.link
+
+    def publish_after_a_competitor(source, destination):
+        # Another process creates the file and writes a tile between our existence check and publication
+        monkeypatch.setattr(tiling.os, "link", link)
+        TiledArray(path, shape).write((0, 2, 0, 4), np.ones((2, 4)))
+        link(source, destination)
+
+    monkeypatch.setattr(tiling.os, "link", publish_after_a_competitor)
+    array = TiledArray(path, shape).open()
+
+    np.testing.assert_array_equal(array[:2], 1.0)
+    assert np.isnan(array[2:]).all()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["grid.npy"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_scheduler_runs_every_tile_and_reports_progress(tmp_path, workers):
+    shape = (6, 5)
+    path = tmp_path / "grid.npy"
+    TiledArray(path, shape).open()
+    fractions = []
+
+    TileScheduler(workers, prefetch=1).run(partial(fill_with_row_index, path, shape), grid_tiles(shape, 2),
+                                           progress=fractions.append)
+
+    np.testing.assert_array_equal(TiledArray(path, shape).open(), np.repeat(np.arange(6.0)[:, None], 5, axis=1))
+    assert fractions == sorted(fractions) and fractions[-1] == 1.0 and len(fractions) == 9
+
+
+def test_scheduler_reraises_task_failures():
+    with pytest.raises(RuntimeError, match="tile failed"):
+        TileScheduler(2).run(fail_on_second_row, [(0, 1, 0, 1), (1, 2, 0, 1), (2, 3, 0, 1)])